@@ -0,0 +1,3 @@
+"""
+Benchmark suite for the ETL and patient integration hot paths
+"""
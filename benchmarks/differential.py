@@ -0,0 +1,296 @@
+"""
+Differential harness: reference functions vs their optimized paths.
+
+Every case generates a randomized dirty input (accents in both cases, odd
+whitespace, empty and null fields, malformed NSS, ``9999-99-99`` and
+impossible dates, 97/98/99 codes), runs the reference implementation and
+the optimized engine on it, and compares records, rejects and stats. Both
+sides are timed, so a speedup is only reported next to a passing comparison.
+
+Pairs:
+
+- normalize_text          -> mapping.compiler.vec_normalize_text
+- apply_mapping           -> mapping.compiler.CompiledMapping.run
+- deduplicate             -> etl.external_dedup.external_deduplicate
+- ingest_relational_data  -> models.landing.columnar.CasosColumnar
+- actividad6_estadisticas -> mapping.compiler.estadisticas_frame
+
+Records are compared as they come out of each path, without rewriting
+either side; only pandas nulls (NaN, NA) are read as ``None``. Nulls are
+generated both as ``None`` (SQL loaders) and as float NaN (``read_csv``,
+JSON frames with missing keys).
+
+Usage::
+
+    python -m benchmarks.differential --rows 20000 --seeds 0 1 2
+"""
+import argparse
+import io
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import APELLIDOS, BOOL_COLS, NOMBRES, relational_frame
+
+# Piezas de texto sucio: acentos en minúscula y mayúscula, espacios raros
+TEXT_NOISE = ['', ' ', '  ', '\t', '\xa0', '\n', '\u3000']
+EXTRA_WORDS = ['de la', 'DEL', 'núñez', 'ÁLVAREZ', 'Güemes', 'peña', 'O\'Higgins', 'Y', '2da']
+MALFORMED_NSS = [None, '', 'N/A', 'sin nss', 'AB-12.34', '0477 964 3499', '12', '00000000',
+                 '-5', '123456789012345', ' 98765432101 ', '9.87E+10']
+BAD_DATES = ['9999-99-99', '2021-02-30', '2999-01-01', '', '21-01-2021']
+CODES_NA = [97, 98, 99]
+
+
+def _null_value(rng: np.random.Generator) -> Any:
+    return None if rng.random() < 0.5 else np.nan
+
+
+def _dirty_text(rng: np.random.Generator, words: List[str], null_rate: float = 0.03) -> Any:
+    r = rng.random()
+    if r < null_rate:
+        return _null_value(rng)
+    if r < null_rate * 2:
+        return str(rng.choice(TEXT_NOISE))
+    parts = [str(rng.choice(words))]
+    if rng.random() < 0.3:
+        parts.append(str(rng.choice(EXTRA_WORDS)))
+    text = str(rng.choice(TEXT_NOISE)).join(parts) if rng.random() < 0.3 else ' '.join(parts)
+    if rng.random() < 0.3:
+        text = text.lower() if rng.random() < 0.5 else text.swapcase()
+    return str(rng.choice(TEXT_NOISE)) + text + str(rng.choice(TEXT_NOISE))
+
+
+def dirty_patients_frame(rows: int, seed: int = 0, dup_rate: float = 0.2,
+                         malformed_rate: float = 0.05) -> pd.DataFrame:
+    """Pacientes NOMBRE/APELLIDO/NSS/Direccion con texto sucio, NSS mal formados y duplicados"""
+    rng = np.random.default_rng(seed)
+    nss: List[Any] = [str(v) for v in rng.integers(10**10, 10**11, rows)]
+    for i in np.flatnonzero(rng.random(rows) < dup_rate):
+        nss[i] = nss[int(rng.integers(0, rows))]
+    for i in np.flatnonzero(rng.random(rows) < malformed_rate):
+        nss[i] = MALFORMED_NSS[int(rng.integers(0, len(MALFORMED_NSS)))]
+        if nss[i] is None:
+            nss[i] = _null_value(rng)
+    nombres = [_dirty_text(rng, NOMBRES) for _ in range(rows)]
+    apellidos = [_dirty_text(rng, APELLIDOS) for _ in range(rows)]
+    # Duplicados exactos (misma persona en el mismo lote)
+    for i in np.flatnonzero(rng.random(rows) < dup_rate / 2):
+        j = int(rng.integers(0, rows))
+        nombres[i], apellidos[i], nss[i] = nombres[j], apellidos[j], nss[j]
+    direcciones = [_null_value(rng) if rng.random() < 0.05 else
+                   f'{rng.choice(TEXT_NOISE)}Calle {rng.choice(APELLIDOS)}  #{rng.integers(1, 999)}'
+                   for _ in range(rows)]
+    return pd.DataFrame({'NOMBRE': nombres, 'APELLIDO': apellidos, 'NSS': nss, 'Direccion': direcciones},
+                        dtype=object)
+
+
+def dirty_relational_frame(rows: int, seed: int = 0, dirty_rate: float = 0.05) -> pd.DataFrame:
+    """
+    COVID19MEXICO.csv sucio, pasado por CSV ida y vuelta y leído con los mismos
+    dtypes que ingest_relational_data.
+    """
+    from src.etl.ingestion import RELATIONAL_DTYPES
+    rng = np.random.default_rng(seed + 1)
+    df = relational_frame(rows, seed, dirty_rate).astype({'EDAD': object, 'RESULTADO_PCR': object})
+    for col in ('FECHA_ACTUALIZACION', 'FECHA_INGRESO', 'FECHA_SINTOMAS', 'FECHA_DEF'):
+        mask = rng.random(rows) < dirty_rate
+        df.loc[mask, col] = rng.choice(BAD_DATES, int(mask.sum()))
+    died = rng.random(rows) < 0.1
+    df.loc[died, 'FECHA_DEF'] = df.loc[died, 'FECHA_INGRESO']
+    df.loc[rng.random(rows) < dirty_rate / 5, 'EDAD'] = 'N/A'
+    df.loc[rng.random(rows) < dirty_rate, 'RESULTADO_PCR'] = None
+    for col in BOOL_COLS:
+        mask = rng.random(rows) < dirty_rate
+        df.loc[mask, col] = rng.choice(CODES_NA, int(mask.sum()))
+    df.loc[rng.random(rows) < dirty_rate, 'PAIS_NACIONALIDAD'] = 'Estados Unidos de América'
+    # Códigos fuera de catálogo que no son enteros
+    df['SECTOR'] = df['SECTOR'].astype(object)
+    df.loc[rng.random(rows) < dirty_rate / 5, 'SECTOR'] = rng.choice(['X', '2.5', ''], 1)[0]
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False)
+    buffer.seek(0)
+    return pd.read_csv(buffer, dtype=RELATIONAL_DTYPES)
+
+
+# --- Comparación ---
+
+@dataclass
+class CaseResult:
+    name: str
+    seed: int
+    rows: int
+    reference_seconds: float
+    optimized_seconds: float
+    mismatches: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.mismatches
+
+    @property
+    def speedup(self) -> Optional[float]:
+        return self.reference_seconds / self.optimized_seconds if self.optimized_seconds else None
+
+
+def _timed(fn: Callable[[], Any]) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def _null(value: Any) -> Any:
+    return None if value is None or value is pd.NA or (isinstance(value, float) and np.isnan(value)) else value
+
+
+def diff_records(reference: List[Dict[str, Any]], optimized: List[Dict[str, Any]],
+                 max_report: int = 5) -> List[str]:
+    """Diferencias registro a registro (en orden), con nulos de pandas como None"""
+    problems = []
+    if len(reference) != len(optimized):
+        problems.append(f'records: {len(reference)} reference vs {len(optimized)} optimized')
+    for i, (ref, opt) in enumerate(zip(reference, optimized)):
+        ref = {k: _null(v) for k, v in ref.items()}
+        opt = {k: _null(v) for k, v in opt.items()}
+        if ref != opt:
+            fields = sorted(k for k in ref.keys() | opt.keys() if ref.get(k) != opt.get(k))
+            problems.append(f'record {i}: ' + ', '.join(f'{k}={ref.get(k)!r} vs {opt.get(k)!r}'
+                                                           for k in fields))
+            if len(problems) >= max_report:
+                break
+    return problems
+
+
+def _diff_values(label: str, reference: Any, optimized: Any) -> List[str]:
+    return [] if reference == optimized else [f'{label}: {reference!r} vs {optimized!r}']
+
+
+# --- Casos: cada uno devuelve un CaseResult ---
+
+def case_normalize_text(rows: int, seed: int) -> CaseResult:
+    from src.etl.patients_integration import normalize_text
+    from src.mapping.compiler import vec_normalize_text
+    df = dirty_patients_frame(rows, seed)
+    values = df['NOMBRE'].tolist() + df['APELLIDO'].tolist() + df['Direccion'].tolist()
+    ref, t_ref = _timed(lambda: [normalize_text(v) for v in values])
+    opt, t_opt = _timed(lambda: vec_normalize_text(pd.Series(values, dtype=object)).tolist())
+    problems = diff_records([{'value': v} for v in ref], [{'value': v} for v in opt])
+    return CaseResult('normalize_text', seed, len(values), t_ref, t_opt, problems)
+
+
+def case_apply_mapping(rows: int, seed: int) -> CaseResult:
+    from src.etl.metrics import RunMetrics
+    from src.etl.patients_integration import MAPPING_SIGLO21, apply_mapping
+    from src.mapping.compiler import load_mapping
+    df = dirty_patients_frame(rows, seed)
+    compiled = load_mapping('siglo21')
+    metrics = RunMetrics()
+    ref, t_ref = _timed(lambda: apply_mapping(df, MAPPING_SIGLO21, 'Siglo21', metrics))
+    opt, t_opt = _timed(lambda: compiled.run(df))
+    stage = metrics.stages[-1]
+    problems = diff_records([p.model_dump() for p in ref], [p.model_dump() for p in opt.to_models()])
+    problems += _diff_values('rows_out', stage.rows_out, opt.report.rows_out)
+    problems += _diff_values('rejects', stage.rows_rejected, sum(opt.report.rejects.values()))
+    return CaseResult('apply_mapping', seed, rows, t_ref, t_opt, problems)
+
+
+def case_deduplicate(rows: int, seed: int) -> CaseResult:
+    from src.etl.external_dedup import external_deduplicate
+    from src.etl.metrics import RunMetrics
+    from src.etl.patients_integration import MAPPING_ABC, MAPPING_SIGLO21, apply_mapping, deduplicate
+    pacientes = (apply_mapping(dirty_patients_frame(rows // 2, seed), MAPPING_SIGLO21, 'Siglo21')
+                 + apply_mapping(dirty_patients_frame(rows - rows // 2, seed), MAPPING_ABC, 'ABC'))
+    ref_metrics, opt_metrics = RunMetrics(), RunMetrics()
+    ref, t_ref = _timed(lambda: deduplicate(pacientes, ref_metrics))
+    # Particiones pequeñas para forzar derrames y re-particionado
+    opt, t_opt = _timed(lambda: list(external_deduplicate(
+        pacientes, partitions=8, max_records=max(1, rows // 16), metrics=opt_metrics)))
+    problems = diff_records([p.model_dump() for p in ref], [p.model_dump() for p in opt])
+    for attr in ('rows_in', 'rows_out'):
+        problems += _diff_values(attr, getattr(ref_metrics.stages[-1], attr),
+                                 getattr(opt_metrics.stages[-1], attr))
+    return CaseResult('deduplicate', seed, len(pacientes), t_ref, t_opt, problems)
+
+
+def case_ingest_relational_data(rows: int, seed: int) -> CaseResult:
+    from src.etl.ingestion import CovidDataIngester
+    from src.etl.metrics import RunMetrics
+    from src.models.landing.columnar import CasosColumnar
+    df = dirty_relational_frame(rows, seed)
+    ref_metrics, opt_metrics = RunMetrics(), RunMetrics()
+    ingester = CovidDataIngester('.', ref_metrics)
+
+    def reference():
+        with ref_metrics.stage('ingest_relational_data') as stage:
+            stage.rows_in = len(df)
+            casos = ingester.relational_frame_to_models(df, stage)
+            stage.rows_out = len(casos)
+            stage.rows_rejected = stage.rows_in - stage.rows_out
+        return casos
+
+    ref, t_ref = _timed(reference)
+    opt, t_opt = _timed(lambda: CasosColumnar.from_frame(df, today=date.today(), metrics=opt_metrics).to_models())
+    problems = diff_records([c.model_dump() for c in ref], [c.model_dump() for c in opt])
+    ref_stage, opt_stage = ref_metrics.stages[-1], opt_metrics.stages[-1]
+    problems += _diff_values('rows_rejected', ref_stage.rows_rejected, opt_stage.rows_rejected)
+    # Motivos de rechazo de fechas con el mismo texto en ambos caminos
+    ref_dates = {k: e.count for k, e in ref_stage.errors.items() if 'inválida o futura' in k}
+    opt_dates = {k: e.count for k, e in opt_stage.errors.items() if 'inválida o futura' in k}
+    problems += _diff_values('date rejects', ref_dates, opt_dates)
+    return CaseResult('ingest_relational_data', seed, rows, t_ref, t_opt, problems)
+
+
+def case_actividad6_estadisticas(rows: int, seed: int) -> CaseResult:
+    from src.etl.patients_integration import MAPPING_ABC, MAPPING_SIGLO21, actividad6_estadisticas, apply_mapping
+    from src.mapping.compiler import estadisticas_frame, load_mapping
+    frames = [(dirty_patients_frame(rows // 2, seed), MAPPING_SIGLO21, 'Siglo21', 'siglo21'),
+              (dirty_patients_frame(rows - rows // 2, seed + 1), MAPPING_ABC, 'ABC', 'abc')]
+    ref, t_ref = _timed(lambda: actividad6_estadisticas(
+        [p for df, mapping, origen, _ in frames for p in apply_mapping(df, mapping, origen)]))
+    compiled = {name: load_mapping(name) for _, _, _, name in frames}
+    opt, t_opt = _timed(lambda: estadisticas_frame(pd.concat(
+        [compiled[name].run(df).frame for df, _, _, name in frames], ignore_index=True)))
+    return CaseResult('actividad6_estadisticas', seed, rows, t_ref, t_opt, _diff_values('stats', ref, opt))
+
+
+CASES: Dict[str, Callable[[int, int], CaseResult]] = {
+    'normalize_text': case_normalize_text,
+    'apply_mapping': case_apply_mapping,
+    'deduplicate': case_deduplicate,
+    'ingest_relational_data': case_ingest_relational_data,
+    'actividad6_estadisticas': case_actividad6_estadisticas,
+}
+
+
+def run_differential(cases: List[str], rows: int, seeds: List[int]) -> List[CaseResult]:
+    results = []
+    for seed in seeds:
+        for name in cases:
+            result = CASES[name](rows, seed)
+            results.append(result)
+            status = 'OK  ' if result.ok else 'FAIL'
+            print(f"{status} {name:<24} seed={seed:<3} {result.rows:>9,} rows  "
+                  f"ref {result.reference_seconds:8.3f}s  opt {result.optimized_seconds:8.3f}s  "
+                  f"x{result.speedup or 0:6.1f}")
+            for problem in result.mismatches:
+                print(f'     {problem}')
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Compare reference and optimized ETL paths on dirty data')
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES), default=list(CASES),
+                        help='Cases to run (default: all)')
+    parser.add_argument('--rows', type=int, default=10_000, help='Rows per generated input')
+    parser.add_argument('--seeds', nargs='+', type=int, default=[0, 1, 2], help='Random seeds')
+    args = parser.parse_args(argv)
+    results = run_differential(args.cases, args.rows, args.seeds)
+    return 0 if all(r.ok for r in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
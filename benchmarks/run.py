@@ -0,0 +1,183 @@
+"""
+Benchmark harness for ingestion, normalization, dedup and statistics.
+
+Each case runs in a fresh ``spawn`` subprocess so its peak RSS is not
+polluted by earlier cases; input generation happens in the subprocess
+before timing starts. ``peak_rss_bytes`` covers only the timed runs: the
+high-water mark is reset after setup where the OS allows it (Linux), and
+``peak_delta_bytes`` is the peak above the RSS left by the setup.
+
+Usage::
+
+    python -m benchmarks.run --sizes 10k 1m --output bench.json
+    python -m benchmarks.run --sizes 10k --baseline bench.json --tolerance 0.2
+"""
+import argparse
+import json
+import multiprocessing as mp
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.etl.metrics import current_rss_bytes, peak_rss_bytes, reset_peak_rss
+
+SIZES = {'10k': 10_000, '1m': 1_000_000, '10m': 10_000_000}
+
+
+# --- Casos: cada uno prepara su entrada y devuelve (callable, filas) ---
+
+def _case_ingest_graph_data(rows: int, workdir: Path) -> Tuple[Callable, int]:
+    from benchmarks.synthetic import write_graph_files
+    from src.etl.ingestion import CovidDataIngester
+    from benchmarks.synthetic import ESTADOS
+    ingester = CovidDataIngester(str(write_graph_files(workdir, rows)))
+    # Los archivos tienen días completos: filas = días x estados
+    return ingester.ingest_graph_data, max(1, rows // len(ESTADOS)) * len(ESTADOS)
+
+def _case_ingest_relational_data(rows: int, workdir: Path) -> Tuple[Callable, int]:
+    from benchmarks.synthetic import write_relational_file
+    from src.etl.ingestion import CovidDataIngester
+    ingester = CovidDataIngester(str(write_relational_file(workdir, rows)))
+    return ingester.ingest_relational_data, rows
+
+def _case_load_siglo21_sql(rows: int, workdir: Path) -> Tuple[Callable, int]:
+    from benchmarks.synthetic import write_siglo21_sql
+    from src.etl.patients_integration import load_siglo21_sql
+    path = write_siglo21_sql(workdir / 'siglo21.sql', rows)
+    return (lambda: load_siglo21_sql(path)), rows
+
+def _case_apply_mapping(rows: int, workdir: Path) -> Tuple[Callable, int]:
+    from benchmarks.synthetic import patients_frame
+    from src.etl.patients_integration import MAPPING_SIGLO21, apply_mapping
+    df = patients_frame(rows)
+    return (lambda: apply_mapping(df, MAPPING_SIGLO21, 'Siglo21')), rows
+
+def _case_normalize_text(rows: int, workdir: Path) -> Tuple[Callable, int]:
+    from benchmarks.synthetic import patients_frame
+    from src.etl.patients_integration import normalize_text
+    values = patients_frame(rows)['Direccion'].tolist()
+    return (lambda: [normalize_text(v) for v in values]), rows
+
+def _case_deduplicate(rows: int, workdir: Path) -> Tuple[Callable, int]:
+    from benchmarks.synthetic import patient_models
+    from src.etl.patients_integration import deduplicate
+    pacientes = patient_models(rows)
+    return (lambda: deduplicate(pacientes)), rows
+
+def _case_actividad6_estadisticas(rows: int, workdir: Path) -> Tuple[Callable, int]:
+    from benchmarks.synthetic import patient_models
+    from src.etl.patients_integration import actividad6_estadisticas
+    pacientes = patient_models(rows)
+    return (lambda: actividad6_estadisticas(pacientes)), rows
+
+CASES: Dict[str, Callable[[int, Path], Tuple[Callable, int]]] = {
+    'ingest_graph_data': _case_ingest_graph_data,
+    'ingest_relational_data': _case_ingest_relational_data,
+    'load_siglo21_sql': _case_load_siglo21_sql,
+    'apply_mapping': _case_apply_mapping,
+    'normalize_text': _case_normalize_text,
+    'deduplicate': _case_deduplicate,
+    'actividad6_estadisticas': _case_actividad6_estadisticas,
+}
+
+
+def _run_case(name: str, rows: int, repeat: int) -> Dict[str, Any]:
+    """Se ejecuta en el subproceso: prepara, mide la mejor de ``repeat`` corridas"""
+    with tempfile.TemporaryDirectory(prefix=f'bench-{name}-') as tmp:
+        fn, n = CASES[name](rows, Path(tmp))
+        setup_peak = peak_rss_bytes()
+        # Sin reinicio (fuera de Linux) el pico incluye la generación de la entrada
+        peak_is_run_only = reset_peak_rss()
+        setup_rss = current_rss_bytes()
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        peak = peak_rss_bytes()
+    best = min(timings)
+    return {
+        'name': name,
+        'rows': n,
+        'seconds': best,
+        'rows_per_sec': n / best if best else None,
+        'peak_rss_bytes': peak,
+        'peak_delta_bytes': peak - setup_rss if peak is not None and setup_rss is not None else None,
+        'peak_is_run_only': peak_is_run_only,
+        'setup_rss_bytes': setup_rss,
+        'setup_peak_rss_bytes': setup_peak,
+    }
+
+
+def run_benchmarks(cases: List[str], sizes: List[int], repeat: int = 1) -> Dict[str, Any]:
+    ctx = mp.get_context('spawn')
+    results = []
+    for rows in sizes:
+        for name in cases:
+            with ctx.Pool(1) as pool:
+                result = pool.apply(_run_case, (name, rows, repeat))
+            results.append(result)
+            print(f"{name:<26} {rows:>10,} rows  {result['seconds']:9.3f}s  "
+                  f"{result['rows_per_sec'] or 0:>12,.0f} rows/s  "
+                  f"peak {(result['peak_rss_bytes'] or 0) / 2**20:8.1f} MiB "
+                  f"(+{(result['peak_delta_bytes'] or 0) / 2**20:.1f} over setup)")
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Casos cuya tasa (rows/s) cayó más que ``tolerance`` respecto a la línea base"""
+    base = {(r['name'], r['rows']): r for r in baseline['results']}
+    regressions = []
+    for r in current['results']:
+        ref = base.get((r['name'], r['rows']))
+        if not ref or not ref.get('rows_per_sec') or not r.get('rows_per_sec'):
+            continue
+        ratio = r['rows_per_sec'] / ref['rows_per_sec']
+        if ratio < 1 - tolerance:
+            regressions.append(f"{r['name']} @ {r['rows']:,} rows: {ratio:.2f}x baseline throughput")
+    return regressions
+
+
+def _parse_size(value: str) -> int:
+    return SIZES.get(value.lower()) or int(value.replace('_', ''))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Run MDM ETL benchmarks on synthetic data')
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES), default=list(CASES),
+                        help='Benchmarks to run (default: all)')
+    parser.add_argument('--sizes', nargs='+', default=['10k'],
+                        help='Row counts: 10k, 1m, 10m or an integer (default: 10k)')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per case; best time is kept')
+    parser.add_argument('--output', type=Path, help='Write results as JSON')
+    parser.add_argument('--baseline', type=Path, help='Compare against a previous JSON result')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed throughput drop vs baseline (default: 0.2)')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.cases, [_parse_size(s) for s in args.sizes], args.repeat)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2), encoding='utf-8')
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text(encoding='utf-8')),
+                              args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION: {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
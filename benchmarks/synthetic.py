@@ -0,0 +1,131 @@
+"""
+Synthetic, deterministic input generators for benchmarks
+"""
+from datetime import date, timedelta
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from src.models.landing.schemas import PacienteFederadoLanding
+
+ESTADOS = [
+    'AGUASCALIENTES', 'BAJA CALIFORNIA', 'BAJA CALIFORNIA SUR', 'CAMPECHE', 'COAHUILA',
+    'COLIMA', 'CHIAPAS', 'CHIHUAHUA', 'CIUDAD DE MÉXICO', 'DURANGO', 'GUANAJUATO',
+    'GUERRERO', 'HIDALGO', 'JALISCO', 'MÉXICO', 'MICHOACÁN', 'MORELOS', 'NAYARIT',
+    'NUEVO LEÓN', 'OAXACA', 'PUEBLA', 'QUERÉTARO', 'QUINTANA ROO', 'SAN LUIS POTOSÍ',
+    'SINALOA', 'SONORA', 'TABASCO', 'TAMAULIPAS', 'TLAXCALA', 'VERACRUZ', 'YUCATÁN', 'ZACATECAS'
+]
+NOMBRES = ['José', 'María', 'Juan', 'Guadalupe', 'Ana', 'Luis', 'Sofía', 'Andrés', 'Iñaki', 'Mónica']
+APELLIDOS = ['Hernández', 'García', 'Martínez', 'López', 'González', 'Pérez', 'Rodríguez', 'Sánchez',
+             'Ramírez', 'Núñez']
+GRAPH_FILES = {
+    'confirmados': 'Casos_Diarios_Estado_Nacional_Confirmados_20230625.csv',
+    'defunciones': 'Casos_Diarios_Estado_Nacional_Defunciones_20230625.csv',
+    'negativos': 'Casos_Diarios_Estado_Nacional_Negativos_20230625.csv',
+    'sospechosos': 'Casos_Diarios_Estado_Nacional_Sospechosos_20230625.csv',
+}
+BOOL_COLS = ['INTUBADO', 'NEUMONIA', 'EMBARAZO', 'HABLA_LENGUA_INDIG', 'DIABETES', 'EPOC', 'ASMA',
+             'INMUSUPR', 'HIPERTENSION', 'OTRA_COM', 'CARDIOVASCULAR', 'OBESIDAD', 'RENAL_CRONICA',
+             'TABAQUISMO', 'OTRO_CASO', 'MIGRANTE', 'UCI']
+
+
+def write_graph_files(base: Path, rows: int, seed: int = 0) -> Path:
+    """Archivos Graph con ~rows combinaciones (fecha, estado)"""
+    rng = np.random.default_rng(seed)
+    graph = base / 'Graph'
+    graph.mkdir(parents=True, exist_ok=True)
+    days = max(1, rows // len(ESTADOS))
+    start = date(2020, 1, 1)
+    fechas = [(start + timedelta(days=i)).strftime('%d-%m-%Y') for i in range(days)]
+    for filename in GRAPH_FILES.values():
+        df = pd.DataFrame(rng.integers(0, 500, (len(ESTADOS), days)), columns=fechas)
+        df.insert(0, 'nombre', ESTADOS)
+        df.insert(0, 'poblacion', rng.integers(500_000, 15_000_000, len(ESTADOS)))
+        df.insert(0, 'cve_ent', range(1, len(ESTADOS) + 1))
+        df.to_csv(graph / filename, index=False)
+    return base
+
+
+def relational_frame(rows: int, seed: int = 0, dirty_rate: float = 0.05) -> pd.DataFrame:
+    """Casos individuales con el esquema de COVID19MEXICO.csv (incluye fechas 9999-99-99)"""
+    rng = np.random.default_rng(seed)
+    base = np.datetime64('2021-01-01')
+
+    def fechas(offset):
+        return (base + rng.integers(0, 700, rows) + offset).astype(str)
+
+    df = pd.DataFrame({
+        'FECHA_ACTUALIZACION': '2023-06-25',
+        'ID_REGISTRO': [f'z{i:08x}' for i in range(rows)],
+        'ORIGEN': rng.integers(1, 3, rows),
+        'SECTOR': rng.integers(1, 14, rows),
+        'ENTIDAD_UM': rng.integers(1, 33, rows),
+        'SEXO': rng.integers(1, 3, rows),
+        'ENTIDAD_NAC': rng.integers(1, 33, rows),
+        'ENTIDAD_RES': rng.integers(1, 33, rows),
+        'MUNICIPIO_RES': rng.integers(1, 200, rows),
+        'TIPO_PACIENTE': rng.integers(1, 3, rows),
+        'FECHA_INGRESO': fechas(5),
+        'FECHA_SINTOMAS': fechas(0),
+        'FECHA_DEF': '9999-99-99',
+        'EDAD': rng.integers(0, 100, rows),
+        'NACIONALIDAD': rng.integers(1, 3, rows),
+        'RESULTADO_PCR': rng.choice([1, 2, 3, 4, 5, 97], rows),
+        'RESULTADO_ANTIGENO': rng.choice([1, 2, 97], rows),
+        'PAIS_NACIONALIDAD': 'México',
+        'PAIS_ORIGEN': '97',
+    })
+    for col in BOOL_COLS:
+        df[col] = rng.choice([1, 2, 97, 98, 99], rows, p=[0.2, 0.7, 0.05, 0.03, 0.02])
+    dirty = rng.random(rows) < dirty_rate
+    df.loc[dirty, 'FECHA_INGRESO'] = '9999-99-99'
+    return df
+
+
+def write_relational_file(base: Path, rows: int, seed: int = 0) -> Path:
+    rel = base / 'Relational'
+    rel.mkdir(parents=True, exist_ok=True)
+    relational_frame(rows, seed).to_csv(rel / 'COVID19MEXICO.csv', index=False)
+    return base
+
+
+def patients_frame(rows: int, seed: int = 0, dup_rate: float = 0.1) -> pd.DataFrame:
+    """Pacientes con columnas NOMBRE/APELLIDO/NSS/Direccion (Siglo21/ABC) y duplicados"""
+    rng = np.random.default_rng(seed)
+    nss = rng.integers(10**10, 10**11, rows).astype(str)
+    dups = rng.random(rows) < dup_rate
+    nss[dups] = nss[rng.integers(0, rows, int(dups.sum()))]
+    return pd.DataFrame({
+        'NOMBRE': rng.choice(NOMBRES, rows),
+        'APELLIDO': rng.choice(APELLIDOS, rows),
+        'NSS': nss,
+        'Direccion': [f'Apdo.:{n}-{n * 7 % 9973} Calle' for n in rng.integers(100, 999, rows)],
+    })
+
+
+def write_siglo21_sql(path: Path, rows: int, seed: int = 0, per_insert: int = 1000) -> Path:
+    """Dump MySQL con el mismo formato que PacientesSiglo21-mysql.sql"""
+    df = patients_frame(rows, seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('CREATE TABLE `Pacientes` (`NOMBRE` varchar(255), `APELLIDO` varchar(255), '
+                '`NSS` varchar(11), `Direccion` varchar(255));\n')
+        records = df.itertuples(index=False)
+        for start in range(0, rows, per_insert):
+            chunk = [next(records) for _ in range(min(per_insert, rows - start))]
+            values = ','.join(f'("{r.NOMBRE}","{r.APELLIDO}","{r.NSS}","{r.Direccion}")' for r in chunk)
+            f.write('INSERT INTO `Pacientes` (`NOMBRE`,`APELLIDO`,`NSS`,`Direccion`) '
+                    f'VALUES {values};\n')
+    return path
+
+
+def patient_models(rows: int, seed: int = 0) -> List[PacienteFederadoLanding]:
+    """Modelos federados de varios hospitales (con claves repetidas entre hospitales)"""
+    df = patients_frame(rows, seed)
+    hospitales = np.random.default_rng(seed).choice(['Siglo21', 'ABC', 'MedicaSur', 'GpoAngeles'], rows)
+    return [
+        PacienteFederadoLanding(pac_clave=int(r.NSS[:8]), nombrePac=r.NOMBRE.upper(),
+                                apePatPac=r.APELLIDO.upper(), direccion=r.Direccion, HospOrigen=h)
+        for r, h in zip(df.itertuples(index=False), hospitales)
+    ]
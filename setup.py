@@ -20,7 +20,10 @@ setup(
             "isort>=5.0.0",
             "mypy>=1.0.0",
             "flake8>=6.0.0",
-        ]
+        ],
+        "arrow": [
+            "pyarrow>=10.0.0",
+        ],
     },
     python_requires=">=3.9",
     description="A flexible MDM framework with ETL capabilities",
@@ -0,0 +1,3 @@
+"""
+Analytical stores built from landing data
+"""
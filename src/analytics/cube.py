@@ -0,0 +1,198 @@
+"""
+Dense daily-cases cube (date x state x metric) with precomputed cumulative sums.
+
+``ingest_graph_data`` yields one CasoDiarioLanding per (fecha, estado).
+``DailyCasesCube`` packs them into an int64 NumPy array and keeps a running
+cumulative sum along the date axis per state, so any date-range total or
+rolling window is two array lookups per state (national figures add the
+states up, O(states)):
+
+    total(a..b) = cum[b + 1] - cum[a]
+
+New days are appended in place (amortized O(states) per day). Corrections
+to an existing day recompute the cumulative sums from that day on.
+"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from ..models.landing.schemas import CasoDiarioLanding
+
+METRICS = ('confirmados', 'defunciones', 'negativos', 'sospechosos')
+
+
+class DailyCasesCube:
+    """
+    Usage::
+
+        cube = DailyCasesCube.from_records(CovidDataIngester(path).ingest_graph_data())
+        cube.total('confirmados', date(2020, 3, 1), date(2020, 3, 31), estado='Jalisco')
+        cube.rolling_mean('defunciones', window=7)           # national, every day
+        cube.append(nuevos_casos)                            # next day's files
+    """
+
+    def __init__(self, start: date, estados: Sequence[str], metrics: Sequence[str] = METRICS,
+                 capacity: int = 64):
+        self.start = start
+        self.estados: List[str] = list(estados)
+        self.metrics: List[str] = list(metrics)
+        self._estado_idx: Dict[str, int] = {e: i for i, e in enumerate(self.estados)}
+        self._metric_idx: Dict[str, int] = {m: i for i, m in enumerate(self.metrics)}
+        self.n_days = 0
+        shape = (max(capacity, 1), len(self.estados), len(self.metrics))
+        self._values = np.zeros(shape, dtype=np.int64)
+        # cum[d] = suma de los días [0, d); fila extra para el cero inicial
+        self._cum = np.zeros((shape[0] + 1,) + shape[1:], dtype=np.int64)
+
+    # --- construcción ---
+
+    @classmethod
+    def from_records(cls, casos: Iterable[CasoDiarioLanding],
+                     metrics: Sequence[str] = METRICS) -> 'DailyCasesCube':
+        casos = list(casos)
+        if not casos:
+            raise ValueError("no records to build the cube from")
+        start = min(c.fecha for c in casos)
+        estados = sorted({c.estado for c in casos})
+        n_days = (max(c.fecha for c in casos) - start).days + 1
+        cube = cls(start, estados, metrics, capacity=n_days)
+        cube.append(casos)
+        return cube
+
+    @classmethod
+    def from_graph(cls, data_path: str) -> 'DailyCasesCube':
+        """Construye el cubo desde la carpeta Graph vía CovidDataIngester"""
+        from ..etl.ingestion import CovidDataIngester
+        return cls.from_records(CovidDataIngester(data_path).ingest_graph_data())
+
+    def append(self, casos: Iterable[CasoDiarioLanding]) -> None:
+        """
+        Agrega o corrige días. Días nuevos extienden el cubo (huecos quedan en
+        cero); estados nuevos agregan una columna en cero hacia atrás.
+        """
+        rows = []
+        for c in casos:
+            d = (c.fecha - self.start).days
+            if d < 0:
+                raise ValueError(f"{c.fecha} is before the cube start {self.start}")
+            if c.estado not in self._estado_idx:
+                self._add_estado(c.estado)
+            rows.append((d, self._estado_idx[c.estado],
+                         [getattr(c, m) or 0 for m in self.metrics]))
+        if not rows:
+            return
+        days = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        estados = np.fromiter((r[1] for r in rows), dtype=np.int64, count=len(rows))
+        valores = np.array([r[2] for r in rows], dtype=np.int64).reshape(len(rows), len(self.metrics))
+
+        first_changed = int(days.min())
+        n_days = max(self.n_days, int(days.max()) + 1)
+        self._reserve(n_days)
+        self._values[days, estados] = valores
+        self.n_days = n_days
+        np.cumsum(self._values[first_changed:n_days], axis=0, out=self._cum[first_changed + 1:n_days + 1])
+        self._cum[first_changed + 1:n_days + 1] += self._cum[first_changed]
+
+    def _reserve(self, n_days: int) -> None:
+        capacity = self._values.shape[0]
+        if n_days <= capacity:
+            return
+        while capacity < n_days:
+            capacity *= 2
+        values = np.zeros((capacity,) + self._values.shape[1:], dtype=np.int64)
+        values[:self.n_days] = self._values[:self.n_days]
+        cum = np.zeros((capacity + 1,) + self._cum.shape[1:], dtype=np.int64)
+        cum[:self.n_days + 1] = self._cum[:self.n_days + 1]
+        self._values, self._cum = values, cum
+
+    def _add_estado(self, estado: str) -> None:
+        self._estado_idx[estado] = len(self.estados)
+        self.estados.append(estado)
+        pad = ((0, 0), (0, 1), (0, 0))
+        self._values = np.pad(self._values, pad)
+        self._cum = np.pad(self._cum, pad)
+
+    # --- consultas ---
+
+    @property
+    def end(self) -> Optional[date]:
+        return self.start + timedelta(days=self.n_days - 1) if self.n_days else None
+
+    @property
+    def dates(self) -> List[date]:
+        return [self.start + timedelta(days=i) for i in range(self.n_days)]
+
+    @property
+    def values(self) -> np.ndarray:
+        """Vista (días, estados, métricas) de los conteos diarios"""
+        return self._values[:self.n_days]
+
+    def _day(self, fecha: date) -> int:
+        d = (fecha - self.start).days
+        if not 0 <= d < self.n_days:
+            raise KeyError(f"{fecha} outside {self.start}..{self.end}")
+        return d
+
+    def _cum_series(self, metric: str, estado: Optional[str]) -> np.ndarray:
+        """cum[0..n_days] de una métrica, por estado o nacional (suma sobre estados)"""
+        m = self._metric_idx[metric]
+        cum = self._cum[:self.n_days + 1, :, m]
+        if estado is None:
+            return cum.sum(axis=1)
+        return cum[:, self._estado_idx[estado]]
+
+    def _cum_at(self, d: int, metric: str, estado: Optional[str]) -> int:
+        m = self._metric_idx[metric]
+        if estado is None:
+            return int(self._cum[d, :, m].sum())
+        return int(self._cum[d, self._estado_idx[estado], m])
+
+    def total(self, metric: str, desde: Optional[date] = None, hasta: Optional[date] = None,
+              estado: Optional[str] = None) -> int:
+        """Suma de ``metric`` entre ``desde`` y ``hasta`` (inclusive); nacional si estado es None"""
+        lo = self._day(desde) if desde is not None else 0
+        hi = self._day(hasta) + 1 if hasta is not None else self.n_days
+        if hi <= lo:
+            return 0
+        return self._cum_at(hi, metric, estado) - self._cum_at(lo, metric, estado)
+
+    def total_by_estado(self, metric: str, desde: Optional[date] = None,
+                        hasta: Optional[date] = None) -> Dict[str, int]:
+        lo = self._day(desde) if desde is not None else 0
+        hi = self._day(hasta) + 1 if hasta is not None else self.n_days
+        m = self._metric_idx[metric]
+        totals = self._cum[max(hi, lo), :, m] - self._cum[lo, :, m]
+        return dict(zip(self.estados, totals.tolist()))
+
+    def cumulative(self, metric: str, estado: Optional[str] = None) -> np.ndarray:
+        """Acumulado al cierre de cada día"""
+        return self._cum_series(metric, estado)[1:]
+
+    def daily(self, metric: str, estado: Optional[str] = None) -> np.ndarray:
+        m = self._metric_idx[metric]
+        if estado is None:
+            return self.values[:, :, m].sum(axis=1)
+        return self.values[:, self._estado_idx[estado], m]
+
+    def rolling_mean(self, metric: str, window: int = 7, estado: Optional[str] = None) -> np.ndarray:
+        """Promedio móvil que termina en cada día; NaN hasta completar la ventana"""
+        if window < 1:
+            raise ValueError("window must be >= 1")
+        cum = self._cum_series(metric, estado)
+        out = np.full(self.n_days, np.nan)
+        if self.n_days >= window:
+            out[window - 1:] = (cum[window:] - cum[:-window]) / window
+        return out
+
+    def rolling_at(self, metric: str, fecha: date, window: int = 7,
+                   estado: Optional[str] = None) -> Union[float, None]:
+        """Promedio móvil de ``window`` días que termina en ``fecha`` (O(1) por estado)"""
+        hi = self._day(fecha) + 1
+        lo = hi - window
+        if lo < 0:
+            return None
+        return (self._cum_at(hi, metric, estado) - self._cum_at(lo, metric, estado)) / window
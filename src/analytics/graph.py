@@ -0,0 +1,301 @@
+"""
+In-process contact-tracing analytics over a CSR adjacency.
+
+``CovidGraphQuerier.get_contact_network`` answers one patient at a time in
+Cypher. ``ContactGraph`` exports the Patient / Contact / Hospital graph
+(HAD_CONTACT, TREATED_AT) once into compressed sparse row arrays:
+
+    indptr  int64[n_nodes + 1]   neighbours of node u: indices[indptr[u]:indptr[u + 1]]
+    indices int32[n_edges * 2]   (undirected: every edge is stored both ways)
+
+Whole-graph questions are then answered with vectorized NumPy:
+
+- ``bfs`` / ``k_hop`` -- level-synchronous BFS; each level gathers the
+  neighbours of the whole frontier at once
+- ``components`` -- min-label propagation with pointer jumping
+- ``top_degree`` -- degree ranking with ``argpartition``, per node label
+
+``save`` / ``load`` keep the export as an ``.npz`` file, so Neo4j is read only once.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+DEFAULT_RELATIONSHIPS = ('HAD_CONTACT', 'TREATED_AT')
+LABELS = ('Patient', 'Contact', 'Hospital')
+
+
+def _gather(indptr: np.ndarray, indices: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+    """Concatenación de las listas de vecinos de ``nodes`` sin bucles de Python"""
+    starts = indptr[nodes]
+    lengths = indptr[nodes + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=indices.dtype)
+    offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+    return indices[offsets + np.arange(total)]
+
+
+def _object_array(values: Sequence[Any]) -> np.ndarray:
+    out = np.empty(len(values), dtype=object)
+    out[:] = values
+    return out
+
+
+def _key_array(values: Sequence[Hashable]) -> np.ndarray:
+    """
+    Claves como arreglo tipado (enteros o texto) para que ``np.unique`` ordene
+    en C; con tipos mezclados (p. ej. 1 y '1'), como objetos.
+    """
+    types = set(map(type, values))
+    try:
+        if types == {str}:
+            return np.array(values, dtype=str)
+        if types == {int}:
+            return np.array(values, dtype=np.int64)
+    except OverflowError:
+        pass
+    return _object_array(values)
+
+
+def _interleave(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    out = np.empty(2 * len(a), dtype=np.result_type(a, b))
+    out[0::2], out[1::2] = a, b
+    return out
+
+
+def _factorize(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Posición de la primera aparición de cada valor distinto (en orden de
+    aparición) y código denso 0..k-1 de cada elemento, con ``np.unique``.
+    """
+    try:
+        _, first, inverse = np.unique(values, return_index=True, return_inverse=True)
+    except TypeError:  # claves de tipos que no se pueden ordenar entre sí
+        codes: Dict[Hashable, int] = {}
+        inverse = np.fromiter((codes.setdefault(v, len(codes)) for v in values), dtype=np.int64,
+                              count=len(values))
+        first = np.full(len(codes), len(values), dtype=np.int64)
+        np.minimum.at(first, inverse, np.arange(len(values)))
+        return first, inverse
+    rank = np.empty(len(first), dtype=np.int64)
+    order = np.argsort(first)
+    rank[order] = np.arange(len(first))
+    return first[order], rank[inverse.ravel()]
+
+
+class ContactGraph:
+    """
+    Usage::
+
+        graph = ContactGraph.from_neo4j(driver)
+        graph.save('contactos.npz')
+        graph.k_hop('P-000123', k=2)                  # alcance a 2 saltos
+        sizes = graph.component_sizes()
+        graph.top_degree(10, label='Patient')
+    """
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, node_keys: Sequence[Hashable],
+                 node_labels: np.ndarray):
+        self.indptr = indptr
+        self.indices = indices
+        self.node_keys = list(node_keys)
+        self.node_labels = node_labels  # int8, índice en LABELS
+        self._index = {k: i for i, k in enumerate(self.node_keys)}
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def n_edges(self) -> int:
+        return len(self.indices) // 2
+
+    def node(self, key: Hashable) -> int:
+        return self._index[key]
+
+    # --- construcción ---
+
+    @classmethod
+    def from_arrays(cls, src: np.ndarray, dst: np.ndarray, n_nodes: int,
+                    node_keys: Optional[Sequence[Hashable]] = None,
+                    node_labels: Optional[np.ndarray] = None) -> 'ContactGraph':
+        """CSR no dirigido a partir de aristas (src, dst) con ids 0..n_nodes-1"""
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        both_src = np.concatenate([src, dst])
+        both_dst = np.concatenate([dst, src]).astype(np.int32)
+        order = np.argsort(both_src)  # el orden dentro de cada fila no importa
+        indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(both_src, minlength=n_nodes), out=indptr[1:])
+        keys = node_keys if node_keys is not None else range(n_nodes)
+        labels = node_labels if node_labels is not None else np.zeros(n_nodes, dtype=np.int8)
+        return cls(indptr, both_dst[order], keys, labels)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Tuple[Hashable, str, Hashable, str]]) -> 'ContactGraph':
+        """Aristas como (clave_origen, etiqueta_origen, clave_destino, etiqueta_destino)"""
+        columns = list(zip(*records))
+        if not columns:
+            return cls.from_arrays(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), 0, [],
+                                   np.empty(0, dtype=np.int8))
+        a, b = _key_array(columns[0]), _key_array(columns[2])
+        if a.dtype.kind != b.dtype.kind:  # p. ej. pacientes con clave entera y hospitales con nombre
+            a, b = _object_array(columns[0]), _object_array(columns[2])
+        keys = _interleave(a, b)
+        labels = _interleave(_object_array(columns[1]), _object_array(columns[3]))
+        return cls._from_endpoints(keys, keys, labels)
+
+    @classmethod
+    def _from_endpoints(cls, node_ids: np.ndarray, keys: np.ndarray, labels: np.ndarray) -> 'ContactGraph':
+        """
+        Extremos intercalados (origen, destino, origen, ...): ``node_ids``
+        identifica al nodo, ``keys`` / ``labels`` se toman de su primera
+        aparición. Los nodos se numeran en orden de primera aparición.
+        """
+        first, inverse = _factorize(node_ids)
+        label_codes = np.full(len(first), -1, dtype=np.int8)
+        first_labels = labels[first]
+        for i, label in enumerate(LABELS):
+            label_codes[first_labels == label] = i
+        return cls.from_arrays(inverse[0::2], inverse[1::2], len(first), keys[first].tolist(), label_codes)
+
+    @classmethod
+    def from_neo4j(cls, driver: Any, relationships: Sequence[str] = DEFAULT_RELATIONSHIPS,
+                   fetch_size: int = 100_000) -> 'ContactGraph':
+        """
+        Exporta las relaciones una sola vez. Los nodos se agrupan por su id
+        entero de Neo4j; como clave, pacientes usan ``id``, hospitales ``name``
+        y contactos (sin clave propia; el nombre se repite entre contactos)
+        su elementId.
+        """
+        key = ("CASE WHEN {n}:Patient THEN {n}.id WHEN {n}:Hospital THEN {n}.name "
+               "ELSE elementId({n}) END")
+        query = f"""
+            MATCH (a)-[r:{'|'.join(relationships)}]->(b)
+            RETURN id(a) AS a_id, {key.format(n='a')} AS a, labels(a)[0] AS a_label,
+                   id(b) AS b_id, {key.format(n='b')} AS b, labels(b)[0] AS b_label
+        """
+        with driver.session(fetch_size=fetch_size) as session:
+            rows = [(r['a_id'], r['a'], r['a_label'], r['b_id'], r['b'], r['b_label'])
+                    for r in session.run(query)]
+        if not rows:
+            return cls.from_records([])
+        a_id, a, a_label, b_id, b, b_label = zip(*rows)
+        node_ids = _interleave(np.asarray(a_id, dtype=np.int64), np.asarray(b_id, dtype=np.int64))
+        return cls._from_endpoints(node_ids, _interleave(_object_array(a), _object_array(b)),
+                                   _interleave(_object_array(a_label), _object_array(b_label)))
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Claves como texto más una marca de las enteras, para recuperar su tipo en ``load``"""
+        is_int = np.array([isinstance(k, (int, np.integer)) and not isinstance(k, bool)
+                           for k in self.node_keys], dtype=bool)
+        bad = [k for k, integer in zip(self.node_keys, is_int) if not integer and not isinstance(k, str)]
+        if bad:
+            raise TypeError(f"Only str and int node keys can be saved, got {type(bad[0]).__name__}")
+        np.savez(path, indptr=self.indptr, indices=self.indices, node_labels=self.node_labels,
+                 node_keys=np.array([str(k) for k in self.node_keys]), node_key_is_int=is_int)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'ContactGraph':
+        data = np.load(path, allow_pickle=False)
+        keys = data['node_keys'].tolist()
+        if 'node_key_is_int' in data:
+            keys = [int(k) if integer else k for k, integer in zip(keys, data['node_key_is_int'])]
+        return cls(data['indptr'], data['indices'], keys, data['node_labels'])
+
+    # --- análisis ---
+
+    def degree(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def neighbors(self, node: int) -> np.ndarray:
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def bfs(self, sources: Union[int, Sequence[int]], max_depth: Optional[int] = None,
+            through: Optional[Sequence[str]] = None) -> np.ndarray:
+        """
+        Distancia en saltos desde ``sources`` (-1 si no se alcanza).
+
+        ``through`` limita por qué etiquetas se puede seguir expandiendo (p. ej.
+        ``('Patient', 'Contact')`` para no propagar a través de hospitales);
+        los nodos de otras etiquetas se alcanzan pero no se expanden.
+        """
+        dist = np.full(self.n_nodes, -1, dtype=np.int32)
+        frontier = np.unique(np.atleast_1d(np.asarray(sources, dtype=np.int64)))
+        dist[frontier] = 0
+        expandable = None
+        if through is not None:
+            allowed = [LABELS.index(label) for label in through]
+            expandable = np.isin(self.node_labels, allowed)
+        level = 0
+        while frontier.size and (max_depth is None or level < max_depth):
+            if expandable is not None:
+                frontier = frontier[expandable[frontier]]
+            nbrs = _gather(self.indptr, self.indices, frontier)
+            nbrs = nbrs[dist[nbrs] < 0]
+            if nbrs.size == 0:
+                break
+            level += 1
+            # Con frentes grandes, una máscara sobre todos los nodos deduplica más barato que np.unique
+            if nbrs.size > self.n_nodes // 64:
+                seen = np.zeros(self.n_nodes, dtype=bool)
+                seen[nbrs] = True
+                nbrs = np.flatnonzero(seen)
+            else:
+                nbrs = np.unique(nbrs)
+            dist[nbrs] = level
+            frontier = nbrs.astype(np.int64)
+        return dist
+
+    def k_hop(self, key: Hashable, k: int = 2, through: Optional[Sequence[str]] = None,
+              label: Optional[str] = None) -> List[Hashable]:
+        """Claves alcanzables en 1..k saltos desde ``key`` (opcionalmente de una etiqueta)"""
+        dist = self.bfs(self.node(key), max_depth=k, through=through)
+        mask = dist > 0
+        if label is not None:
+            mask &= self.node_labels == LABELS.index(label)
+        return [self.node_keys[i] for i in np.flatnonzero(mask)]
+
+    def components(self) -> np.ndarray:
+        """Etiqueta de componente por nodo (= menor id de nodo del componente)"""
+        labels = np.arange(self.n_nodes, dtype=np.int64)
+        deg = self.degree()
+        has_nbrs = deg > 0
+        row_starts = self.indptr[:-1][has_nbrs]
+        while True:
+            nbr_min = np.minimum.reduceat(labels[self.indices], row_starts) if row_starts.size else row_starts
+            new = labels.copy()
+            new[has_nbrs] = np.minimum(labels[has_nbrs], nbr_min)
+            # Enganchar la raíz de cada etiqueta al mínimo visto y comprimir caminos
+            np.minimum.at(new, labels, new)
+            while True:
+                jumped = new[new]
+                if np.array_equal(jumped, new):
+                    break
+                new = jumped
+            if np.array_equal(new, labels):
+                return labels
+            labels = new
+
+    def component_sizes(self) -> Dict[int, int]:
+        """Tamaño de cada componente, del más grande al más pequeño"""
+        roots, counts = np.unique(self.components(), return_counts=True)
+        order = np.argsort(-counts, kind='stable')
+        return dict(zip(roots[order].tolist(), counts[order].tolist()))
+
+    def top_degree(self, k: int = 10, label: Optional[str] = 'Patient') -> List[Tuple[Hashable, int]]:
+        """Nodos de mayor grado (posibles superpropagadores)"""
+        deg = self.degree()
+        candidates = np.arange(self.n_nodes)
+        if label is not None:
+            candidates = candidates[self.node_labels == LABELS.index(label)]
+        if candidates.size == 0:
+            return []
+        k = min(k, candidates.size)
+        top = candidates[np.argpartition(-deg[candidates], k - 1)[:k]]
+        top = top[np.lexsort((top, -deg[top]))]
+        return [(self.node_keys[i], int(deg[i])) for i in top]
@@ -0,0 +1,3 @@
+"""
+Data cleansing: declarative validation and repair rules
+"""
@@ -1,3 +1,35 @@
 """
 ETL module for data ingestion and transformation
+
+Public entry points are resolved lazily (PEP 562) so ``import src.etl``
+does not load pandas, pydantic or database drivers.
 """
+import importlib
+
+_LAZY_ATTRS = {
+    'CovidDataIngester': '.ingestion',
+    'RunMetrics': '.metrics',
+    'normalize_text': '.patients_integration',
+    'apply_mapping': '.patients_integration',
+    'deduplicate': '.patients_integration',
+    'actividad4_agregar_medica_sur': '.patients_integration',
+    'actividad5_agregar_gpo_angeles': '.patients_integration',
+    'actividad6_estadisticas': '.patients_integration',
+    'integrate_sources': '.pipeline',
+    'integrate_sources_arrow': '.pipeline',
+    'ArrowBatch': '.arrow_batch',
+}
+
+__all__ = sorted(_LAZY_ATTRS)
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        value = getattr(importlib.import_module(_LAZY_ATTRS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,196 @@
+"""
+Arrow record batches as the interchange format between ETL stages.
+
+Lists of pydantic models are expensive to hand from one stage to the next:
+every hop through a process pool pickles and re-boxes each value. An
+``ArrowBatch`` holds the same records as an Arrow table whose schema is
+derived from the landing model:
+
+- between threads the table is passed by reference (Arrow buffers are immutable)
+- between processes the producer writes the table once as an Arrow IPC file
+  under ``SHARED_DIR`` (``/dev/shm`` when available); the consumer
+  memory-maps it, so reading does not copy or deserialize the buffers
+- ``CompiledMapping.run`` and ``CleansingEngine.apply`` already accept Arrow
+  tables; ``drop_duplicates`` keeps ``deduplicate()`` semantics without
+  building models
+- models are only built at the edge, with ``to_models``
+
+Requires the ``arrow`` extra (``pip install mdm-framework[arrow]``).
+
+Usage::
+
+    batch = ArrowBatch.from_models(pacientes)
+    path = batch.to_shared()                    # en el proceso productor
+    batch = ArrowBatch.open_ipc(path)           # en el consumidor, sin copia
+    pacientes = batch.drop_duplicates().to_models()
+"""
+from __future__ import annotations
+
+import datetime
+import os
+import tempfile
+import typing
+import uuid
+from pathlib import Path
+from typing import Any, Iterable, List, Optional, Sequence, Type, Union, TYPE_CHECKING
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.ipc as ipc
+except ImportError as e:  # pragma: no cover - depende del entorno
+    raise ImportError("src.etl.arrow_batch requires pyarrow: pip install 'mdm-framework[arrow]'") from e
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from pydantic import BaseModel
+
+SHARED_DIR = Path('/dev/shm') if os.path.isdir('/dev/shm') else Path(tempfile.gettempdir())
+
+# Misma clave que patients_integration.deduplicate
+DEDUP_KEYS = ('pac_clave', 'nombrePac', 'apePatPac')
+
+_ARROW_TYPES = {
+    int: pa.int64(),
+    float: pa.float64(),
+    str: pa.string(),
+    bool: pa.bool_(),
+    datetime.date: pa.date32(),
+    datetime.datetime: pa.timestamp('us'),
+}
+
+
+def _arrow_type(annotation: Any) -> pa.DataType:
+    args = [a for a in typing.get_args(annotation) if a is not type(None)]
+    if typing.get_origin(annotation) is Union and len(args) == 1:
+        return _arrow_type(args[0])
+    if typing.get_origin(annotation) in (list, List):
+        return pa.list_(_arrow_type(args[0]))
+    if annotation not in _ARROW_TYPES:
+        raise TypeError(f"No Arrow type for field annotation {annotation!r}")
+    return _ARROW_TYPES[annotation]
+
+
+def schema_for(model: Type['BaseModel']) -> pa.Schema:
+    """Esquema Arrow de un modelo de landing (campos opcionales -> nullable)"""
+    return pa.schema([pa.field(name, _arrow_type(f.annotation), nullable=not f.is_required())
+                      for name, f in model.model_fields.items()])
+
+
+def _default_model() -> Type['BaseModel']:
+    from ..models.landing.schemas import PacienteFederadoLanding
+    return PacienteFederadoLanding
+
+
+class ArrowBatch:
+    """Tabla Arrow con el esquema de un modelo de landing"""
+
+    def __init__(self, table: pa.Table, model: Optional[Type['BaseModel']] = None):
+        self.table = table
+        self.model = model or _default_model()
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    def __repr__(self) -> str:
+        return f"ArrowBatch({self.model.__name__}, rows={len(self)}, bytes={self.nbytes})"
+
+    @property
+    def schema(self) -> pa.Schema:
+        return self.table.schema
+
+    @property
+    def nbytes(self) -> int:
+        return self.table.nbytes
+
+    # --- conversiones ---
+
+    @classmethod
+    def from_models(cls, models: Sequence['BaseModel'],
+                    model: Optional[Type['BaseModel']] = None) -> 'ArrowBatch':
+        """Columnas leídas de ``__dict__`` (sin model_dump por registro)"""
+        model = model or (type(models[0]) if models else _default_model())
+        schema = schema_for(model)
+        columns = {name: [m.__dict__.get(name) for m in models] for name in schema.names}
+        return cls(pa.table(columns, schema=schema), model)
+
+    def to_models(self) -> List['BaseModel']:
+        """Construye modelos sin revalidar (el esquema ya fija los tipos)"""
+        names = self.table.column_names
+        columns = [self.table.column(name).to_pylist() for name in names]
+        construct = self.model.model_construct
+        return [construct(**dict(zip(names, row))) for row in zip(*columns)]
+
+    @classmethod
+    def from_pandas(cls, df: 'pd.DataFrame', model: Optional[Type['BaseModel']] = None) -> 'ArrowBatch':
+        """
+        DataFrame (p. ej. ``MappingResult.frame``) al esquema del modelo;
+        columnas del modelo ausentes en ``df`` quedan nulas, las sobrantes se ignoran.
+        """
+        model = model or _default_model()
+        schema = schema_for(model)
+        arrays = []
+        for field in schema:
+            if field.name in df.columns:
+                arrays.append(pa.array(df[field.name], from_pandas=True).cast(field.type))
+            else:
+                arrays.append(pa.nulls(len(df), field.type))
+        return cls(pa.Table.from_arrays(arrays, schema=schema), model)
+
+    def to_pandas(self, **kwargs) -> 'pd.DataFrame':
+        return self.table.to_pandas(**kwargs)
+
+    # --- operaciones ---
+
+    @classmethod
+    def concat(cls, batches: Iterable['ArrowBatch']) -> 'ArrowBatch':
+        """Concatena sin copiar buffers (los chunks se conservan)"""
+        batches = list(batches)
+        if not batches:
+            return cls(schema_for(_default_model()).empty_table())
+        return cls(pa.concat_tables([b.table for b in batches]), batches[0].model)
+
+    def slice(self, offset: int, length: Optional[int] = None) -> 'ArrowBatch':
+        return ArrowBatch(self.table.slice(offset, length), self.model)
+
+    def drop_duplicates(self, keys: Sequence[str] = DEDUP_KEYS) -> 'ArrowBatch':
+        """Primera aparición de cada clave, en el orden original (como deduplicate())"""
+        if not len(self):
+            return self
+        rows = self.table.select(list(keys)).append_column('__row', pa.array(range(len(self)), pa.int64()))
+        first = rows.group_by(list(keys), use_threads=False).aggregate([('__row', 'min')])['__row_min']
+        return ArrowBatch(self.table.take(pc.take(first, pc.sort_indices(first))), self.model)
+
+    # --- IPC / memoria compartida ---
+
+    def write_ipc(self, path: Union[str, Path]) -> Path:
+        """Archivo IPC de Arrow (escritura atómica)"""
+        path = Path(path)
+        tmp = path.with_name(path.name + '.tmp')
+        with pa.OSFile(str(tmp), 'wb') as sink:
+            with ipc.new_file(sink, self.table.schema) as writer:
+                writer.write_table(self.table)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def open_ipc(cls, path: Union[str, Path], model: Optional[Type['BaseModel']] = None) -> 'ArrowBatch':
+        """Mapea el archivo en memoria: los buffers apuntan al mapa, no se copian"""
+        source = pa.memory_map(str(path), 'r')
+        return cls(ipc.open_file(source).read_all(), model)
+
+    def to_shared(self, directory: Optional[Path] = None) -> Path:
+        """
+        Escribe el lote en ``SHARED_DIR`` para pasarlo a otro proceso por ruta.
+        El consumidor lo abre con ``open_ipc`` y lo borra con ``release``.
+        """
+        directory = Path(directory) if directory is not None else SHARED_DIR
+        return self.write_ipc(directory / f'mdm-batch-{uuid.uuid4().hex}.arrow')
+
+    @staticmethod
+    def release(path: Union[str, Path]) -> None:
+        """Borra un lote compartido; los mapas ya abiertos siguen siendo válidos en POSIX"""
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,144 @@
+"""
+Change-data-capture deltas between successive federated patient snapshots.
+
+Instead of shipping the whole federated list after every integration run,
+``SnapshotStore.publish`` compares the new output with the previous snapshot
+and writes only insert/update/delete deltas keyed by
+``(pac_clave, HospOrigen)``.
+
+The persisted snapshot keeps only ``key -> content hash`` (a BLAKE2b digest of
+the canonical JSON of the records), so diffing never needs the previous
+records. A key can hold several records (same NSS and hospital, different
+names), so deltas carry the full list of records for the key.
+
+Usage::
+
+    store = SnapshotStore(Path('cdc'))
+    diff = store.publish(actividad5_agregar_gpo_angeles(p1, pacientes), run_id='2023-06-25')
+    # consumidores: cdc/deltas-2023-06-25.jsonl
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .metrics import RunMetrics
+
+Key = Tuple[int, str]
+
+
+def record_key(paciente: Any) -> Key:
+    return (int(paciente.pac_clave), paciente.HospOrigen)
+
+
+def _canonical(paciente: Any) -> Dict[str, Any]:
+    return paciente.model_dump(mode='json') if hasattr(paciente, 'model_dump') else dict(paciente)
+
+
+def group_hash(records: List[Dict[str, Any]]) -> str:
+    """Hash de contenido independiente del orden de los registros de la clave"""
+    lines = sorted(json.dumps(r, sort_keys=True, ensure_ascii=False) for r in records)
+    return hashlib.blake2b('\n'.join(lines).encode('utf-8'), digest_size=16).hexdigest()
+
+
+@dataclass
+class SnapshotDiff:
+    inserts: Dict[Key, List[Dict[str, Any]]] = field(default_factory=dict)
+    updates: Dict[Key, List[Dict[str, Any]]] = field(default_factory=dict)
+    deletes: List[Key] = field(default_factory=list)
+    unchanged: int = 0
+    snapshot: Dict[Key, str] = field(default_factory=dict)
+
+    @property
+    def changes(self) -> int:
+        return len(self.inserts) + len(self.updates) + len(self.deletes)
+
+    def deltas(self) -> Iterable[Dict[str, Any]]:
+        """Deltas en orden estable: inserts, updates, deletes (cada uno por clave)"""
+        for op, groups in (('insert', self.inserts), ('update', self.updates)):
+            for key in sorted(groups):
+                yield {'op': op, 'pac_clave': key[0], 'HospOrigen': key[1], 'records': groups[key]}
+        for key in sorted(self.deletes):
+            yield {'op': 'delete', 'pac_clave': key[0], 'HospOrigen': key[1], 'records': []}
+
+
+def diff_snapshot(previous: Dict[Key, str], pacientes: Iterable[Any],
+                  metrics: Optional[RunMetrics] = None) -> SnapshotDiff:
+    """Compara los pacientes actuales contra los hashes del snapshot anterior"""
+    metrics = metrics or RunMetrics()
+    with metrics.stage('cdc_diff') as stage:
+        groups: Dict[Key, List[Dict[str, Any]]] = {}
+        for p in pacientes:
+            groups.setdefault(record_key(p), []).append(_canonical(p))
+            stage.rows_in += 1
+        diff = SnapshotDiff()
+        for key, records in groups.items():
+            digest = group_hash(records)
+            diff.snapshot[key] = digest
+            old = previous.get(key)
+            if old is None:
+                diff.inserts[key] = records
+            elif old != digest:
+                diff.updates[key] = records
+            else:
+                diff.unchanged += 1
+        diff.deletes = [key for key in previous if key not in groups]
+        stage.rows_out = diff.changes
+    return diff
+
+
+def apply_deltas(state: Dict[Key, List[Dict[str, Any]]], deltas: Iterable[Dict[str, Any]]) -> None:
+    """Aplica deltas a un estado ``clave -> registros`` del consumidor (in place)"""
+    for delta in deltas:
+        key = (delta['pac_clave'], delta['HospOrigen'])
+        if delta['op'] == 'delete':
+            state.pop(key, None)
+        else:
+            state[key] = delta['records']
+
+
+class SnapshotStore:
+    """Directorio con el snapshot vigente (clave -> hash) y los archivos de deltas por corrida"""
+
+    SNAPSHOT = 'snapshot.tsv'
+
+    def __init__(self, directory: os.PathLike):
+        self.directory = Path(directory)
+
+    def load_snapshot(self) -> Dict[Key, str]:
+        path = self.directory / self.SNAPSHOT
+        snapshot: Dict[Key, str] = {}
+        if path.exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    clave, hosp, digest = line.rstrip('\n').split('\t')
+                    snapshot[(int(clave), hosp)] = digest
+        return snapshot
+
+    def _write_atomic(self, path: Path, lines: Iterable[str]) -> None:
+        tmp = path.with_name(path.name + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.writelines(lines)
+        os.replace(tmp, path)
+
+    def publish(self, pacientes: Iterable[Any], run_id: str,
+                metrics: Optional[RunMetrics] = None) -> SnapshotDiff:
+        """
+        Escribe ``deltas-<run_id>.jsonl`` y luego reemplaza el snapshot. Si la
+        corrida falla antes del reemplazo, repetirla produce los mismos deltas.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        diff = diff_snapshot(self.load_snapshot(), pacientes, metrics)
+        self._write_atomic(self.directory / f'deltas-{run_id}.jsonl',
+                           (json.dumps(d, ensure_ascii=False) + '\n' for d in diff.deltas()))
+        self._write_atomic(self.directory / self.SNAPSHOT,
+                           (f'{clave}\t{hosp}\t{digest}\n' for (clave, hosp), digest in sorted(diff.snapshot.items())))
+        return diff
+
+    def read_deltas(self, run_id: str) -> List[Dict[str, Any]]:
+        with open(self.directory / f'deltas-{run_id}.jsonl', 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
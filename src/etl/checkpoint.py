@@ -0,0 +1,224 @@
+"""
+Checkpointed, resumable ETL stages.
+
+A ``CheckpointStore`` is a small JSON state file. Each stage commits every
+finished batch as ``{batch, start_offset, end_offset, rows_in, rows_out,
+output}``. The batch output (JSON lines of landing models) is written
+atomically before the commit, so a crash anywhere leaves either a committed
+batch or a batch that is simply redone. A restarted run seeks to the last
+committed byte offset and continues; the concatenated outputs are identical
+to an uninterrupted run.
+
+If the source file's size or mtime changes, its stage starts over.
+
+Usage::
+
+    store = CheckpointStore('runs/2023-06-25/state.json')
+    casos = ingest_relational_checkpointed(ingester, store, Path('runs/2023-06-25/out'))
+"""
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Type, TYPE_CHECKING
+
+from .metrics import RunMetrics, StageMetrics
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from pydantic import BaseModel
+    from .ingestion import CovidDataIngester
+    from .pipeline import SourceSpec
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class CheckpointStore:
+    """Estado de etapas y lotes confirmados, persistido en un archivo JSON"""
+
+    def __init__(self, path: os.PathLike):
+        self.path = Path(path)
+        self.state: Dict[str, Any] = {'stages': {}}
+        if self.path.exists():
+            self.state = json.loads(self.path.read_text(encoding='utf-8'))
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        _atomic_write(self.path, json.dumps(self.state, indent=2, ensure_ascii=False).encode('utf-8'))
+
+    def stage(self, name: str, source: Optional[Path] = None) -> Dict[str, Any]:
+        """Estado de la etapa; se reinicia si el archivo fuente cambió"""
+        fingerprint = None
+        if source is not None:
+            st = Path(source).stat()
+            fingerprint = {'path': str(source), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+        current = self.state['stages'].get(name)
+        if current is None or current.get('source') != fingerprint:
+            current = {'source': fingerprint, 'batches': [], 'done': False}
+            self.state['stages'][name] = current
+            self._save()
+        return current
+
+    def commit_batch(self, name: str, batch: Dict[str, Any]) -> None:
+        stage = self.state['stages'][name]
+        stage['batches'] = [b for b in stage['batches'] if b['batch'] != batch['batch']] + [batch]
+        self._save()
+
+    def mark_done(self, name: str) -> None:
+        self.state['stages'][name]['done'] = True
+        self._save()
+
+    def reset(self, name: Optional[str] = None) -> None:
+        if name is None:
+            self.state['stages'] = {}
+        else:
+            self.state['stages'].pop(name, None)
+        self._save()
+
+    def batches(self, name: str) -> List[Dict[str, Any]]:
+        return sorted(self.state['stages'].get(name, {}).get('batches', []), key=lambda b: b['batch'])
+
+    def resume_offset(self, name: str) -> Optional[int]:
+        batches = self.batches(name)
+        return batches[-1]['end_offset'] if batches else None
+
+
+def iter_csv_batches(path: Path, batch_rows: int,
+                     start_offset: Optional[int] = None) -> Iterator[Tuple[int, int, bytes, bytes]]:
+    """
+    Lotes de ``batch_rows`` filas de un CSV como (offset_inicio, offset_fin, encabezado, cuerpo).
+
+    Una fila que abre comillas sin cerrarlas continúa en la siguiente línea,
+    así que los offsets siempre caen en un límite de registro.
+    """
+    with open(path, 'rb') as f:
+        header = f.readline()
+        if start_offset is not None:
+            f.seek(start_offset)
+        while True:
+            start = f.tell()
+            lines: List[bytes] = []
+            pending = b''
+            while len(lines) < batch_rows:
+                line = f.readline()
+                if not line:
+                    break
+                pending += line
+                if pending.count(b'"') % 2 == 0:
+                    lines.append(pending)
+                    pending = b''
+            if pending:
+                lines.append(pending)
+            if not lines:
+                return
+            yield start, f.tell(), header, b''.join(lines)
+
+
+def write_models(path: Path, models: Sequence['BaseModel']) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = ''.join(m.model_dump_json() + '\n' for m in models)
+    _atomic_write(path, data.encode('utf-8'))
+
+
+def read_models(path: Path, model: Type['BaseModel']) -> List['BaseModel']:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [model.model_validate_json(line) for line in f if line.strip()]
+
+
+def run_checkpointed_csv(name: str, source: Path, out_dir: Path, store: CheckpointStore,
+                         to_models: Callable[['pd.DataFrame', StageMetrics], List['BaseModel']],
+                         model: Type['BaseModel'], batch_rows: int = 100_000,
+                         metrics: Optional[RunMetrics] = None,
+                         max_batches: Optional[int] = None,
+                         dtype: Optional[Dict[str, Any]] = None) -> List[Path]:
+    """
+    Procesa ``source`` por lotes, confirmando cada uno; reanuda desde el último lote.
+
+    ``dtype`` se pasa a cada ``read_csv`` de lote: sin él, cada lote infiere sus
+    propios tipos y una columna con blancos en un solo lote sale distinta.
+
+    Returns:
+        Archivos de salida de todos los lotes, en orden
+    """
+    import io
+    import pandas as pd
+    metrics = metrics or RunMetrics()
+    state = store.stage(name, source)
+    with metrics.stage(f'checkpoint:{name}') as stage:
+        if not state['done']:
+            batch = len(store.batches(name))
+            processed = 0
+            for start, end, header, body in iter_csv_batches(source, batch_rows, store.resume_offset(name)):
+                if max_batches is not None and processed >= max_batches:
+                    break
+                df = pd.read_csv(io.BytesIO(header + body), dtype=dtype)
+                models = to_models(df, stage)
+                output = out_dir / name / f'batch-{batch:06d}.jsonl'
+                write_models(output, models)
+                store.commit_batch(name, {'batch': batch, 'start_offset': start, 'end_offset': end,
+                                          'rows_in': len(df), 'rows_out': len(models),
+                                          'output': str(output)})
+                stage.rows_in += len(df)
+                stage.rows_out += len(models)
+                batch += 1
+                processed += 1
+            else:
+                store.mark_done(name)
+        stage.rows_rejected = stage.rows_in - stage.rows_out
+    return [Path(b['output']) for b in store.batches(name)]
+
+
+def ingest_relational_checkpointed(ingester: 'CovidDataIngester', store: CheckpointStore, out_dir: Path,
+                                   batch_rows: int = 100_000,
+                                   max_batches: Optional[int] = None) -> List['BaseModel']:
+    """ingest_relational_data por lotes confirmados; el resultado es el mismo que sin checkpoints"""
+    from ..models.landing.schemas import CasoCovidLanding
+    from .ingestion import RELATIONAL_DTYPES
+    source = ingester.data_path / 'Relational' / 'COVID19MEXICO.csv'
+    outputs = run_checkpointed_csv('ingest_relational_data', source, Path(out_dir), store,
+                                   ingester.relational_frame_to_models, CasoCovidLanding,
+                                   batch_rows, ingester.metrics, max_batches, RELATIONAL_DTYPES)
+    return [caso for path in outputs for caso in read_models(path, CasoCovidLanding)]
+
+
+def integrate_sources_checkpointed(store: CheckpointStore, out_dir: Path,
+                                   base_dir: Optional[Path] = None,
+                                   sources: Optional[Sequence['SourceSpec']] = None,
+                                   metrics: Optional[RunMetrics] = None) -> List['BaseModel']:
+    """
+    Integración de pacientes con una etapa confirmada por fuente (en orden de
+    prioridad); al reanudar solo se cargan las fuentes pendientes y la
+    deduplicación final se repite sobre las salidas guardadas.
+    """
+    from ..models.landing.schemas import PacienteFederadoLanding
+    from .patients_integration import FUENTES_DIR, deduplicate
+    from .pipeline import DEFAULT_SOURCES, load_source
+    base_dir = Path(base_dir) if base_dir is not None else FUENTES_DIR
+    sources = DEFAULT_SOURCES if sources is None else sources
+    metrics = metrics or RunMetrics()
+    combinados: List[PacienteFederadoLanding] = []
+    for spec in sources:
+        path = base_dir / spec.filename
+        if not path.exists():
+            continue
+        name = f'source:{spec.name}'
+        state = store.stage(name, path)
+        output = Path(out_dir) / name.replace(':', '_') / 'batch-000000.jsonl'
+        if not state['done']:
+            result = load_source(spec, path)
+            metrics.stages.extend(result.stages)
+            write_models(output, result.pacientes)
+            store.commit_batch(name, {'batch': 0, 'start_offset': 0, 'end_offset': path.stat().st_size,
+                                      'rows_in': result.stages[0].rows_in if result.stages else 0,
+                                      'rows_out': len(result.pacientes), 'output': str(output)})
+            store.mark_done(name)
+        combinados.extend(read_models(output, PacienteFederadoLanding))
+    return deduplicate(combinados, metrics)
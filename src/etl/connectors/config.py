@@ -0,0 +1,41 @@
+"""
+Connector configuration loader for config/connectors.yml
+"""
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import yaml
+
+DEFAULT_CONFIG_PATH = Path(__file__).resolve().parents[3] / 'config' / 'connectors.yml'
+
+_env_pattern = re.compile(r'\$\{([^}]+)\}')
+
+
+def _expand_env(value: Any) -> Any:
+    """Sustituye referencias ${VAR} por variables de entorno (cadena vacía si no existen)"""
+    if isinstance(value, str):
+        return _env_pattern.sub(lambda m: os.getenv(m.group(1), ''), value)
+    if isinstance(value, dict):
+        return {k: _expand_env(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_expand_env(v) for v in value]
+    return value
+
+
+def load_connector_config(name: str, path: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    Load a single connector section from connectors.yml.
+
+    Args:
+        name: Connector key under ``connectors`` (e.g. 'postgres')
+        path: Optional path to the YAML file, defaults to config/connectors.yml
+    """
+    path = Path(path) if path else DEFAULT_CONFIG_PATH
+    with open(path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f) or {}
+    connectors = config.get('connectors', {})
+    if name not in connectors:
+        raise KeyError(f"Connector '{name}' not found in {path}")
+    return _expand_env(connectors[name])
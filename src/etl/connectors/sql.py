@@ -0,0 +1,202 @@
+"""
+SQL connector with batched server-side reads and COPY-based bulk loads
+"""
+import io
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence, Union
+
+import pandas as pd
+from pydantic import BaseModel
+from sqlalchemy import MetaData, Table, create_engine, text
+from sqlalchemy.engine import URL, Engine, make_url
+
+from .config import load_connector_config
+
+# Marcador de NULL para COPY ... FORMAT csv (distingue NULL de cadena vacía)
+_COPY_NULL = r'\N'
+
+
+def _nullable_ints(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Columnas float cuyos valores no nulos son todos enteros pasan a Int64:
+    un entero con nulos llega como float64 y to_csv escribiría "7.0", que
+    COPY rechaza en una columna integer.
+    """
+    casts = {}
+    for name, col in df.items():
+        if pd.api.types.is_float_dtype(col.dtype):
+            values = col.dropna()
+            if values.empty or ((values % 1 == 0) & (values.abs() < 2 ** 63)).all():
+                casts[name] = 'Int64'
+    return df.astype(casts) if casts else df
+
+
+def _copy_buffer(df: pd.DataFrame) -> io.StringIO:
+    """CSV para ``COPY ... FROM STDIN`` (sin encabezado, NULL como ``\\N``)"""
+    buffer = io.StringIO()
+    _nullable_ints(df).to_csv(buffer, index=False, header=False, na_rep=_COPY_NULL)
+    buffer.seek(0)
+    return buffer
+
+
+class SqlConnector:
+    """
+    Pooled SQL connector for source extraction and landing/master loads.
+
+    Reads are streamed with server-side cursors (``stream_results``) and
+    yielded as DataFrame batches. Writes on PostgreSQL use ``COPY FROM STDIN``;
+    other dialects (e.g. SQLite for local tests) fall back to ``executemany``.
+    """
+
+    def __init__(
+        self,
+        url: Union[str, URL],
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        batch_size: int = 10_000,
+        engine: Optional[Engine] = None
+    ):
+        """
+        Initialize the connector and its connection pool.
+
+        Args:
+            url: SQLAlchemy database URL
+            pool_size: Persistent connections kept in the pool
+            max_overflow: Extra connections allowed under load
+            batch_size: Default number of rows per read batch
+            engine: Optional pre-built engine (overrides url/pool settings)
+        """
+        self.batch_size = batch_size
+        self._metadata = MetaData()
+        if engine is not None:
+            self.engine = engine
+            return
+        url = make_url(url)
+        pool_args: Dict[str, Any] = {}
+        if url.get_backend_name() != 'sqlite':
+            pool_args = dict(pool_size=pool_size, max_overflow=max_overflow, pool_pre_ping=True)
+        self.engine = create_engine(url, **pool_args)
+
+    @classmethod
+    def from_config(cls, name: str = 'postgres', config_path: Optional[Path] = None,
+                    **kwargs) -> 'SqlConnector':
+        """Build a connector from a ``type: sql`` entry in connectors.yml"""
+        cfg = load_connector_config(name, config_path)
+        if cfg.get('type') != 'sql':
+            raise ValueError(f"Connector '{name}' is not of type 'sql'")
+        url = URL.create(
+            cfg.get('driver', 'postgresql+psycopg2'),
+            username=cfg.get('user') or None,
+            password=cfg.get('password') or None,
+            host=cfg.get('host'),
+            port=int(cfg['port']) if cfg.get('port') else None,
+            database=cfg.get('database'),
+        )
+        return cls(url, **kwargs)
+
+    @property
+    def is_postgres(self) -> bool:
+        return self.engine.dialect.name == 'postgresql'
+
+    def _quote(self, name: str) -> str:
+        return self.engine.dialect.identifier_preparer.quote(name)
+
+    def _qualified(self, table: str, schema: Optional[str] = None) -> str:
+        return f"{self._quote(schema)}.{self._quote(table)}" if schema else self._quote(table)
+
+    # --- Lectura ---
+
+    def read_batches(
+        self,
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        batch_size: Optional[int] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Stream a query result as DataFrame batches.
+
+        Args:
+            query: SQL text with optional ``:name`` parameters
+            params: Bound parameters for the query
+            batch_size: Rows per batch (defaults to the connector setting)
+        """
+        batch_size = batch_size or self.batch_size
+        with self.engine.connect() as conn:
+            result = conn.execution_options(
+                stream_results=True, max_row_buffer=batch_size
+            ).execute(text(query), params or {})
+            columns = list(result.keys())
+            for rows in result.partitions(batch_size):
+                yield pd.DataFrame(rows, columns=columns)
+
+    def read_table(
+        self,
+        table: str,
+        schema: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+        batch_size: Optional[int] = None
+    ) -> Iterator[pd.DataFrame]:
+        """Stream a whole source table (or a subset of its columns) in batches"""
+        cols = ', '.join(self._quote(c) for c in columns) if columns else '*'
+        return self.read_batches(f"SELECT {cols} FROM {self._qualified(table, schema)}",
+                                 batch_size=batch_size)
+
+    # --- Escritura ---
+
+    def copy_statement(self, table: str, columns: Sequence[str],
+                       schema: Optional[str] = None) -> str:
+        """Build the ``COPY ... FROM STDIN`` statement used for bulk loads"""
+        cols = ', '.join(self._quote(c) for c in columns)
+        return (f"COPY {self._qualified(table, schema)} ({cols}) FROM STDIN "
+                f"WITH (FORMAT csv, NULL '{_COPY_NULL}')")
+
+    def write_frame(self, df: pd.DataFrame, table: str, schema: Optional[str] = None) -> int:
+        """
+        Bulk-append a DataFrame into an existing table.
+
+        Returns:
+            Number of rows written
+        """
+        if df.empty:
+            return 0
+        with self.engine.begin() as conn:
+            if self.is_postgres:
+                buffer = _copy_buffer(df)
+                dbapi_conn = conn.connection.dbapi_connection
+                with dbapi_conn.cursor() as cursor:
+                    cursor.copy_expert(self.copy_statement(table, list(df.columns), schema), buffer)
+            else:
+                key = f"{schema}.{table}" if schema else table
+                target = self._metadata.tables.get(key)
+                if target is None:
+                    target = Table(table, self._metadata, schema=schema, autoload_with=conn)
+                records = df.astype(object).where(df.notna(), None).to_dict('records')
+                conn.execute(target.insert(), records)
+        return len(df)
+
+    def write_batches(self, batches: Iterable[pd.DataFrame], table: str,
+                      schema: Optional[str] = None) -> int:
+        """Bulk-append a stream of DataFrame batches, one transaction per batch"""
+        return sum(self.write_frame(batch, table, schema) for batch in batches)
+
+    def write_models(self, models: Sequence[BaseModel], table: str,
+                     schema: Optional[str] = None) -> int:
+        """Bulk-append landing/master pydantic models"""
+        if not models:
+            return 0
+        return self.write_frame(pd.DataFrame([m.model_dump() for m in models]), table, schema)
+
+    def execute(self, statement: str, params: Optional[Dict[str, Any]] = None) -> None:
+        """Run a DDL/DML statement in its own transaction"""
+        with self.engine.begin() as conn:
+            conn.execute(text(statement), params or {})
+
+    def close(self) -> None:
+        """Dispose of the connection pool"""
+        self.engine.dispose()
+
+    def __enter__(self) -> 'SqlConnector':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
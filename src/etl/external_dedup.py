@@ -0,0 +1,180 @@
+"""
+External-memory deduplication for patient sets larger than RAM.
+
+``deduplicate`` keeps every key and model in a dict. ``external_deduplicate``
+streams records to disk instead:
+
+1. **Spill** -- each record is tagged with its input position and appended to
+   one of ``partitions`` files chosen by hashing its dedup key, so all
+   copies of a key land in the same file.
+2. **Dedup** -- each partition is read back in input order and only the first
+   record per key is written out. Only that partition's key set is held in
+   memory. A partition larger than ``max_records`` is re-partitioned with a
+   new hash salt before it is deduped. Partitions can be processed in
+   parallel worker processes.
+3. **Merge** -- the per-partition survivors are already sorted by input
+   position, so a k-way ``heapq.merge`` streams them out in the same
+   first-seen-wins order as ``deduplicate``. At most ``max_open_files`` are
+   open at once: with more partitions, groups of that size are first merged
+   into intermediate files.
+
+Usage::
+
+    from src.etl.external_dedup import external_deduplicate
+    for paciente in external_deduplicate(iter_pacientes(), partitions=128):
+        ...
+"""
+from __future__ import annotations
+
+import heapq
+import pickle
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from .metrics import RunMetrics
+
+_PROTOCOL = pickle.HIGHEST_PROTOCOL
+_BUFFER = 1 << 20
+_SPILL_BUFFER = 1 << 16  # por archivo abierto a la vez (reparto y merge)
+
+
+def dedup_key(paciente: Any) -> Hashable:
+    """Misma clave que deduplicate(): (pac_clave, nombrePac, apePatPac)"""
+    return (paciente.pac_clave, paciente.nombrePac, paciente.apePatPac)
+
+
+def _iter_spill(path: Path, buffering: int = _BUFFER) -> Iterator[Tuple[int, Any]]:
+    with open(path, 'rb', buffering=buffering) as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+def _spill(items: Iterable[Tuple[int, Any]], key: Callable[[Any], Hashable],
+           directory: Path, partitions: int, salt: int) -> List[Tuple[Path, int]]:
+    """Reparte (seq, registro) en archivos por hash de la clave; devuelve (archivo, filas)"""
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = [directory / f'part-{i:04d}.pkl' for i in range(partitions)]
+    counts = [0] * partitions
+    files = [open(p, 'wb', buffering=_SPILL_BUFFER) for p in paths]
+    try:
+        for seq, record in items:
+            i = hash((salt, key(record))) % partitions
+            pickle.dump((seq, record), files[i], _PROTOCOL)
+            counts[i] += 1
+    finally:
+        for f in files:
+            f.close()
+    return [(p, n) for p, n in zip(paths, counts)]
+
+
+def _dedup_partition(path: Path, out_path: Path, key: Callable[[Any], Hashable]) -> Tuple[Path, int, int]:
+    """Primera aparición por clave; la entrada ya viene en orden de secuencia"""
+    seen = set()
+    rows_in = rows_out = 0
+    with open(out_path, 'wb', buffering=_BUFFER) as out:
+        for seq, record in _iter_spill(path):
+            rows_in += 1
+            k = key(record)
+            if k not in seen:
+                seen.add(k)
+                pickle.dump((seq, record), out, _PROTOCOL)
+                rows_out += 1
+    path.unlink()
+    return out_path, rows_in, rows_out
+
+
+def _merged(paths: List[Path]) -> Iterator[Tuple[int, Any]]:
+    return heapq.merge(*(_iter_spill(path, _SPILL_BUFFER) for path in paths), key=lambda item: item[0])
+
+
+def _merge_bounded(paths: List[Path], max_open: int) -> List[Path]:
+    """Fusiona por grupos de ``max_open`` archivos hasta que queden a lo más ``max_open``"""
+    level = 0
+    while len(paths) > max_open:
+        merged = []
+        for i in range(0, len(paths), max_open):
+            group = paths[i:i + max_open]
+            if len(group) == 1:
+                merged.append(group[0])
+                continue
+            out_path = group[0].with_name(f'merge-{level}-{i // max_open:05d}.pkl')
+            with open(out_path, 'wb', buffering=_BUFFER) as out:
+                for item in _merged(group):
+                    pickle.dump(item, out, _PROTOCOL)
+            for path in group:
+                path.unlink()
+            merged.append(out_path)
+        paths = merged
+        level += 1
+    return paths
+
+
+def _plan(parts: List[Tuple[Path, int]], key: Callable[[Any], Hashable], partitions: int,
+          max_records: int, depth: int, max_depth: int) -> List[Path]:
+    """Particiones listas para deduplicar; reparticiona las que exceden max_records"""
+    ready = []
+    for path, n in parts:
+        if n == 0:
+            path.unlink()
+        elif n > max_records and depth < max_depth:
+            sub = _spill(_iter_spill(path), key, path.with_suffix(''), partitions, salt=depth + 1)
+            path.unlink()
+            ready.extend(_plan(sub, key, partitions, max_records, depth + 1, max_depth))
+        else:
+            ready.append(path)
+    return ready
+
+
+def external_deduplicate(pacientes: Iterable[Any],
+                         key: Callable[[Any], Hashable] = dedup_key,
+                         partitions: int = 64,
+                         max_records: int = 1_000_000,
+                         workers: int = 1,
+                         workdir: Optional[Path] = None,
+                         max_open_files: int = 256,
+                         metrics: Optional[RunMetrics] = None) -> Iterator[Any]:
+    """
+    Deduplica ``pacientes`` con memoria acotada, conservando la primera aparición.
+
+    Args:
+        pacientes: Iterable (puede ser un generador) de registros picklables
+        key: Clave de deduplicación; debe ser función de módulo si workers > 1
+        partitions: Archivos por nivel de particionado
+        max_records: Máximo de registros por partición deduplicada en memoria
+        workers: Procesos para deduplicar particiones en paralelo
+        workdir: Directorio para los archivos temporales (por defecto tempfile)
+        max_open_files: Máximo de particiones abiertas a la vez en la fusión final
+        metrics: RunMetrics opcional; registra la etapa 'external_deduplicate'
+
+    Yields:
+        Registros únicos en el mismo orden que deduplicate()
+    """
+    if partitions < 1 or max_records < 1:
+        raise ValueError("partitions and max_records must be >= 1")
+    if max_open_files < 2:
+        raise ValueError("max_open_files must be >= 2")
+    metrics = metrics or RunMetrics()
+    tmp = Path(tempfile.mkdtemp(prefix='mdm-dedup-', dir=workdir))
+    try:
+        with metrics.stage('external_deduplicate') as stage:
+            parts = _spill(enumerate(pacientes), key, tmp / 'spill', partitions, salt=0)
+            stage.rows_in = sum(n for _, n in parts)
+            ready = _plan(parts, key, partitions, max_records, depth=0, max_depth=4)
+            outputs = [tmp / f'dedup-{i:05d}.pkl' for i in range(len(ready))]
+            if workers > 1 and len(ready) > 1:
+                with ProcessPoolExecutor(workers) as pool:
+                    done = list(pool.map(_dedup_partition, ready, outputs, [key] * len(ready)))
+            else:
+                done = [_dedup_partition(p, o, key) for p, o in zip(ready, outputs)]
+            stage.rows_out = sum(n for _, _, n in done)
+            runs = _merge_bounded([path for path, _, _ in done], max_open_files)
+        for _, record in _merged(runs):
+            yield record
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
@@ -1,21 +1,55 @@
 """
 Data ingestion module for COVID-19 data
+
+pandas and the pydantic landing models are imported inside each method so
+that importing this module (e.g. from short-lived cron jobs) stays cheap.
 """
-import pandas as pd
+from __future__ import annotations
 import json
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any
-from ..models.landing.schemas import CasoDiarioLanding, CasoCovidLanding, TextoCasoLanding
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
+from .metrics import RunMetrics, StageMetrics
+
+if TYPE_CHECKING:
+    from ..models.landing.schemas import CasoDiarioLanding, CasoCovidLanding, TextoCasoLanding
+    from ..models.landing.columnar import CasosColumnar
+    from ..profiling.profiler import TableProfiler
+    from .sampling import CsvSample
+    from .text_corpus import TextCorpus
+
+# Columnas de COVID19MEXICO.csv leídas siempre como texto: si pandas infiere
+# el tipo por lote, un código con blancos sale float ('2.0') solo en algunos lotes
+RELATIONAL_CODE_COLUMNS = ('ORIGEN', 'SECTOR', 'ENTIDAD_UM', 'SEXO', 'ENTIDAD_NAC', 'ENTIDAD_RES',
+                           'MUNICIPIO_RES', 'TIPO_PACIENTE', 'NACIONALIDAD',
+                           'RESULTADO_PCR', 'RESULTADO_ANTIGENO')
+RELATIONAL_DTYPES = {col: str for col in RELATIONAL_CODE_COLUMNS + (
+    'ID_REGISTRO', 'FECHA_ACTUALIZACION', 'FECHA_INGRESO', 'FECHA_SINTOMAS', 'FECHA_DEF',
+    'PAIS_NACIONALIDAD', 'PAIS_ORIGEN')}
+
+
+def code_text(value: Any) -> str:
+    """Código de catálogo como texto: '09', 9, 9.0 y '9.0' -> '9'; lo no numérico queda igual"""
+    text = str(value)
+    try:
+        number = float(text)
+    except ValueError:
+        return text
+    return str(int(number)) if number.is_integer() else text
+
 
 class CovidDataIngester:
     """Ingests COVID-19 data from multiple sources into landing models"""
     
-    def __init__(self, data_path: str):
+    def __init__(self, data_path: str, metrics: Optional[RunMetrics] = None):
         self.data_path = Path(data_path)
+        self.metrics = metrics or RunMetrics()
         
     def ingest_graph_data(self) -> List[CasoDiarioLanding]:
         """Ingest data from CSV files in Graph folder"""
+        import pandas as pd
+        from ..models.landing.schemas import CasoDiarioLanding
+        
         casos_diarios = []
         graph_path = self.data_path / 'Graph'
         
@@ -30,51 +64,77 @@ class CovidDataIngester:
         # Diccionario para almacenar datos por fecha y estado
         datos_por_fecha_estado: Dict[tuple, Dict] = {}
         
-        # Procesar cada archivo
-        for tipo_caso, filename in files.items():
-            df = pd.read_csv(graph_path / filename)
-            
-            # Obtener las columnas que son fechas (excluyendo 'cve_ent', 'poblacion', 'nombre')
-            fecha_cols = [col for col in df.columns if col not in ['cve_ent', 'poblacion', 'nombre']]
-            
-            # Procesar cada estado
-            for _, row in df.iterrows():
-                estado = row['nombre']
+        with self.metrics.stage('ingest_graph_data') as stage:
+            # Procesar cada archivo
+            for tipo_caso, filename in files.items():
+                df = pd.read_csv(graph_path / filename)
+                stage.rows_in += len(df)
                 
-                # Procesar cada columna de fecha
-                for fecha_str in fecha_cols:
-                    casos = row[fecha_str]
-                    # Convertir la fecha de DD-MM-YYYY a objeto date
-                    fecha = datetime.strptime(fecha_str, '%d-%m-%Y').date()
-                    
-                    key = (fecha, estado)
-                    if key not in datos_por_fecha_estado:
-                        datos_por_fecha_estado[key] = {
-                            'fecha': fecha,
-                            'estado': estado,
-                            'confirmados': 0,
-                            'defunciones': 0,
-                            'negativos': 0,
-                            'sospechosos': 0,
-                            'source_file': filename
-                        }
+                # Obtener las columnas que son fechas (excluyendo 'cve_ent', 'poblacion', 'nombre')
+                fecha_cols = [col for col in df.columns if col not in ['cve_ent', 'poblacion', 'nombre']]
+                
+                # Procesar cada estado
+                for _, row in df.iterrows():
+                    estado = row['nombre']
                     
-                    # Actualizar el conteo correspondiente según el tipo de caso
-                    datos_por_fecha_estado[key][tipo_caso] = casos
-        
-        # Convertir a modelos de landing
-        for datos in datos_por_fecha_estado.values():
-            casos_diarios.append(CasoDiarioLanding(**datos))
+                    # Procesar cada columna de fecha
+                    for fecha_str in fecha_cols:
+                        casos = row[fecha_str]
+                        # Convertir la fecha de DD-MM-YYYY a objeto date
+                        fecha = datetime.strptime(fecha_str, '%d-%m-%Y').date()
+                        
+                        key = (fecha, estado)
+                        if key not in datos_por_fecha_estado:
+                            datos_por_fecha_estado[key] = {
+                                'fecha': fecha,
+                                'estado': estado,
+                                'confirmados': 0,
+                                'defunciones': 0,
+                                'negativos': 0,
+                                'sospechosos': 0,
+                                'source_file': filename
+                            }
+                        
+                        # Actualizar el conteo correspondiente según el tipo de caso
+                        datos_por_fecha_estado[key][tipo_caso] = casos
+            
+            # Convertir a modelos de landing
+            for datos in datos_por_fecha_estado.values():
+                casos_diarios.append(CasoDiarioLanding(**datos))
+            stage.rows_out = len(casos_diarios)
         
         return casos_diarios
     
-    def ingest_relational_data(self) -> List[CasoCovidLanding]:
-        """Ingest data from COVID19MEXICO.csv"""
-        casos = []
+    def ingest_relational_data(self, profiler: Optional[TableProfiler] = None) -> List[CasoCovidLanding]:
+        """Ingest data from COVID19MEXICO.csv
+
+        Args:
+            profiler: Optional TableProfiler fed with the raw frame in the same pass
+        """
+        import pandas as pd
+        
         rel_path = self.data_path / 'Relational' / 'COVID19MEXICO.csv'
         
-        # Leer el CSV con pandas
-        df = pd.read_csv(rel_path)
+        with self.metrics.stage('ingest_relational_data') as stage:
+            # Leer el CSV con pandas (tipos fijos, ver RELATIONAL_DTYPES)
+            df = pd.read_csv(rel_path, dtype=RELATIONAL_DTYPES)
+            stage.rows_in = len(df)
+            if profiler is not None:
+                profiler.update(df)
+            
+            casos = self.relational_frame_to_models(df, stage)
+            
+            stage.rows_out = len(casos)
+            stage.rows_rejected = stage.rows_in - stage.rows_out
+        
+        return casos
+    
+    def relational_frame_to_models(self, df, stage: StageMetrics) -> List[CasoCovidLanding]:
+        """Convert a COVID19MEXICO.csv frame (or batch of it) to landing models; errors go to ``stage``"""
+        import pandas as pd
+        from ..models.landing.schemas import CasoCovidLanding
+        
+        casos = []
         
         def parse_date(date_str):
             """Convertir string de fecha a objeto date, retorna None si la fecha es inválida"""
@@ -95,14 +155,17 @@ class CovidDataIngester:
                 # Convertir fechas con manejo de valores inválidos
                 fecha_act = parse_date(row['FECHA_ACTUALIZACION'])
                 if not fecha_act:  # Si no hay fecha de actualización válida, skipear el caso
+                    stage.record_error('FECHA_ACTUALIZACION inválida o futura')
                     continue
                     
                 fecha_ing = parse_date(row['FECHA_INGRESO'])
                 if not fecha_ing:  # Si no hay fecha de ingreso válida, skipear el caso
+                    stage.record_error('FECHA_INGRESO inválida o futura')
                     continue
                     
                 fecha_sin = parse_date(row['FECHA_SINTOMAS'])
                 if not fecha_sin:  # Si no hay fecha de síntomas válida, skipear el caso
+                    stage.record_error('FECHA_SINTOMAS inválida o futura')
                     continue
                     
                 # Fecha defunción puede ser None
@@ -111,21 +174,21 @@ class CovidDataIngester:
                 caso = CasoCovidLanding(
                     id_registro=str(row['ID_REGISTRO']),
                     fecha_actualizacion=fecha_act,
-                    origen=str(row['ORIGEN']),
-                    sector=str(row['SECTOR']),
-                    entidad_um=str(row['ENTIDAD_UM']),
-                    sexo=str(row['SEXO']),
-                    entidad_nac=str(row['ENTIDAD_NAC']),
-                    entidad_res=str(row['ENTIDAD_RES']),
-                    municipio_res=str(row['MUNICIPIO_RES']),
-                    tipo_paciente=str(row['TIPO_PACIENTE']),
+                    origen=code_text(row['ORIGEN']),
+                    sector=code_text(row['SECTOR']),
+                    entidad_um=code_text(row['ENTIDAD_UM']),
+                    sexo=code_text(row['SEXO']),
+                    entidad_nac=code_text(row['ENTIDAD_NAC']),
+                    entidad_res=code_text(row['ENTIDAD_RES']),
+                    municipio_res=code_text(row['MUNICIPIO_RES']),
+                    tipo_paciente=code_text(row['TIPO_PACIENTE']),
                     fecha_ingreso=fecha_ing,
                     fecha_sintomas=fecha_sin,
                     fecha_def=fecha_def,
                     intubado=row['INTUBADO'],
                     neumonia=row['NEUMONIA'],
                     edad=int(row['EDAD']),
-                    nacionalidad=str(row['NACIONALIDAD']),
+                    nacionalidad=code_text(row['NACIONALIDAD']),
                     embarazo=row['EMBARAZO'],
                     habla_lengua_indig=row['HABLA_LENGUA_INDIG'],
                     diabetes=row['DIABETES'],
@@ -139,7 +202,7 @@ class CovidDataIngester:
                     renal_cronica=row['RENAL_CRONICA'],
                     tabaquismo=row['TABAQUISMO'],
                     otro_caso=row['OTRO_CASO'],
-                    resultado=str(row['RESULTADO_PCR']) if pd.notna(row['RESULTADO_PCR']) else str(row['RESULTADO_ANTIGENO']),
+                    resultado=code_text(row['RESULTADO_PCR'] if pd.notna(row['RESULTADO_PCR']) else row['RESULTADO_ANTIGENO']),
                     migrante=row['MIGRANTE'],
                     pais_nacionalidad=str(row['PAIS_NACIONALIDAD']),
                     pais_origen=str(row['PAIS_ORIGEN']),
@@ -148,32 +211,85 @@ class CovidDataIngester:
                 )
                 casos.append(caso)
             except (ValueError, KeyError) as e:
-                # Log error y continuar con el siguiente caso
-                print(f"Error procesando caso: {e}")
+                # Agregar el error (se reporta una vez al cerrar la etapa) y continuar
+                stage.record_error(e, context=row.get('ID_REGISTRO'))
                 continue
-        
         return casos
     
+    def ingest_relational_sample(self, fraction: float = 0.01, seed: Optional[int] = None,
+                                 block_rows: int = 64,
+                                 profiler: Optional[TableProfiler] = None) -> CsvSample:
+        """Exploratory run over ~``fraction`` of COVID19MEXICO.csv, read by byte-offset blocks
+
+        Estimates (``total_rows``, ``count_by``, ``proportion``, ``mean``) come
+        with standard errors; ``casos`` holds the landing models of the sampled rows.
+
+        Args:
+            fraction: Share of rows to read
+            seed: Seed for the block offsets
+            block_rows: Consecutive rows read at each offset
+            profiler: Optional TableProfiler fed with the sampled rows
+        """
+        from .sampling import sample_csv
+
+        rel_path = self.data_path / 'Relational' / 'COVID19MEXICO.csv'
+        with self.metrics.stage('ingest_relational_sample') as stage:
+            muestra = sample_csv(rel_path, fraction, block_rows, seed)
+            df = muestra.frame.drop(columns=['_block', '_bytes'])
+            stage.rows_in = len(df)
+            if profiler is not None:
+                profiler.update(df)
+            muestra.casos = self.relational_frame_to_models(df, stage)
+            stage.rows_out = len(muestra.casos)
+            stage.rows_rejected = stage.rows_in - stage.rows_out
+        return muestra
+
+    def ingest_relational_columnar(self) -> CasosColumnar:
+        """Ingest COVID19MEXICO.csv as dictionary-encoded NumPy columns (see CasosColumnar)"""
+        import pandas as pd
+        from ..models.landing.columnar import CasosColumnar
+
+        rel_path = self.data_path / 'Relational' / 'COVID19MEXICO.csv'
+        with self.metrics.stage('ingest_relational_columnar') as stage:
+            df = pd.read_csv(rel_path, dtype=RELATIONAL_DTYPES)
+            casos = CasosColumnar.from_frame(df, source_file='COVID19MEXICO.csv', metrics=self.metrics)
+            stage.rows_in = len(df)
+            stage.rows_out = len(casos)
+            stage.rows_rejected = stage.rows_in - stage.rows_out
+        return casos
+
+    def ingest_text_corpus(self, corpus: Optional[TextCorpus] = None, workers: int = 1,
+                           pattern: str = '**/*.txt') -> List[TextoCasoLanding]:
+        """Stream every file under Text/ (see TextCorpus); pass ``corpus`` to keep its keyword index"""
+        from .text_corpus import TextCorpus
+
+        corpus = corpus if corpus is not None else TextCorpus()
+        return corpus.ingest_directory(self.data_path / 'Text', pattern, workers, metrics=self.metrics)
+
     def ingest_text_data(self) -> List[TextoCasoLanding]:
         """Ingest data from text files"""
+        from ..models.landing.schemas import TextoCasoLanding
+        
         casos_texto = []
         text_path = self.data_path / 'Text' / 'data_descriptor.txt'
         
-        # Leer archivo de texto
-        with open(text_path, 'r', encoding='utf-8') as f:
-            texto = f.read()
-            
-            # Ejemplo simple de extracción de keywords
-            keywords = [word.strip() for word in texto.split() 
-                       if len(word.strip()) > 5][:10]  # primeras 10 palabras largas
-            
-            caso = TextoCasoLanding(
-                texto_completo=texto,
-                fecha_extraccion=datetime.now().date(),
-                entidad='Nacional',  # Se podría mejorar con NLP
-                keywords=keywords,
-                source_file='data_descriptor.txt'
-            )
-            casos_texto.append(caso)
+        with self.metrics.stage('ingest_text_data') as stage:
+            # Leer archivo de texto
+            with open(text_path, 'r', encoding='utf-8') as f:
+                texto = f.read()
+                
+                # Ejemplo simple de extracción de keywords
+                keywords = [word.strip() for word in texto.split() 
+                           if len(word.strip()) > 5][:10]  # primeras 10 palabras largas
+                
+                caso = TextoCasoLanding(
+                    texto_completo=texto,
+                    fecha_extraccion=datetime.now().date(),
+                    entidad='Nacional',  # Se podría mejorar con NLP
+                    keywords=keywords,
+                    source_file='data_descriptor.txt'
+                )
+                casos_texto.append(caso)
+            stage.rows_in = stage.rows_out = len(casos_texto)
         
         return casos_texto
@@ -0,0 +1,284 @@
+"""
+Pipeline instrumentation: per-stage timing, row counts, memory and aggregated errors
+"""
+import json
+import logging
+import logging.config
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+logger = logging.getLogger('mdm')
+# Sin setup_logging, los avisos de etapa no deben caer en el lastResort (stderr)
+logger.addHandler(logging.NullHandler())
+
+LOGGING_CONFIG = Path(__file__).resolve().parents[2] / 'config' / 'logging.yml'
+
+
+def setup_logging(path: Optional[Path] = None) -> None:
+    """Aplica config/logging.yml (logger 'mdm')"""
+    import yaml
+    with open(path or LOGGING_CONFIG, 'r', encoding='utf-8') as f:
+        logging.config.dictConfig(yaml.safe_load(f))
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """
+    High-water mark de memoria residente del proceso (None si no se puede
+    medir). En Linux es VmHWM, que ``reset_peak_rss`` reinicia; en otros
+    sistemas, el máximo de toda la vida del proceso.
+    """
+    hwm = _proc_status_bytes('VmHWM')
+    if hwm is not None:
+        return hwm
+    try:
+        import resource
+    except ImportError:  # Windows
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return int(getattr(info, 'peak_wset', info.rss))
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB, macOS bytes
+    return int(peak) if sys.platform == 'darwin' else int(peak) * 1024
+
+
+def _proc_status_bytes(field_name: str) -> Optional[int]:
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith(field_name + ':'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def current_rss_bytes() -> Optional[int]:
+    """Memoria residente actual del proceso (None si no se puede medir)"""
+    rss = _proc_status_bytes('VmRSS')
+    if rss is not None:
+        return rss
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return int(psutil.Process().memory_info().rss)
+
+
+def reset_peak_rss() -> bool:
+    """
+    Reinicia el high-water mark (VmHWM) del proceso; solo Linux. Sin esto,
+    ``ru_maxrss`` es el máximo de toda la vida del proceso y cada etapa
+    posterior a la más grande reporta el mismo pico.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        return False
+    return True
+
+
+@dataclass
+class ErrorSummary:
+    """Errores agrupados por tipo y mensaje, con unas cuantas muestras"""
+    count: int = 0
+    samples: List[str] = field(default_factory=list)
+
+
+@dataclass
+class StageMetrics:
+    """Métricas de una etapa del pipeline"""
+    name: str
+    rows_in: int = 0
+    rows_out: int = 0
+    rows_rejected: int = 0
+    wall_seconds: float = 0.0
+    rss_start_bytes: Optional[int] = None
+    rss_end_bytes: Optional[int] = None
+    peak_rss_bytes: Optional[int] = None  # máximo durante la etapa
+    errors: Dict[str, ErrorSummary] = field(default_factory=dict)
+    max_samples: int = 5
+
+    def record_error(self, error: Union[Exception, str], context: Any = None, count: int = 1) -> None:
+        """
+        Agrega un error sin imprimirlo; se reporta una vez al cerrar la etapa.
+        ``count`` suma varias filas con el mismo motivo en un solo paso.
+        """
+        if hasattr(error, 'errors') and callable(error.errors):
+            # pydantic.ValidationError: agrupar por campo y tipo, no por valor de entrada
+            detail = '; '.join(f"{'.'.join(map(str, e['loc']))}: {e['type']}" for e in error.errors())
+            key = f"{type(error).__name__}: {detail}"
+        elif isinstance(error, Exception):
+            key = f"{type(error).__name__}: {error}"
+        else:
+            key = str(error)
+        summary = self.errors.setdefault(key, ErrorSummary())
+        summary.count += count
+        if len(summary.samples) < self.max_samples and context is not None:
+            summary.samples.append(str(context))
+
+    @property
+    def error_count(self) -> int:
+        return sum(e.count for e in self.errors.values())
+
+    @property
+    def rss_delta_bytes(self) -> Optional[int]:
+        if self.rss_start_bytes is None or self.rss_end_bytes is None:
+            return None
+        return self.rss_end_bytes - self.rss_start_bytes
+
+    @property
+    def throughput(self) -> Optional[float]:
+        """Filas de entrada por segundo"""
+        return self.rows_in / self.wall_seconds if self.wall_seconds else None
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.pop('max_samples')
+        data['throughput_rows_per_sec'] = self.throughput
+        data['rss_delta_bytes'] = self.rss_delta_bytes
+        data['error_count'] = self.error_count
+        return data
+
+
+# El pico (VmHWM) es de todo el proceso: cada etapa abierta, de cualquier
+# RunMetrics o hilo, recibe el pico antes de que otra etapa lo reinicie
+_open_stages: List[StageMetrics] = []
+_open_lock = threading.Lock()
+
+
+def _fold_peak() -> None:
+    peak = _proc_status_bytes('VmHWM')
+    if peak is not None:
+        for open_stage in _open_stages:
+            open_stage.peak_rss_bytes = max(open_stage.peak_rss_bytes or 0, peak)
+
+
+class RunMetrics:
+    """
+    Collects StageMetrics for one pipeline run and exports them.
+
+    Usage::
+
+        metrics = RunMetrics()
+        with metrics.stage('ingest_relational_data') as st:
+            st.rows_in = len(df)
+            ...
+        metrics.to_json('run.json')
+    """
+
+    def __init__(self, run_id: Optional[str] = None):
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.started_at = datetime.now()
+        self.stages: List[StageMetrics] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageMetrics]:
+        metrics = StageMetrics(name=name)
+        with _open_lock:
+            _fold_peak()
+            tracks_peak = reset_peak_rss()
+            metrics.rss_start_bytes = current_rss_bytes()
+            _open_stages.append(metrics)
+        start = time.perf_counter()
+        try:
+            yield metrics
+        finally:
+            metrics.wall_seconds = time.perf_counter() - start
+            with _open_lock:
+                metrics.rss_end_bytes = current_rss_bytes()
+                _fold_peak()
+                _open_stages.remove(metrics)
+            if not tracks_peak:
+                # Sin reinicio del pico: lo más que se puede afirmar es inicio/fin
+                known = [v for v in (metrics.rss_start_bytes, metrics.rss_end_bytes) if v is not None]
+                metrics.peak_rss_bytes = max(known) if known else None
+            self.stages.append(metrics)
+            logger.info("%s: %d in, %d out, %d rejected in %.3fs",
+                        name, metrics.rows_in, metrics.rows_out,
+                        metrics.rows_rejected, metrics.wall_seconds)
+            if metrics.errors:
+                logger.warning("%s: %d errors (%d distinct); first: %s",
+                               name, metrics.error_count, len(metrics.errors),
+                               next(iter(metrics.errors)))
+
+    def get(self, name: str) -> Optional[StageMetrics]:
+        """Última ejecución de una etapa por nombre"""
+        for metrics in reversed(self.stages):
+            if metrics.name == name:
+                return metrics
+        return None
+
+    def stage_totals(self) -> List[StageMetrics]:
+        """
+        Una StageMetrics por nombre, en orden de primera aparición. Las etapas
+        que se repiten en una corrida (apply_mapping por lote, deduplicate en
+        cada actividad) suman filas, tiempo y errores; el pico es el máximo y
+        la memoria va del inicio de la primera al fin de la última.
+        """
+        totals: Dict[str, StageMetrics] = {}
+        for s in self.stages:
+            total = totals.get(s.name)
+            if total is None:
+                total = totals[s.name] = StageMetrics(name=s.name, rss_start_bytes=s.rss_start_bytes)
+            total.rows_in += s.rows_in
+            total.rows_out += s.rows_out
+            total.rows_rejected += s.rows_rejected
+            total.wall_seconds += s.wall_seconds
+            total.rss_end_bytes = s.rss_end_bytes
+            if s.peak_rss_bytes is not None:
+                total.peak_rss_bytes = max(total.peak_rss_bytes or 0, s.peak_rss_bytes)
+            for key, summary in s.errors.items():
+                merged = total.errors.setdefault(key, ErrorSummary())
+                merged.count += summary.count
+                merged.samples.extend(summary.samples[:total.max_samples - len(merged.samples)])
+        return list(totals.values())
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            'run_id': self.run_id,
+            'started_at': self.started_at.isoformat(),
+            'stages': [s.as_dict() for s in self.stages],
+        }
+
+    def to_json(self, path: Union[str, Path]) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2, ensure_ascii=False)
+
+    def to_prometheus(self, path: Union[str, Path]) -> None:
+        """
+        Escribe un archivo de texto para el textfile collector de node_exporter.
+        Las series solo llevan la etiqueta ``stage``: el run_id cambia en cada
+        corrida y como etiqueta crearía series sin límite. Las etapas repetidas
+        se exportan sumadas (``stage_totals``): dos series con las mismas
+        etiquetas hacen que el collector rechace el archivo entero.
+        """
+        gauges = [
+            ('mdm_stage_wall_seconds', 'Stage wall time in seconds', 'wall_seconds'),
+            ('mdm_stage_rows_in', 'Rows read by the stage', 'rows_in'),
+            ('mdm_stage_rows_out', 'Rows produced by the stage', 'rows_out'),
+            ('mdm_stage_rows_rejected', 'Rows rejected by the stage', 'rows_rejected'),
+            ('mdm_stage_errors', 'Errors recorded by the stage', 'error_count'),
+            ('mdm_stage_throughput_rows_per_second', 'Input rows per second', 'throughput'),
+            ('mdm_stage_peak_rss_bytes', 'Peak RSS while the stage ran', 'peak_rss_bytes'),
+            ('mdm_stage_rss_delta_bytes', 'RSS change between stage start and end', 'rss_delta_bytes'),
+        ]
+        lines = []
+        for metric, help_text, attr in gauges:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            for s in self.stage_totals():
+                value = getattr(s, attr)
+                if value is not None:
+                    lines.append(f'{metric}{{stage="{s.name}"}} {value}')
+        Path(path).write_text('\n'.join(lines) + '\n', encoding='utf-8')
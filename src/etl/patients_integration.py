@@ -10,21 +10,46 @@ from __future__ import annotations
 from pathlib import Path
 import json
 import re
-import pandas as pd
-from typing import List, Dict, Optional, Tuple
-from ..models.landing.schemas import PacienteFederadoLanding
+from typing import Iterator, List, Dict, Optional, TYPE_CHECKING
+from .metrics import RunMetrics
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from ..models.landing.schemas import PacienteFederadoLanding
+    from .connectors.sql import SqlConnector
+
+# pandas y pydantic se importan dentro de cada función: importar el módulo
+# (p. ej. solo para normalize_text o los MAPPING_*) no debe cargarlos.
+
+FUENTES_DIR = Path(__file__).resolve().parents[2] / 'p1'
 
 # --- Utilidades de normalización ---
 _accent_map = str.maketrans('ÁÉÍÓÚÜÑáéíóúüñ', 'AEIOUUNAEIOUUN')
 
+def _is_null(value) -> bool:
+    """None, NaN o pd.NA (los frames de read_csv/JSON traen NaN, no None)"""
+    if value is None:
+        return True
+    try:
+        return bool(value != value)
+    except TypeError:  # pd.NA no tiene valor de verdad
+        return True
+
 def normalize_text(s: str) -> str:
-    if s is None:
+    if _is_null(s):
         return None
     s = str(s).strip()
     s = s.translate(_accent_map)
     s = re.sub(r'\s+', ' ', s)
     return s.upper()
 
+def extract_nss(value) -> Optional[int]:
+    """NSS/identificador a entero: solo dígitos, truncado a 8 como especificación int(8)"""
+    if _is_null(value):
+        return None
+    digits = re.sub(r'\D', '', str(value))
+    return int(digits[:8]) if digits else None
+
 # --- Actividad 1: Mapeo de campos ---
 # Definimos el diccionario de mapeo lógico hacia el modelo PacienteFederadoLanding
 # clave: nombre en archivo origen -> (campo destino, transform)
@@ -47,6 +72,7 @@ MAPPING_ABC = {
 # --- Lectores de fuentes ---
 
 def load_siglo21_sql(path: Path) -> pd.DataFrame:
+    import pandas as pd
     sql_text = path.read_text(encoding='utf-8', errors='ignore')
     # Extraer los bloques INSERT
     rows = []
@@ -61,50 +87,79 @@ def load_siglo21_sql(path: Path) -> pd.DataFrame:
                 rows.append(dict(NOMBRE=raw_fields[0], APELLIDO=raw_fields[1], NSS=raw_fields[2], Direccion=raw_fields[3]))
     return pd.DataFrame(rows)
 
+def load_siglo21_db(connector: 'SqlConnector', table: str = 'Pacientes',
+                    batch_size: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """Lee la tabla Pacientes de Siglo21 directamente de la BD, un lote a la vez (cursor de servidor)"""
+    return connector.read_table(table, columns=list(MAPPING_SIGLO21), batch_size=batch_size)
+
 def load_abc_json(path: Path) -> pd.DataFrame:
+    import pandas as pd
     data = json.loads(path.read_text(encoding='utf-8'))
     return pd.DataFrame(data)
 
+def load_medica_sur_csv(path: Path) -> pd.DataFrame:
+    import pandas as pd
+    return pd.read_csv(path)
+
+def load_gpo_angeles_excel(path: Path) -> pd.DataFrame:
+    import pandas as pd
+    return pd.read_excel(path)
+
 # --- Transformaciones comunes ---
 
-def apply_mapping(df: pd.DataFrame, mapping: Dict[str, tuple], origen: str) -> List[PacienteFederadoLanding]:
-    pacientes: List[PacienteFederadoLanding] = []
-    for _, row in df.iterrows():
-        record = {
-            'pac_clave': None,
-            'nombrePac': None,
-            'apePatPac': None,
-            'apeMatPac': None,
-            'direccion': None,
-            'HospOrigen': origen
-        }
-        for src_col, (dest_col, transform) in mapping.items():
-            val = row.get(src_col)
-            if transform:
-                val = transform(val)
-            record[dest_col] = val
-        # Convertir NSS a entero truncando caracteres no numéricos
-        if record['pac_clave'] is not None:
-            digits = re.sub(r'\D', '', str(record['pac_clave']))
-            if digits:
-                record['pac_clave'] = int(digits[:8])  # limitar a 8 como especificación int(8)
-        # Crear surrogate si falta
-        if record['pac_clave'] is None:
-            continue
-        try:
-            pacientes.append(PacienteFederadoLanding(**record))
-        except Exception:
-            continue
+def apply_mapping(df: pd.DataFrame, mapping: Dict[str, tuple], origen: str,
+                  metrics: Optional[RunMetrics] = None) -> List[PacienteFederadoLanding]:
+    from ..models.landing.schemas import PacienteFederadoLanding
+    from ..models.landing.validation import validate_batch
+    records: List[dict] = []
+    metrics = metrics or RunMetrics()
+    with metrics.stage(f"apply_mapping:{origen}") as stage:
+        for _, row in df.iterrows():
+            record = {
+                'pac_clave': None,
+                'nombrePac': None,
+                'apePatPac': None,
+                'apeMatPac': None,
+                'direccion': None,
+                'HospOrigen': origen
+            }
+            for src_col, (dest_col, transform) in mapping.items():
+                val = row.get(src_col)
+                if transform:
+                    val = transform(val)
+                record[dest_col] = val
+            # Convertir NSS a entero truncando caracteres no numéricos
+            if record['pac_clave'] is not None:
+                nss = extract_nss(record['pac_clave'])
+                if nss is not None:
+                    record['pac_clave'] = nss
+            # Crear surrogate si falta
+            if record['pac_clave'] is None:
+                stage.record_error('pac_clave vacío')
+                continue
+            records.append(record)
+        # Un solo TypeAdapter para todo el lote: sin una excepción por fila inválida
+        result = validate_batch(records, PacienteFederadoLanding)
+        result.record_errors(stage, records, context='pac_clave')
+        pacientes = result.valid
+        stage.rows_in = len(df)
+        stage.rows_out = len(pacientes)
+        stage.rows_rejected = stage.rows_in - stage.rows_out
     return pacientes
 
 # --- Eliminación de duplicados ---
 
-def deduplicate(pacientes: List[PacienteFederadoLanding]) -> List[PacienteFederadoLanding]:
-    seen = {}
-    for p in pacientes:
-        key = (p.pac_clave, p.nombrePac, p.apePatPac)
-        if key not in seen:
-            seen[key] = p
+def deduplicate(pacientes: List[PacienteFederadoLanding],
+                metrics: Optional[RunMetrics] = None) -> List[PacienteFederadoLanding]:
+    metrics = metrics or RunMetrics()
+    with metrics.stage('deduplicate') as stage:
+        seen = {}
+        for p in pacientes:
+            key = (p.pac_clave, p.nombrePac, p.apePatPac)
+            if key not in seen:
+                seen[key] = p
+        stage.rows_in = len(pacientes)
+        stage.rows_out = len(seen)
     return list(seen.values())
 
 # --- Funciones públicas para actividades ---
@@ -114,85 +169,125 @@ def actividad2_cargar_siglo21() -> List[PacienteFederadoLanding]:
     pacientes = apply_mapping(df, MAPPING_SIGLO21, 'Siglo21')
     return deduplicate(pacientes)
 
+def actividad2_cargar_siglo21_db(connector: 'SqlConnector', table: str = 'Pacientes',
+                                 metrics: Optional[RunMetrics] = None) -> List[PacienteFederadoLanding]:
+    """
+    Actividad 2 leyendo Siglo21 desde la BD: cada lote se mapea al llegar,
+    así solo se acumulan los pacientes validados y no la tabla completa.
+    """
+    metrics = metrics or RunMetrics()
+    pacientes: List[PacienteFederadoLanding] = []
+    with metrics.stage('actividad2_cargar_siglo21_db') as stage:
+        for batch in load_siglo21_db(connector, table):
+            mapeados = apply_mapping(batch, MAPPING_SIGLO21, 'Siglo21', metrics)
+            stage.rows_in += len(batch)
+            stage.rows_rejected += len(batch) - len(mapeados)
+            pacientes.extend(mapeados)
+        pacientes = deduplicate(pacientes, metrics)
+        stage.rows_out = len(pacientes)
+    return pacientes
+
 def actividad3_agregar_abc(pacientes_existentes: List[PacienteFederadoLanding]) -> List[PacienteFederadoLanding]:
     df = load_abc_json(FUENTES_DIR / 'PacientesHospitalABC.json')
     nuevos = apply_mapping(df, MAPPING_ABC, 'ABC')
     combinados = pacientes_existentes + nuevos
     return deduplicate(combinados)
 
-def actividad4_agregar_medica_sur(p1_path: Path, pacientes_previos: List[PacienteFederadoLanding]) -> List[PacienteFederadoLanding]:
-    """Integra datos del Hospital Medica Sur desde CSV.
-    
+def map_medica_sur(df: pd.DataFrame, metrics: Optional[RunMetrics] = None) -> List[PacienteFederadoLanding]:
+    """Mapea filas de Medica Sur (CSV) a PacienteFederadoLanding.
+
     Mapeo:
     - NoPaciente (num) -> pac_clave
     - NombreCompleto (split) -> nombrePac, apePatPac
     - ubicacion -> direccion
     """
-    medica_sur_path = p1_path / 'PacientesMedicaSurCSV.csv'
-    df = pd.read_csv(medica_sur_path)
-    
+    from ..models.landing.schemas import PacienteFederadoLanding
+    metrics = metrics or RunMetrics()
+    pacientes = []
+    with metrics.stage('apply_mapping:MedicaSur') as stage:
+        for _, row in df.iterrows():
+            try:
+                # Separar nombre completo
+                nombre = normalize_text(row['NombreCompleto'])
+                if nombre is None:
+                    stage.record_error('NombreCompleto vacío')
+                    continue
+                nombre_completo = nombre.split()
+                if len(nombre_completo) < 2:
+                    stage.record_error('NombreCompleto sin apellido')
+                    continue
+                pacientes.append(PacienteFederadoLanding(
+                    pac_clave=extract_nss(row['NoPaciente']),
+                    nombrePac=nombre_completo[0],
+                    apePatPac=nombre_completo[1],
+                    direccion=normalize_text(row['ubicacion']),
+                    HospOrigen='MedicaSur'
+                ))
+            except (KeyError, ValueError) as e:
+                stage.record_error(e)
+                continue
+        stage.rows_in = len(df)
+        stage.rows_out = len(pacientes)
+        stage.rows_rejected = stage.error_count
+    return pacientes
+
+def map_gpo_angeles(df: pd.DataFrame, metrics: Optional[RunMetrics] = None) -> List[PacienteFederadoLanding]:
+    """Mapea filas de Grupo Angeles (Excel) a PacienteFederadoLanding."""
+    from ..models.landing.schemas import PacienteFederadoLanding
+    metrics = metrics or RunMetrics()
+    pacientes = []
+    with metrics.stage('apply_mapping:GpoAngeles') as stage:
+        for _, row in df.iterrows():
+            try:
+                pacientes.append(PacienteFederadoLanding(
+                    pac_clave=extract_nss(str(row['IdPaciente'])),
+                    nombrePac=normalize_text(row['Nombre']),
+                    apePatPac=normalize_text(row['ApellidoPaterno']),
+                    direccion=normalize_text(row['Direccion']),
+                    HospOrigen='GpoAngeles'
+                ))
+            except (KeyError, ValueError) as e:
+                stage.record_error(e)
+                continue
+        stage.rows_in = len(df)
+        stage.rows_out = len(pacientes)
+        stage.rows_rejected = stage.error_count
+    return pacientes
+
+def _agregar_nuevos(pacientes_previos: List[PacienteFederadoLanding],
+                    candidatos: List[PacienteFederadoLanding]) -> List[PacienteFederadoLanding]:
+    """Agrega candidatos cuya clave (pac_clave, nombre, apellido) no exista aún"""
     existentes = {(p.pac_clave, p.nombrePac, p.apePatPac) for p in pacientes_previos}
     nuevos = []
-    
-    for _, row in df.iterrows():
-        try:
-            # Separar nombre completo
-            nombre_completo = normalize_text(row['NombreCompleto']).split()
-            if len(nombre_completo) < 2:
-                continue
-                
-            nombre = nombre_completo[0]
-            apellido = nombre_completo[1]
-            
-            # Extraer número de paciente
-            no_paciente = extract_nss(row['NoPaciente'])
-            
-            pac = PacienteFederadoLanding(
-                pac_clave=no_paciente,
-                nombrePac=nombre,
-                apePatPac=apellido,
-                direccion=normalize_text(row['ubicacion']),
-                HospOrigen='MedicaSur'
-            )
-            
-            key = (pac.pac_clave, pac.nombrePac, pac.apePatPac)
-            if key not in existentes:
-                nuevos.append(pac)
-                existentes.add(key)
-                
-        except (KeyError, ValueError) as e:
-            print(f"Error procesando registro Medica Sur: {e}")
-            continue
-            
+    for pac in candidatos:
+        key = (pac.pac_clave, pac.nombrePac, pac.apePatPac)
+        if key not in existentes:
+            nuevos.append(pac)
+            existentes.add(key)
+    return nuevos
+
+def actividad4_agregar_medica_sur(p1_path: Path, pacientes_previos: List[PacienteFederadoLanding],
+                                  metrics: Optional[RunMetrics] = None) -> List[PacienteFederadoLanding]:
+    """Integra datos del Hospital Medica Sur desde CSV (ver map_medica_sur)."""
+    metrics = metrics or RunMetrics()
+    with metrics.stage('actividad4_agregar_medica_sur') as stage:
+        df = load_medica_sur_csv(p1_path / 'PacientesMedicaSurCSV.csv')
+        nuevos = _agregar_nuevos(pacientes_previos, map_medica_sur(df, metrics))
+        stage.rows_in = len(df)
+        stage.rows_out = len(nuevos)
+        stage.rows_rejected = metrics.get('apply_mapping:MedicaSur').error_count
     return pacientes_previos + nuevos
 
-def actividad5_agregar_gpo_angeles(p1_path: Path, pacientes_previos: List[PacienteFederadoLanding]) -> List[PacienteFederadoLanding]:
+def actividad5_agregar_gpo_angeles(p1_path: Path, pacientes_previos: List[PacienteFederadoLanding],
+                                   metrics: Optional[RunMetrics] = None) -> List[PacienteFederadoLanding]:
     """Integra datos del Hospital Grupo Angeles desde Excel."""
-    angeles_path = p1_path / 'PacientesGpoAngeles-excel.xlsx'
-    df = pd.read_excel(angeles_path)
-    
-    existentes = {(p.pac_clave, p.nombrePac, p.apePatPac) for p in pacientes_previos}
-    nuevos = []
-    
-    for _, row in df.iterrows():
-        try:
-            pac = PacienteFederadoLanding(
-                pac_clave=extract_nss(str(row['IdPaciente'])),
-                nombrePac=normalize_text(row['Nombre']),
-                apePatPac=normalize_text(row['ApellidoPaterno']),
-                direccion=normalize_text(row['Direccion']),
-                HospOrigen='GpoAngeles'
-            )
-            
-            key = (pac.pac_clave, pac.nombrePac, pac.apePatPac)
-            if key not in existentes:
-                nuevos.append(pac)
-                existentes.add(key)
-                
-        except (KeyError, ValueError) as e:
-            print(f"Error procesando registro Grupo Angeles: {e}")
-            continue
-            
+    metrics = metrics or RunMetrics()
+    with metrics.stage('actividad5_agregar_gpo_angeles') as stage:
+        df = load_gpo_angeles_excel(p1_path / 'PacientesGpoAngeles-excel.xlsx')
+        nuevos = _agregar_nuevos(pacientes_previos, map_gpo_angeles(df, metrics))
+        stage.rows_in = len(df)
+        stage.rows_out = len(nuevos)
+        stage.rows_rejected = metrics.get('apply_mapping:GpoAngeles').error_count
     return pacientes_previos + nuevos
 
 def actividad6_estadisticas(pacientes: List[PacienteFederadoLanding]) -> Dict[str, any]:
@@ -220,16 +315,18 @@ def actividad6_estadisticas(pacientes: List[PacienteFederadoLanding]) -> Dict[st
         if not p.direccion:
             stats['campos_vacios']['direccion'] += 1
     
-    # Buscar duplicados entre hospitales
+    # Duplicados entre hospitales: un bitmap de claves por hospital (pac_clave < 10^8)
+    from ..lookup.bitmap import CLAVE_SPACE, HospitalBitmaps
+    en_rango = [p for p in pacientes if isinstance(p.pac_clave, int) and 0 <= p.pac_clave < CLAVE_SPACE]
+    stats['duplicados_entre_hospitales'] = HospitalBitmaps.from_pacientes(en_rango).duplicados_entre_hospitales()
+    
+    # Claves fuera del espacio de 8 dígitos (no pasaron por apply_mapping)
     claves_por_hospital: Dict[int, set] = {}
     for p in pacientes:
-        if p.pac_clave not in claves_por_hospital:
-            claves_por_hospital[p.pac_clave] = set()
-        claves_por_hospital[p.pac_clave].add(p.HospOrigen)
-    
-    # Contar claves que aparecen en más de un hospital
-    stats['duplicados_entre_hospitales'] = sum(1 for hospitales in claves_por_hospital.values() 
-                                             if len(hospitales) > 1)
+        if not (isinstance(p.pac_clave, int) and 0 <= p.pac_clave < CLAVE_SPACE):
+            claves_por_hospital.setdefault(p.pac_clave, set()).add(p.HospOrigen)
+    stats['duplicados_entre_hospitales'] += sum(1 for hospitales in claves_por_hospital.values()
+                                              if len(hospitales) > 1)
     
     return stats
 
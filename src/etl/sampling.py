@@ -0,0 +1,386 @@
+"""
+Sampling mode for fast exploratory runs.
+
+The full pipeline stays the default; these helpers answer "roughly how
+many / what share" questions from a small fraction of the input, with
+standard errors attached to every number:
+
+- ``sample_csv`` reads ``fraction`` of a CSV without scanning it: the file
+  is cut into equal byte segments, and in each one it seeks to a random
+  offset, drops the partial line and reads a block of ``block_rows`` rows.
+  Estimates treat blocks as clusters, so rows that sit together in the file
+  (e.g. sorted by date or state) do not shrink the error bars artificially.
+  Each block stops at the end of its segment, so no row is read twice.
+  ``CsvSample.post_stratified_mean`` weights per-stratum means (e.g. by
+  ``ENTIDAD_RES``) with known stratum sizes.
+- ``ReservoirSample`` / ``StratifiedReservoir`` keep a uniform sample of a
+  stream of unknown length (Algorithm R), overall or per stratum (e.g.
+  ``HospOrigen``). Stratum sizes are counted exactly, so per-stratum
+  estimates are weighted by the true population. They are stream-only: every
+  item still goes through ``add``, so they save the downstream work on the
+  discarded items, not the cost of reading them.
+
+Usage::
+
+    muestra = CovidDataIngester(path).ingest_relational_sample(fraction=0.01)
+    muestra.total_rows                            # Estimate(value=..., stderr=...)
+    muestra.count_by('ENTIDAD_RES')[14]           # casos estimados en Jalisco, ± error
+    muestra.post_stratified_mean('EDAD', by='ENTIDAD_RES', sizes=casos_por_entidad)
+"""
+from __future__ import annotations
+
+import io
+import math
+import random
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import (Any, Callable, Dict, Generic, Hashable, Iterable, List, Mapping, Optional, Tuple, TypeVar,
+                    TYPE_CHECKING)
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+T = TypeVar('T')
+
+Z_95 = 1.959964
+
+
+@dataclass(frozen=True)
+class Estimate:
+    """Valor estimado con su error estándar"""
+    value: float
+    stderr: float
+
+    def ci(self, z: float = Z_95) -> Tuple[float, float]:
+        return (self.value - z * self.stderr, self.value + z * self.stderr)
+
+    def __str__(self) -> str:
+        return f"{self.value:,.4g} ± {Z_95 * self.stderr:,.2g}"
+
+
+# --- Muestreo por bloques con seek sobre CSV ---
+
+def _block_at(f, offset: int, rows: int, end: int) -> bytes:
+    """
+    Filas completas a partir de ``offset`` (se descarta la línea parcial),
+    solo las que empiezan antes de ``end``: una fila pertenece al segmento
+    donde empieza, así un bloque nunca invade el segmento siguiente.
+    """
+    f.seek(max(offset - 1, 0))
+    if offset > 0 and f.read(1) != b'\n':
+        f.readline()
+    lines = []
+    while len(lines) < rows and f.tell() < end:
+        line = f.readline()
+        if not line:
+            break
+        lines.append(line)
+    return b''.join(lines)
+
+
+@dataclass
+class CsvSample:
+    """
+    Bloques leídos de un CSV. ``frame`` trae la columna ``_block`` (id del
+    bloque) para estimar varianzas por conglomerado.
+    """
+    frame: 'pd.DataFrame'
+    file_bytes: int
+    data_bytes: int
+    bytes_read: int
+    blocks: int
+    sampled_bytes: int = 0
+    # Modelos de landing de las filas muestreadas (ingest_relational_sample)
+    casos: List[Any] = field(default_factory=list)
+
+    @property
+    def fraction_read(self) -> float:
+        return self.bytes_read / self.file_bytes if self.file_bytes else 1.0
+
+    @property
+    def total_rows(self) -> Estimate:
+        """Filas del archivo estimadas con bytes por fila de la muestra"""
+        n = self.frame.groupby('_block').size()
+        b = self.frame.groupby('_block')['_bytes'].sum()
+        return _ratio(n.to_numpy(float), b.to_numpy(float), self._sampling_fraction, scale=self.data_bytes)
+
+    @property
+    def _sampling_fraction(self) -> float:
+        return min(1.0, self.sampled_bytes / self.data_bytes) if self.data_bytes else 1.0
+
+    def proportion(self, column: str, where: Optional[Callable[['pd.Series'], 'pd.Series']] = None
+                   ) -> Dict[Hashable, Estimate]:
+        """Proporción de cada valor de ``column`` (o de filas que cumplen ``where``)"""
+        df = self.frame
+        n = df.groupby('_block').size()
+        if where is not None:
+            hits = where(df[column]).groupby(df['_block']).sum().reindex(n.index, fill_value=0)
+            return {True: _ratio(hits.to_numpy(float), n.to_numpy(float), self._sampling_fraction)}
+        counts = df.groupby(['_block', column]).size().unstack(fill_value=0).reindex(n.index, fill_value=0)
+        return {value: _ratio(counts[value].to_numpy(float), n.to_numpy(float), self._sampling_fraction)
+                for value in counts.columns}
+
+    def count_by(self, column: str) -> Dict[Hashable, Estimate]:
+        """Conteos por valor de ``column`` en todo el archivo: filas estimadas x proporción"""
+        total = self.total_rows
+        result = {}
+        for value, p in self.proportion(column).items():
+            # Var(N p) ~ N² Var(p) + p² Var(N)
+            stderr = math.sqrt((total.value * p.stderr) ** 2 + (p.value * total.stderr) ** 2)
+            result[value] = Estimate(total.value * p.value, stderr)
+        return result
+
+    def mean(self, column: str) -> Estimate:
+        """Media de una columna numérica (valores no numéricos se ignoran)"""
+        import pandas as pd
+        values = pd.to_numeric(self.frame[column], errors='coerce')
+        ok = values.notna()
+        sums = values.where(ok, 0).groupby(self.frame['_block']).sum()
+        counts = ok.groupby(self.frame['_block']).sum()
+        return _ratio(sums.to_numpy(float), counts.to_numpy(float), self._sampling_fraction)
+
+    def post_stratified_mean(self, column: str, by: str, sizes: Mapping[Hashable, float],
+                             where: Optional[Callable[['pd.Series'], 'pd.Series']] = None) -> Estimate:
+        """
+        Media de ``column`` (o proporción de filas que cumplen ``where``)
+        post-estratificada por ``by``: la media de cada estrato pesa según su
+        tamaño conocido ``sizes`` (p. ej. casos por ENTIDAD_RES de la última
+        corrida completa), no según cuántas filas cayeron en la muestra.
+        Estratos sin filas muestreadas o sin tamaño se omiten y los pesos se
+        renormalizan.
+        """
+        import pandas as pd
+        df = self.frame
+        if where is not None:
+            values = where(df[column]).astype(float)
+        else:
+            values = pd.to_numeric(df[column], errors='coerce')
+        ok = values.notna()
+        blocks = df.groupby('_block').size().index
+        keys = [df['_block'], df[by]]
+        y = values.where(ok, 0).groupby(keys).sum().unstack(fill_value=0).reindex(blocks, fill_value=0)
+        x = ok.groupby(keys).sum().unstack(fill_value=0).reindex(blocks, fill_value=0)
+        strata = [h for h in x.columns if x[h].sum() > 0 and sizes.get(h, 0) > 0]
+        if not strata:
+            return Estimate(float('nan'), float('nan'))
+        weights = np.array([sizes[h] for h in strata], dtype=float)
+        weights /= weights.sum()
+        y, x = y[strata].to_numpy(float), x[strata].to_numpy(float)
+        totals = x.sum(axis=0)
+        means = y.sum(axis=0) / totals
+        value = float(weights @ means)
+        m, f = len(blocks), self._sampling_fraction
+        if f >= 1:
+            return Estimate(value, 0.0)
+        if m < 2:
+            return Estimate(value, float('nan'))
+        # Linealización: aporte de cada bloque a la suma ponderada de razones por
+        # estrato, con corrección k/(k-1) según los bloques k que tocan cada
+        # estrato. Los estratos vistos en un solo bloque (residuo siempre 0)
+        # se agrupan y sus residuos se toman contra la media del grupo
+        present = x > 0
+        centers, k = means.copy(), present.sum(axis=0).astype(float)
+        single = k < 2
+        if single.any():
+            blocks_in_group = int(present[:, single].any(axis=1).sum())
+            if blocks_in_group >= 2:
+                centers[single] = y[:, single].sum() / totals[single].sum()
+                k[single] = blocks_in_group
+            else:  # el grupo cabe en un bloque: contra la media global
+                centers[single] = y.sum() / totals.sum()
+                k[single] = m
+        scale = np.sqrt(k / (k - 1))
+        z = ((y - centers * x) / totals) @ (weights * scale)
+        var = (1 - f) * (z ** 2).sum()
+        return Estimate(value, math.sqrt(max(var, 0.0)))
+
+
+def _ratio(y: np.ndarray, x: np.ndarray, f: float = 0.0, scale: float = 1.0) -> Estimate:
+    """
+    Estimador de razón sum(y)/sum(x) sobre conglomerados, con varianza
+    linealizada y corrección por población finita (1 - f).
+    """
+    m = len(y)
+    if m == 0 or x.sum() == 0:
+        return Estimate(float('nan'), float('nan'))
+    r = y.sum() / x.sum()
+    if f >= 1:
+        return Estimate(r * scale, 0.0)
+    if m < 2:
+        return Estimate(r * scale, float('nan'))
+    resid = y - r * x
+    var = (1 - f) * m / (m - 1) * (resid ** 2).sum() / x.sum() ** 2
+    return Estimate(r * scale, math.sqrt(max(var, 0.0)) * scale)
+
+
+def sample_csv(path: Path, fraction: float = 0.01, block_rows: int = 64, seed: Optional[int] = None,
+               **read_csv_kwargs) -> CsvSample:
+    """
+    Lee ~``fraction`` de las filas de ``path`` en bloques de ``block_rows``.
+
+    Supone un registro por línea (sin saltos de línea dentro de campos
+    entrecomillados), como COVID19MEXICO.csv. Con ``fraction >= 1`` lee todo.
+    """
+    import pandas as pd
+    if not 0 < fraction:
+        raise ValueError("fraction must be > 0")
+    rng = np.random.default_rng(seed)
+    path = Path(path)
+    size = path.stat().st_size
+    with open(path, 'rb') as f:
+        header = f.readline()
+        start = f.tell()
+        data_bytes = size - start
+        probe = f.read(64 * 1024)
+        lines_in_probe = max(1, probe.count(b'\n'))
+        row_bytes = len(probe) / lines_in_probe if probe else 1.0
+        est_rows = data_bytes / row_bytes
+        n_blocks = max(1, math.ceil(fraction * est_rows / block_rows))
+        segment = data_bytes / n_blocks
+        if fraction >= 1 or segment <= block_rows * row_bytes:
+            # La muestra cubriría el archivo: leerlo completo es más barato
+            f.seek(start)
+            chunks = [(0, f.read())]
+        else:
+            chunks = []
+            for i in range(n_blocks):
+                offset = start + int(i * segment + rng.random() * (segment - block_rows * row_bytes))
+                end = start + int((i + 1) * segment) if i + 1 < n_blocks else size
+                chunks.append((i, _block_at(f, offset, block_rows, end)))
+    frames, sampled = [], 0
+    for block, body in chunks:
+        if not body:
+            continue
+        lines = [line for line in body.splitlines(keepends=True) if line.strip()]
+        df = pd.read_csv(io.BytesIO(header + body), **read_csv_kwargs)
+        if len(df) != len(lines):
+            raise ValueError(f"{path}: multi-line records are not supported by sample_csv")
+        df['_block'] = block
+        df['_bytes'] = [len(line) for line in lines]
+        sampled += len(body)
+        frames.append(df)
+    frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['_block', '_bytes'])
+    return CsvSample(frame=frame, file_bytes=size, data_bytes=data_bytes,
+                     bytes_read=len(header) + min(len(probe), data_bytes) + sampled,
+                     blocks=len(frames), sampled_bytes=sampled)
+
+
+# --- Reservorios sobre flujos ---
+
+class ReservoirSample(Generic[T]):
+    """Muestra uniforme de ``k`` elementos de un flujo de longitud desconocida (Algorithm R)"""
+
+    def __init__(self, k: int, seed: Optional[int] = None):
+        if k < 1:
+            raise ValueError("k must be >= 1")
+        self.k = k
+        self.seen = 0
+        self.items: List[T] = []
+        self._rng = random.Random(seed)
+
+    def add(self, item: T) -> None:
+        self.seen += 1
+        if len(self.items) < self.k:
+            self.items.append(item)
+        else:
+            j = self._rng.randrange(self.seen)
+            if j < self.k:
+                self.items[j] = item
+
+    def extend(self, items: Iterable[T]) -> 'ReservoirSample[T]':
+        for item in items:
+            self.add(item)
+        return self
+
+    def proportion(self, predicate: Callable[[T], bool]) -> Estimate:
+        """Proporción en el flujo completo (muestreo sin reemplazo)"""
+        n, N = len(self.items), self.seen
+        if n == 0:
+            return Estimate(float('nan'), float('nan'))
+        p = sum(1 for item in self.items if predicate(item)) / n
+        fpc = (N - n) / (N - 1) if N > 1 else 0.0
+        return Estimate(p, math.sqrt(p * (1 - p) / n * fpc) if n > 1 else float('nan'))
+
+
+class StratifiedReservoir(Generic[T]):
+    """
+    Un reservorio de ``k`` elementos por estrato. Los tamaños de cada estrato
+    se cuentan exactamente, así que los totales estimados se ponderan por la
+    población real de cada estrato.
+    """
+
+    def __init__(self, k: int, key: Callable[[T], Hashable], seed: Optional[int] = None):
+        self.k = k
+        self.key = key
+        self.strata: Dict[Hashable, ReservoirSample[T]] = {}
+        # Semillas por estrato derivadas en orden de aparición (hash() de str varía entre procesos)
+        self._seeds = random.Random(seed) if seed is not None else None
+
+    def add(self, item: T) -> None:
+        stratum = self.key(item)
+        reservoir = self.strata.get(stratum)
+        if reservoir is None:
+            seed = self._seeds.getrandbits(32) if self._seeds is not None else None
+            reservoir = self.strata[stratum] = ReservoirSample(self.k, seed)
+        reservoir.add(item)
+
+    def extend(self, items: Iterable[T]) -> 'StratifiedReservoir[T]':
+        for item in items:
+            self.add(item)
+        return self
+
+    @property
+    def seen(self) -> int:
+        return sum(r.seen for r in self.strata.values())
+
+    @property
+    def items(self) -> List[T]:
+        return [item for r in self.strata.values() for item in r.items]
+
+    def sizes(self) -> Dict[Hashable, int]:
+        return {stratum: r.seen for stratum, r in self.strata.items()}
+
+    def total(self, predicate: Callable[[T], bool]) -> Estimate:
+        """Elementos del flujo completo que cumplen ``predicate``: sum_h N_h p_h"""
+        value = var = 0.0
+        for reservoir in self.strata.values():
+            p = reservoir.proportion(predicate)
+            value += reservoir.seen * p.value
+            if len(reservoir.items) < reservoir.seen:
+                var += (reservoir.seen * p.stderr) ** 2
+        return Estimate(value, math.sqrt(var))
+
+    def proportion(self, predicate: Callable[[T], bool]) -> Estimate:
+        total = self.total(predicate)
+        return Estimate(total.value / self.seen, total.stderr / self.seen) if self.seen else total
+
+
+@dataclass
+class EstadisticasMuestra:
+    """actividad6_estadisticas estimadas desde una muestra estratificada por hospital"""
+    total_pacientes: int
+    por_hospital: Dict[str, int]
+    campos_vacios: Dict[str, Estimate] = field(default_factory=dict)
+    muestra: int = 0
+
+
+def estadisticas_muestra(pacientes: Iterable[Any], k: int = 1000,
+                         seed: Optional[int] = None) -> EstadisticasMuestra:
+    """
+    Versión muestreada de actividad6_estadisticas (``k`` pacientes por
+    hospital). Totales por hospital exactos; campos vacíos con error estándar.
+    duplicados_entre_hospitales requiere todas las claves y no se estima.
+
+    Solo muestrea el flujo: ``pacientes`` se recorre completo (para contar
+    cada hospital), así que no ahorra lectura; para eso, ``sample_csv``.
+    """
+    muestra = StratifiedReservoir(k, key=lambda p: p.HospOrigen, seed=seed).extend(pacientes)
+    return EstadisticasMuestra(
+        total_pacientes=muestra.seen,
+        por_hospital=muestra.sizes(),
+        campos_vacios={name: muestra.total(lambda p, name=name: not getattr(p, name))
+                       for name in ('nombrePac', 'apePatPac', 'direccion')},
+        muestra=len(muestra.items),
+    )
@@ -0,0 +1,299 @@
+"""
+Streaming ingestion and keyword indexing for clinical text corpora.
+
+``ingest_text_data`` reads a single descriptor file whole. ``TextCorpus``
+handles a directory of thousands of files:
+
+- each file is read line by line in a worker process (``workers`` > 1) and
+  reduced to term counts plus entity mentions, so memory per file is one line
+- the state entity is detected with a ``Gazetteer``, an Aho-Corasick
+  automaton compiled once from the ENTIDADES catalog (plus common aliases),
+  so a line is scanned once no matter how many names are in it
+- document frequencies are updated incrementally as files arrive; keywords
+  and search scores use TF-IDF against the corpus seen so far
+- an inverted index (term -> postings of (doc, tf)) answers keyword queries
+
+Usage::
+
+    corpus = TextCorpus()
+    casos = corpus.ingest_directory(Path('data/Text'), workers=4)
+    corpus.search('neumonia intubado')
+"""
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING
+
+from .metrics import RunMetrics
+from .patients_integration import normalize_text
+
+if TYPE_CHECKING:
+    from ..models.landing.schemas import TextoCasoLanding
+
+DEFAULT_ENTIDAD = 'Nacional'
+
+# Alias frecuentes -> nombre del catálogo. "MEXICO" solo no se incluye: en
+# texto libre casi siempre es el país, no el Estado de México.
+ENTIDAD_ALIASES = {
+    'CDMX': 'CIUDAD DE MÉXICO',
+    'DISTRITO FEDERAL': 'CIUDAD DE MÉXICO',
+    'ESTADO DE MEXICO': 'MÉXICO',
+    'EDOMEX': 'MÉXICO',
+    'COAHUILA': 'COAHUILA DE ZARAGOZA',
+    'MICHOACAN': 'MICHOACÁN DE OCAMPO',
+    'VERACRUZ': 'VERACRUZ DE IGNACIO DE LA LLAVE',
+}
+
+STOPWORDS = frozenset("""
+    DEL LAS LOS POR PARA CON UNA UNO QUE SON COMO MAS SUS ESTE ESTA ESTOS ESTAS ENTRE
+    CUANDO SOBRE SIN HAY FUE SER HAN DESDE HASTA TODO TODOS TAMBIEN PERO SUS NOS LES
+    CADA DONDE ESO ESA ESE OTRO OTRA OTROS OTRAS MUY YA SOLO AL EL LA LO EN DE Y
+    THE AND FOR WITH FROM THAT THIS ARE WAS WERE HAS HAVE NOT
+""".split())
+
+_TOKEN = re.compile(r'[A-Z0-9]+')
+
+
+class Gazetteer:
+    """
+    Aho-Corasick automaton over normalized place names.
+
+    ``find`` returns the labels of non-overlapping, whole-word matches,
+    preferring the longest name ("BAJA CALIFORNIA SUR" over "BAJA CALIFORNIA").
+    """
+
+    def __init__(self, names: Dict[str, str]):
+        # names: patrón (se normaliza) -> etiqueta
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, str]]] = [[]]
+        for pattern, label in names.items():
+            self._insert(normalize_text(pattern), label)
+        self._build()
+
+    @classmethod
+    def from_catalog(cls, catalogs: Optional[Dict[str, Dict[int, str]]] = None) -> 'Gazetteer':
+        """Entidades 1-32 del catálogo oficial más ENTIDAD_ALIASES"""
+        from ..models.landing.columnar import load_catalogs
+        entidades = (catalogs or load_catalogs())['ENTIDADES']
+        names = {label: label for code, label in entidades.items() if 1 <= code <= 32}
+        names.pop('MÉXICO', None)
+        names.update(ENTIDAD_ALIASES)
+        return cls(names)
+
+    def _insert(self, pattern: str, label: str) -> None:
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(pattern), label))
+
+    def _build(self) -> None:
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> List[str]:
+        """Etiquetas encontradas en ``text`` (ya normalizado con normalize_text)"""
+        matches = []
+        state = 0
+        for end, ch in enumerate(text, 1):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for length, label in self._out[state]:
+                start = end - length
+                if (start == 0 or not text[start - 1].isalnum()) and \
+                        (end == len(text) or not text[end].isalnum()):
+                    matches.append((start, end, label))
+        # Conservar la coincidencia más larga entre las que se traslapan
+        matches.sort(key=lambda m: (m[0], -(m[1] - m[0])))
+        result, last_end = [], -1
+        for start, end, label in matches:
+            if start >= last_end:
+                result.append(label)
+                last_end = end
+        return result
+
+
+@dataclass
+class FileScan:
+    """Resumen de un archivo, calculado en el proceso trabajador"""
+    source_file: str
+    term_counts: Counter
+    n_terms: int
+    entidades: Counter
+    lines: int
+    preview: str
+
+
+# --- trabajador (estado por proceso, inicializado una vez) ---
+
+_WORKER: Dict[str, object] = {}
+
+
+def _init_worker(gazetteer: Gazetteer, stopwords: frozenset, min_len: int, preview_chars: int) -> None:
+    _WORKER.update(gazetteer=gazetteer, stopwords=stopwords, min_len=min_len, preview_chars=preview_chars)
+
+
+def tokenize(line: str, stopwords: frozenset = STOPWORDS, min_len: int = 3) -> List[str]:
+    """Términos de una línea ya normalizada (mayúsculas, sin acentos)"""
+    return [t for t in _TOKEN.findall(line)
+            if len(t) >= min_len and not t.isdigit() and t not in stopwords]
+
+
+def scan_file(path: Path, root: Optional[Path] = None) -> FileScan:
+    """Lee un archivo línea por línea; nunca lo carga completo"""
+    gazetteer = _WORKER['gazetteer']
+    stopwords, min_len = _WORKER['stopwords'], _WORKER['min_len']
+    preview_chars = _WORKER['preview_chars']
+    terms: Counter = Counter()
+    entidades: Counter = Counter()
+    preview: List[str] = []
+    kept = lines = 0
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for raw in f:
+            lines += 1
+            if kept < preview_chars:
+                preview.append(raw[:preview_chars - kept])
+                kept += len(preview[-1])
+            line = normalize_text(raw)
+            if not line:
+                continue
+            terms.update(tokenize(line, stopwords, min_len))
+            entidades.update(gazetteer.find(line))
+    name = str(path.relative_to(root)) if root else path.name
+    return FileScan(name, terms, sum(terms.values()), entidades, lines, ''.join(preview))
+
+
+class TextCorpus:
+    """Frecuencias de documento incrementales + índice invertido sobre los archivos ingeridos"""
+
+    def __init__(self, gazetteer: Optional[Gazetteer] = None, stopwords: Iterable[str] = STOPWORDS,
+                 min_len: int = 3, preview_chars: int = 10_000):
+        self.gazetteer = gazetteer or Gazetteer.from_catalog()
+        self.stopwords = frozenset(stopwords)
+        self.min_len = min_len
+        self.preview_chars = preview_chars
+        self.docs: List[FileScan] = []
+        self._doc_ids: Dict[str, int] = {}
+        self.doc_freq: Counter = Counter()
+        # término -> [(doc_id, tf)]
+        self.postings: Dict[str, List[Tuple[int, float]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def add(self, scan: FileScan) -> int:
+        """Agrega (o reemplaza) un documento y actualiza df e índice"""
+        if scan.source_file in self._doc_ids:
+            self._remove(self._doc_ids[scan.source_file])
+        doc_id = len(self.docs)
+        self.docs.append(scan)
+        self._doc_ids[scan.source_file] = doc_id
+        for term, count in scan.term_counts.items():
+            self.doc_freq[term] += 1
+            self.postings.setdefault(term, []).append((doc_id, count / scan.n_terms))
+        return doc_id
+
+    def _remove(self, doc_id: int) -> None:
+        old = self.docs[doc_id]
+        for term in old.term_counts:
+            self.doc_freq[term] -= 1
+            self.postings[term] = [p for p in self.postings[term] if p[0] != doc_id]
+        self.docs[doc_id] = FileScan(old.source_file, Counter(), 0, Counter(), 0, '')
+        del self._doc_ids[old.source_file]
+
+    def idf(self, term: str) -> float:
+        """IDF suavizado: log((1 + N) / (1 + df)) + 1"""
+        return math.log((1 + len(self._doc_ids)) / (1 + self.doc_freq.get(term, 0))) + 1
+
+    def keywords(self, source_file: str, k: int = 10) -> List[str]:
+        scan = self.docs[self._doc_ids[source_file]]
+        if not scan.n_terms:
+            return []
+        scores = {t: c / scan.n_terms * self.idf(t) for t, c in scan.term_counts.items()}
+        return [t for t, _ in sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]]
+
+    def entidad(self, source_file: str) -> str:
+        """Entidad más mencionada en el archivo, o 'Nacional' si no menciona ninguna"""
+        entidades = self.docs[self._doc_ids[source_file]].entidades
+        if not entidades:
+            return DEFAULT_ENTIDAD
+        return max(sorted(entidades), key=entidades.__getitem__)
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """Documentos ordenados por suma de TF-IDF de los términos de la consulta"""
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(normalize_text(query) or '', self.stopwords, self.min_len)):
+            idf = self.idf(term)
+            for doc_id, tf in self.postings.get(term, ()):
+                scores[doc_id] = scores.get(doc_id, 0.0) + tf * idf
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [(self.docs[d].source_file, round(s, 6)) for d, s in ranked]
+
+    def ingest_directory(self, directory: Path, pattern: str = '**/*.txt', workers: int = 1,
+                         keywords: int = 10, metrics: Optional[RunMetrics] = None) -> List[TextoCasoLanding]:
+        """
+        Procesa todos los archivos de ``directory`` y devuelve un TextoCasoLanding
+        por archivo. ``texto_completo`` guarda las primeras ``preview_chars``
+        letras; las keywords usan el df de todo el corpus acumulado.
+        """
+        from ..models.landing.schemas import TextoCasoLanding
+        directory = Path(directory)
+        metrics = metrics or RunMetrics()
+        with metrics.stage('ingest_text_corpus') as stage:
+            paths = sorted(p for p in directory.glob(pattern) if p.is_file())
+            stage.rows_in = len(paths)
+            initargs = (self.gazetteer, self.stopwords, self.min_len, self.preview_chars)
+            # Cada archivo entra al índice en cuanto llega su FileScan; no se
+            # retiene la lista completa de escaneos antes de agregarlos
+            nombres = []
+            if workers > 1 and len(paths) > 1:
+                with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=initargs) as pool:
+                    chunksize = max(1, len(paths) // (workers * 4))
+                    for scan in pool.map(scan_file, paths, [directory] * len(paths), chunksize=chunksize):
+                        self.add(scan)
+                        nombres.append(scan.source_file)
+            else:
+                _init_worker(*initargs)
+                for path in paths:
+                    scan = scan_file(path, directory)
+                    self.add(scan)
+                    nombres.append(scan.source_file)
+
+            # Segunda pasada: las keywords necesitan el df final del corpus
+            hoy = datetime.now().date()
+            casos = []
+            for nombre in nombres:
+                try:
+                    casos.append(TextoCasoLanding(
+                        texto_completo=self.docs[self._doc_ids[nombre]].preview,
+                        fecha_extraccion=hoy,
+                        entidad=self.entidad(nombre),
+                        keywords=self.keywords(nombre, keywords),
+                        source_file=nombre,
+                    ))
+                except ValueError as e:
+                    stage.record_error(e, context=nombre)
+            stage.rows_out = len(casos)
+            stage.rows_rejected = stage.rows_in - stage.rows_out
+        return casos
@@ -0,0 +1,3 @@
+"""
+Lookup services over federated patients
+"""
@@ -0,0 +1,206 @@
+"""
+Bitmaps over the ``pac_clave`` space for membership tests.
+
+``apply_mapping`` truncates NSS to 8 digits, so every ``pac_clave`` lies in
+``[0, 10**8)``. ``ClaveBitmap`` keeps one bit per possible key, which is 12.5 MB
+for the whole space:
+
+- ``contains`` is a single byte lookup, so no patient list needs to be loaded
+- files are plain bit arrays opened with ``np.memmap``; read-only opens in
+  several processes share the same page-cache pages
+- counts and cross-hospital intersections are vectorized AND/OR plus
+  popcount over chunks
+
+``HospitalBitmaps`` keeps one bitmap per ``HospOrigen`` in a directory
+(``<hospital>.bits``), which answers "which hospitals know this key" and
+"how many keys are shared between hospitals" (the ``duplicados_entre_hospitales``
+statistic of actividad6_estadisticas).
+
+Usage::
+
+    bitmaps = HospitalBitmaps.build(pacientes, Path('federacion.bits'))
+    # en cualquier proceso, sin cargar pacientes:
+    bitmaps = HospitalBitmaps.open(Path('federacion.bits'))
+    bitmaps.contains(12345678)
+    bitmaps.duplicados_entre_hospitales()
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+
+CLAVE_SPACE = 10 ** 8
+_CHUNK = 1 << 20  # bytes por paso en conteos e intersecciones
+
+if hasattr(np, 'bitwise_count'):
+    def _popcount(a: np.ndarray) -> int:
+        return int(np.bitwise_count(a).sum(dtype=np.int64))
+else:  # numpy < 2.0
+    _POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def _popcount(a: np.ndarray) -> int:
+        return int(_POPCOUNT[a].sum(dtype=np.int64))
+
+
+class ClaveBitmap:
+    """Un bit por clave en ``[0, capacity)``; en memoria o mapeado desde archivo"""
+
+    def __init__(self, bits: np.ndarray, capacity: int):
+        self.bits = bits
+        self.capacity = capacity
+
+    @classmethod
+    def empty(cls, capacity: int = CLAVE_SPACE) -> 'ClaveBitmap':
+        # np.zeros reserva páginas en cero de forma perezosa: solo cuesta lo que se toca
+        return cls(np.zeros((capacity + 7) // 8, dtype=np.uint8), capacity)
+
+    @classmethod
+    def create(cls, path: Union[str, Path], capacity: int = CLAVE_SPACE) -> 'ClaveBitmap':
+        """Archivo nuevo (disperso) abierto para escritura"""
+        size = (capacity + 7) // 8
+        with open(path, 'wb') as f:
+            f.truncate(size)
+        return cls(np.memmap(path, dtype=np.uint8, mode='r+', shape=(size,)), capacity)
+
+    @classmethod
+    def open(cls, path: Union[str, Path], writable: bool = False) -> 'ClaveBitmap':
+        bits = np.memmap(path, dtype=np.uint8, mode='r+' if writable else 'r')
+        return cls(bits, len(bits) * 8)
+
+    def flush(self) -> None:
+        if isinstance(self.bits, np.memmap):
+            self.bits.flush()
+
+    def _check(self, claves: np.ndarray) -> np.ndarray:
+        claves = np.asarray(claves, dtype=np.int64)
+        if claves.size and (claves.min() < 0 or claves.max() >= self.capacity):
+            raise ValueError(f"pac_clave out of range [0, {self.capacity})")
+        return claves
+
+    def add(self, claves: Union[int, Iterable[int], np.ndarray]) -> None:
+        if not isinstance(claves, np.ndarray):
+            claves = [claves] if isinstance(claves, (int, np.integer)) else list(claves)
+        claves = self._check(claves)
+        # ufunc.at no comprueba el flag de escritura: sobre un memmap 'r' termina en segfault
+        if not self.bits.flags.writeable:
+            raise ValueError("bitmap opened read-only")
+        np.bitwise_or.at(self.bits, claves >> 3, (1 << (claves & 7)).astype(np.uint8))
+
+    def __contains__(self, clave: int) -> bool:
+        return self.contains(clave)
+
+    def contains(self, clave: int) -> bool:
+        clave = int(clave)
+        if not 0 <= clave < self.capacity:
+            return False
+        return bool(self.bits[clave >> 3] & (1 << (clave & 7)))
+
+    def contains_many(self, claves: np.ndarray) -> np.ndarray:
+        """Vector booleano de pertenencia; fuera de rango -> False"""
+        claves = np.asarray(claves, dtype=np.int64)
+        ok = (claves >= 0) & (claves < self.capacity)
+        result = np.zeros(claves.shape, dtype=bool)
+        c = claves[ok]
+        result[ok] = (self.bits[c >> 3] >> (c & 7).astype(np.uint8)) & 1 == 1
+        return result
+
+    def _chunks(self) -> Iterator[slice]:
+        for start in range(0, len(self.bits), _CHUNK):
+            yield slice(start, start + _CHUNK)
+
+    def __len__(self) -> int:
+        return sum(_popcount(self.bits[s]) for s in self._chunks())
+
+    def intersection_count(self, other: 'ClaveBitmap') -> int:
+        n = min(len(self.bits), len(other.bits))
+        return sum(_popcount(self.bits[s] & other.bits[s])
+                   for s in (slice(i, min(i + _CHUNK, n)) for i in range(0, n, _CHUNK)))
+
+    def to_array(self) -> np.ndarray:
+        """Claves presentes, ordenadas"""
+        return np.flatnonzero(np.unpackbits(self.bits, bitorder='little')).astype(np.int64)
+
+
+def _file_name(hospital: str) -> str:
+    return ''.join(c if c.isalnum() or c in '-_' else '_' for c in hospital) + '.bits'
+
+
+class HospitalBitmaps:
+    """Un ClaveBitmap por hospital de origen"""
+
+    def __init__(self, bitmaps: Dict[str, ClaveBitmap]):
+        self.bitmaps = bitmaps
+
+    @classmethod
+    def from_pacientes(cls, pacientes: Iterable[Any], capacity: Optional[int] = None,
+                       directory: Optional[Path] = None) -> 'HospitalBitmaps':
+        """
+        Construye los bitmaps en memoria, o en ``directory`` si se indica.
+        Sin ``capacity`` y en memoria, el tamaño se ajusta a la clave máxima.
+        """
+        por_hospital: Dict[str, List[int]] = {}
+        for p in pacientes:
+            por_hospital.setdefault(p.HospOrigen, []).append(p.pac_clave)
+        arrays = {h: np.asarray(c, dtype=np.int64) for h, c in por_hospital.items()}
+        if capacity is None:
+            capacity = CLAVE_SPACE if directory is not None else \
+                int(max((a.max() for a in arrays.values() if a.size), default=-1)) + 1
+        bitmaps = {}
+        for hospital, claves in arrays.items():
+            if directory is not None:
+                Path(directory).mkdir(parents=True, exist_ok=True)
+                bitmap = ClaveBitmap.create(Path(directory) / _file_name(hospital), capacity)
+            else:
+                bitmap = ClaveBitmap.empty(capacity)
+            bitmap.add(claves)
+            bitmap.flush()
+            bitmaps[hospital] = bitmap
+        return cls(bitmaps)
+
+    @classmethod
+    def build(cls, pacientes: Iterable[Any], directory: Path) -> 'HospitalBitmaps':
+        return cls.from_pacientes(pacientes, directory=directory)
+
+    @classmethod
+    def open(cls, directory: Path) -> 'HospitalBitmaps':
+        """Abre en solo lectura; los nombres de hospital salen del nombre de archivo"""
+        return cls({path.stem: ClaveBitmap.open(path) for path in sorted(Path(directory).glob('*.bits'))})
+
+    def contains(self, clave: int, hospital: Optional[str] = None) -> bool:
+        if hospital is not None:
+            bitmap = self.bitmaps.get(hospital)
+            return bitmap is not None and bitmap.contains(clave)
+        return any(b.contains(clave) for b in self.bitmaps.values())
+
+    def hospitals_of(self, clave: int) -> List[str]:
+        return [h for h, b in self.bitmaps.items() if b.contains(clave)]
+
+    def counts(self) -> Dict[str, int]:
+        """Claves distintas por hospital"""
+        return {h: len(b) for h, b in self.bitmaps.items()}
+
+    def intersection_counts(self) -> Dict[tuple, int]:
+        """Claves compartidas por cada par de hospitales"""
+        hospitales = list(self.bitmaps)
+        return {(a, b): self.bitmaps[a].intersection_count(self.bitmaps[b])
+                for i, a in enumerate(hospitales) for b in hospitales[i + 1:]}
+
+    def duplicados_entre_hospitales(self) -> int:
+        """Claves presentes en más de un hospital (OR/AND por bloques, sin sets)"""
+        bitmaps = list(self.bitmaps.values())
+        if len(bitmaps) < 2:
+            return 0
+        size = max(len(b.bits) for b in bitmaps)
+        total = 0
+        for start in range(0, size, _CHUNK):
+            stop = min(start + _CHUNK, size)
+            una = np.zeros(stop - start, dtype=np.uint8)
+            dos = np.zeros(stop - start, dtype=np.uint8)
+            for b in bitmaps:
+                chunk = b.bits[start:min(stop, len(b.bits))]
+                dos[:len(chunk)] |= una[:len(chunk)] & chunk
+                una[:len(chunk)] |= chunk
+            total += _popcount(dos)
+        return total
@@ -0,0 +1,241 @@
+"""
+Persistent lookup index over federated patients.
+
+Answers "is this patient already federated?" without re-running the
+actividad* functions:
+
+- exact lookup on ``pac_clave`` (sorted int64 array + ``searchsorted``)
+- prefix lookup on normalized ``nombrePac`` / ``apePatPac`` (sorted string
+  arrays; a prefix is a contiguous ``searchsorted`` range)
+- fuzzy name search via a trigram inverted index over the distinct full
+  names (many patients share a name), ranked by Dice similarity
+
+New hospital batches go to a small in-memory delta segment that every query
+also consults. ``compact`` (automatic once the delta exceeds
+``compact_threshold``) merges the delta into the sorted base arrays, the
+same way an LSM tree does. ``save`` / ``load`` persist the index with pickle.
+"""
+from __future__ import annotations
+
+import bisect
+import pickle
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from ..etl.patients_integration import normalize_text
+
+PREFIX_FIELDS = ('nombrePac', 'apePatPac')
+_PREFIX_END = '\U0010ffff'
+
+
+def trigrams(text: Optional[str]) -> set:
+    """Trigramas de un nombre normalizado, con relleno para capturar inicio y fin"""
+    if not text:
+        return set()
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _full_name(nombre: Optional[str], apellido: Optional[str]) -> str:
+    return normalize_text(' '.join(p for p in (nombre, apellido) if p)) or ''
+
+
+def _merge_sorted(keys: np.ndarray, rows: np.ndarray, new_keys: np.ndarray,
+                  new_rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Intercala un tramo ordenado en el segmento base sin reordenarlo completo;
+    con claves iguales, las filas nuevas (siempre mayores) quedan al final.
+    """
+    if not len(new_keys):
+        return keys, rows
+    keys = keys.astype(np.result_type(keys, new_keys), copy=False)
+    at = np.searchsorted(keys, new_keys, 'right')
+    return np.insert(keys, at, new_keys), np.insert(rows, at, new_rows.astype(np.int64))
+
+
+class PatientIndex:
+    """
+    Usage::
+
+        index = PatientIndex()
+        index.add(actividad5_agregar_gpo_angeles(p1, pacientes))
+        index.by_clave(12345678)
+        index.prefix('GARC', field='apePatPac')
+        index.fuzzy('JOSE GRACIA')
+        index.save('pacientes.idx')
+    """
+
+    def __init__(self, compact_threshold: int = 100_000, max_postings: int = 200_000):
+        self.compact_threshold = compact_threshold
+        self.max_postings = max_postings
+        # Registros (id de fila = posición)
+        self.claves: List[int] = []
+        self.nombres: List[Optional[str]] = []
+        self.apellidos: List[Optional[str]] = []
+        self.hospitales: List[str] = []
+        self._keys: set = set()
+        # Segmento base (ordenado, inmutable hasta compact)
+        self._clave_keys = np.empty(0, dtype=np.int64)
+        self._clave_rows = np.empty(0, dtype=np.int64)
+        self._prefix_keys: Dict[str, np.ndarray] = {f: np.empty(0, dtype=str) for f in PREFIX_FIELDS}
+        self._prefix_rows: Dict[str, np.ndarray] = {f: np.empty(0, dtype=np.int64) for f in PREFIX_FIELDS}
+        self._postings: Dict[str, np.ndarray] = {}
+        # Vocabulario de nombres completos: texto -> id; por id, #trigramas y filas
+        self._name_ids: Dict[str, int] = {}
+        self._name_grams: List[int] = []
+        self._name_rows: List[List[int]] = []
+        # Segmento delta (lotes recientes)
+        self._delta_start = 0
+        self._delta_claves: Dict[int, List[int]] = {}
+        self._delta_prefix: Dict[str, List[Tuple[str, int]]] = {f: [] for f in PREFIX_FIELDS}
+        self._delta_postings: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.claves)
+
+    # --- actualización ---
+
+    def add(self, pacientes: Iterable[Any]) -> int:
+        """Agrega un lote de PacienteFederadoLanding; ignora claves ya indexadas"""
+        added = 0
+        for p in pacientes:
+            key = (p.pac_clave, p.nombrePac, p.apePatPac)
+            if key in self._keys:
+                continue
+            self._keys.add(key)
+            row = len(self.claves)
+            self.claves.append(int(p.pac_clave))
+            self.nombres.append(p.nombrePac)
+            self.apellidos.append(p.apePatPac)
+            self.hospitales.append(p.HospOrigen)
+            self._delta_claves.setdefault(int(p.pac_clave), []).append(row)
+            for field, value in (('nombrePac', p.nombrePac), ('apePatPac', p.apePatPac)):
+                norm = normalize_text(value)
+                if norm:
+                    self._delta_prefix[field].append((norm, row))
+            full = _full_name(p.nombrePac, p.apePatPac)
+            name_id = self._name_ids.get(full)
+            if name_id is None:
+                name_id = self._name_ids[full] = len(self._name_rows)
+                grams = trigrams(full)
+                self._name_grams.append(len(grams))
+                self._name_rows.append([])
+                for gram in grams:
+                    self._delta_postings.setdefault(gram, []).append(name_id)
+            self._name_rows[name_id].append(row)
+            added += 1
+        # Las consultas solo leen el delta: se mantiene ordenado aquí (timsort
+        # aprovecha el tramo ya ordenado y el lote recién agregado)
+        for entries in self._delta_prefix.values():
+            entries.sort()
+        if len(self.claves) - self._delta_start >= self.compact_threshold:
+            self.compact()
+        return added
+
+    def compact(self) -> None:
+        """Fusiona el delta en los arreglos ordenados del segmento base"""
+        if self._delta_start == len(self.claves):
+            return
+        new = np.asarray(self.claves[self._delta_start:], dtype=np.int64)
+        order = np.argsort(new, kind='stable')
+        self._clave_keys, self._clave_rows = _merge_sorted(
+            self._clave_keys, self._clave_rows, new[order], order + self._delta_start)
+
+        for field in PREFIX_FIELDS:
+            delta = self._delta_prefix[field]  # ya ordenado por add
+            self._prefix_keys[field], self._prefix_rows[field] = _merge_sorted(
+                self._prefix_keys[field], self._prefix_rows[field],
+                np.array([k for k, _ in delta], dtype=str), np.array([r for _, r in delta], dtype=np.int64))
+            self._delta_prefix[field] = []
+
+        for gram, rows in self._delta_postings.items():
+            new = np.asarray(rows, dtype=np.int64)
+            old = self._postings.get(gram)
+            self._postings[gram] = new if old is None else np.concatenate([old, new])
+        self._delta_postings = {}
+        self._delta_claves = {}
+        self._delta_start = len(self.claves)
+
+    # --- consultas ---
+
+    def record(self, row: int) -> Dict[str, Any]:
+        return {'pac_clave': self.claves[row], 'nombrePac': self.nombres[row],
+                'apePatPac': self.apellidos[row], 'HospOrigen': self.hospitales[row]}
+
+    def by_clave(self, pac_clave: int) -> List[Dict[str, Any]]:
+        """Todos los registros federados con ese pac_clave (uno por hospital/nombre)"""
+        pac_clave = int(pac_clave)
+        lo = np.searchsorted(self._clave_keys, pac_clave, 'left')
+        hi = np.searchsorted(self._clave_keys, pac_clave, 'right')
+        rows = self._clave_rows[lo:hi].tolist() + self._delta_claves.get(pac_clave, [])
+        return [self.record(r) for r in sorted(rows)]
+
+    def contains(self, pac_clave: int, nombrePac: Optional[str], apePatPac: Optional[str] = None) -> bool:
+        """Misma clave de deduplicación que deduplicate(): (pac_clave, nombre, apellido)"""
+        return (pac_clave, nombrePac, apePatPac) in self._keys
+
+    def prefix(self, text: str, field: str = 'apePatPac', limit: int = 20) -> List[Dict[str, Any]]:
+        """Registros cuyo ``field`` normalizado empieza con ``text``"""
+        if field not in PREFIX_FIELDS:
+            raise ValueError(f"field must be one of {PREFIX_FIELDS}")
+        norm = normalize_text(text) or ''
+        keys = self._prefix_keys[field]
+        lo = np.searchsorted(keys, norm, 'left')
+        hi = min(np.searchsorted(keys, norm + _PREFIX_END, 'left'), lo + limit)
+        rows = self._prefix_rows[field][lo:hi].tolist()
+        delta = self._delta_prefix[field]
+        i = bisect.bisect_left(delta, (norm,))
+        while i < len(delta) and len(rows) < 2 * limit and delta[i][0].startswith(norm):
+            rows.append(delta[i][1])
+            i += 1
+        rows.sort(key=lambda r: (normalize_text(self.nombres[r] if field == 'nombrePac' else self.apellidos[r]), r))
+        return [self.record(r) for r in rows[:limit]]
+
+    def fuzzy(self, name: str, limit: int = 10, min_score: float = 0.4) -> List[Dict[str, Any]]:
+        """
+        Registros cuyo nombre completo comparte trigramas con ``name``, ordenados
+        por similitud de Dice. Los trigramas con más de ``max_postings``
+        nombres distintos no generan candidatos.
+        """
+        query = trigrams(_full_name(name, None))
+        if not query:
+            return []
+        hits = []
+        for gram in query:
+            base = self._postings.get(gram)
+            if base is not None and len(base) <= self.max_postings:
+                hits.append(base)
+            delta = self._delta_postings.get(gram)
+            if delta:
+                hits.append(np.asarray(delta, dtype=np.int64))
+        if not hits:
+            return []
+        ids, shared = np.unique(np.concatenate(hits), return_counts=True)
+        sizes = np.asarray(self._name_grams, dtype=np.int64)[ids]
+        scores = 2 * shared / (len(query) + sizes)
+        keep = scores >= min_score
+        ids, scores = ids[keep], scores[keep]
+        order = np.lexsort((ids, -scores))
+        results = []
+        for i in order:
+            for row in self._name_rows[ids[i]]:
+                results.append({**self.record(row), 'score': round(float(scores[i]), 4)})
+                if len(results) == limit:
+                    return results
+        return results
+
+    # --- persistencia ---
+
+    def save(self, path: Union[str, Path]) -> None:
+        self.compact()
+        with open(path, 'wb') as f:
+            pickle.dump(self.__dict__, f, pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'PatientIndex':
+        index = cls.__new__(cls)
+        with open(path, 'rb') as f:
+            index.__dict__.update(pickle.load(f))
+        return index
@@ -0,0 +1,141 @@
+"""
+Minimal local HTTP front-end for PatientIndex (standard library only).
+
+Endpoints (JSON responses)::
+
+    GET  /pacientes/<pac_clave>
+    GET  /buscar?prefijo=GARC&campo=apePatPac&limite=20
+    GET  /buscar?nombre=JOSE+GRACIA&limite=10
+    POST /pacientes          body: [{"pac_clave": ..., "nombrePac": ..., ...}, ...]
+
+Usage::
+
+    python -m src.lookup.server --index pacientes.idx --port 8765
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Iterator
+from urllib.parse import parse_qs, urlparse
+
+from .index import PatientIndex
+
+
+class ReadWriteLock:
+    """
+    Varias consultas a la vez, pero ``add``/``compact`` en exclusiva: un GET
+    nunca ve el delta a medio agregar ni el segmento base a medio fusionar.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writing = False
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        with self._cond:
+            while self._writing:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        with self._cond:
+            while self._writing or self._readers:
+                self._cond.wait()
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
+
+
+def make_handler(index: PatientIndex, lock: ReadWriteLock):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, payload: Any) -> None:
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            parts = url.path.strip('/').split('/')
+            try:
+                with lock.read():
+                    payload = self._query(parts, params)
+            except ValueError as e:
+                self._send(400, {'error': str(e)})
+                return
+            if payload is None:
+                self._send(404, {'error': 'ruta no encontrada'})
+            else:
+                self._send(200, payload)
+
+        def _query(self, parts, params):
+            if len(parts) == 2 and parts[0] == 'pacientes':
+                return index.by_clave(int(parts[1]))
+            if parts == ['buscar'] and 'prefijo' in params:
+                return index.prefix(params['prefijo'], params.get('campo', 'apePatPac'),
+                                    int(params.get('limite', 20)))
+            if parts == ['buscar'] and 'nombre' in params:
+                return index.fuzzy(params['nombre'], int(params.get('limite', 10)))
+            return None
+
+        def do_POST(self):
+            if urlparse(self.path).path.strip('/') != 'pacientes':
+                self._send(404, {'error': 'ruta no encontrada'})
+                return
+            from ..models.landing.schemas import PacienteFederadoLanding
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                batch = [PacienteFederadoLanding(**r) for r in json.loads(self.rfile.read(length))]
+            except (ValueError, TypeError) as e:
+                self._send(400, {'error': str(e)})
+                return
+            with lock.write():
+                added = index.add(batch)
+                total = len(index)
+            self._send(200, {'agregados': added, 'total': total})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(index: PatientIndex, host: str = '127.0.0.1', port: int = 8765) -> ThreadingHTTPServer:
+    """Crea el servidor (sin arrancarlo); usar ``serve_forever`` o un hilo"""
+    return ThreadingHTTPServer((host, port), make_handler(index, ReadWriteLock()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servicio local de búsqueda de pacientes federados')
+    parser.add_argument('--index', required=True, help='Archivo creado con PatientIndex.save')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+    server = serve(PatientIndex.load(args.index), args.host, args.port)
+    print(f"Escuchando en http://{args.host}:{server.server_address[1]}")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
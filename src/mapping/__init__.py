@@ -0,0 +1,3 @@
+"""
+Data mapping: declarative source -> landing field mappings
+"""
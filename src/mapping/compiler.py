@@ -0,0 +1,197 @@
+"""
+Compiler for JSON mapping specs into column-wise transformation plans
+"""
+import json
+import typing
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Type, Union
+
+import pandas as pd
+from pydantic import BaseModel
+
+from ..models.landing.schemas import PacienteFederadoLanding
+
+MAPPINGS_DIR = Path(__file__).resolve().parents[2] / 'config' / 'mappings'
+
+# Misma tabla que normalize_text en etl.patients_integration, ya en mayúsculas:
+# upper() primero deja solo 7 reemplazos literales, que sí corren en kernels vectorizados
+_ACCENTS_UPPER = {'Á': 'A', 'É': 'E', 'Í': 'I', 'Ó': 'O', 'Ú': 'U', 'Ü': 'U', 'Ñ': 'N'}
+
+# Los espacios que reconoce \s de Python (incluye NBSP, U+2000-U+200A, U+3000...);
+# en RE2, el motor de Arrow, \s solo cubre espacios ASCII
+_WHITESPACE = '[' + ''.join(c for c in map(chr, range(0x3001)) if c.isspace()) + ']+'
+
+# --- Transformaciones vectorizadas (pd.Series -> pd.Series) ---
+
+try:
+    import pyarrow  # noqa: F401
+    _STRING_DTYPE = 'string[pyarrow]'  # kernels de Arrow en lugar de bucles Python
+except ImportError:
+    _STRING_DTYPE = 'string'
+
+def as_text(s: pd.Series) -> pd.Series:
+    """Convierte a dtype string (Arrow si está disponible) conservando nulos"""
+    return s if s.dtype == _STRING_DTYPE else s.astype(_STRING_DTYPE)
+
+def vec_normalize_text(s: pd.Series) -> pd.Series:
+    """Versión columnar de normalize_text: strip, sin acentos, espacios colapsados, mayúsculas"""
+    s = as_text(s).str.replace(_WHITESPACE, ' ', regex=True).str.strip(' ').str.upper()
+    for accented, plain in _ACCENTS_UPPER.items():
+        s = s.str.replace(accented, plain, regex=False)
+    return s
+
+def vec_strip(s: pd.Series) -> pd.Series:
+    return as_text(s).str.strip()
+
+def vec_upper(s: pd.Series) -> pd.Series:
+    return as_text(s).str.upper()
+
+def vec_nss_digits(s: pd.Series, max_digits: int = 8) -> pd.Series:
+    """Extrae dígitos del NSS y trunca a 8 (int(8)); sin dígitos -> nulo"""
+    digits = as_text(s).str.replace(r'\D', '', regex=True).str[:max_digits]
+    digits = digits.mask(digits == '')
+    return pd.to_numeric(digits, errors='coerce').astype('Int64')
+
+TRANSFORMS: Dict[str, Callable[[pd.Series], pd.Series]] = {
+    'normalize_text': vec_normalize_text,
+    'strip': vec_strip,
+    'upper': vec_upper,
+    'nss_digits': vec_nss_digits,
+}
+
+
+@dataclass
+class MappingReport:
+    """Conteos de una ejecución del plan; rejects por regla, sin ocultar fallas"""
+    rows_in: int = 0
+    rows_out: int = 0
+    rejects: Dict[str, int] = field(default_factory=dict)
+
+    def merge(self, other: 'MappingReport') -> None:
+        self.rows_in += other.rows_in
+        self.rows_out += other.rows_out
+        for rule, count in other.rejects.items():
+            self.rejects[rule] = self.rejects.get(rule, 0) + count
+
+
+@dataclass
+class MappingResult:
+    """Salida del plan: registros válidos, rechazados con motivo y reporte"""
+    frame: pd.DataFrame
+    rejected: pd.DataFrame
+    report: MappingReport
+
+    def to_models(self, model: Type[BaseModel] = PacienteFederadoLanding) -> List[BaseModel]:
+        """Construye modelos sin revalidar (el plan ya aplicó tipos y obligatorios)"""
+        records = self.frame.astype(object).where(self.frame.notna(), None).to_dict('records')
+        return [model.model_construct(**r) for r in records]
+
+
+def base_type(annotation: Any) -> Any:
+    """Tipo base de una anotación, quitando Optional[...]"""
+    args = [a for a in typing.get_args(annotation) if a is not type(None)]
+    return args[0] if typing.get_origin(annotation) is Union and len(args) == 1 else annotation
+
+
+class CompiledMapping:
+    """
+    Column-wise execution plan for one mapping spec.
+
+    Steps, each applied to whole columns of the batch:
+      1. per-field transform chains (source column -> target field)
+      2. type coercion from the target model (int fields, stripped strings)
+      3. required-field checks, counted per rule instead of silently dropped
+    """
+
+    def __init__(self, spec: Mapping[str, Any], model: Type[BaseModel] = PacienteFederadoLanding):
+        self.origen = spec['origen']
+        self.model = model
+        self.steps: List[Tuple[str, str, List[Callable]]] = []
+        for src_col, rule in spec['fields'].items():
+            target = rule['target']
+            if target not in model.model_fields:
+                raise ValueError(f"Unknown target field '{target}' for {model.__name__}")
+            unknown = [t for t in rule.get('transforms', []) if t not in TRANSFORMS]
+            if unknown:
+                raise ValueError(f"Unknown transforms for {src_col}: {unknown}")
+            self.steps.append((src_col, target, [TRANSFORMS[t] for t in rule.get('transforms', [])]))
+        self.columns = list(model.model_fields)
+        self.required = [name for name, f in model.model_fields.items() if f.is_required()]
+        self.types = {name: base_type(f.annotation) for name, f in model.model_fields.items()}
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path], **kwargs) -> 'CompiledMapping':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f), **kwargs)
+
+    def run(self, batch: Any) -> MappingResult:
+        """
+        Apply the plan to a pandas DataFrame or a pyarrow Table/RecordBatch.
+        """
+        df = batch.to_pandas() if hasattr(batch, 'to_pandas') else batch
+        n = len(df)
+        out = pd.DataFrame(index=df.index)
+        for name in self.columns:
+            out[name] = pd.Series(pd.NA, index=df.index, dtype='object')
+        out['HospOrigen'] = self.origen
+
+        for src_col, target, chain in self.steps:
+            col = df[src_col] if src_col in df.columns else pd.Series(pd.NA, index=df.index, dtype='object')
+            for transform in chain:
+                col = transform(col)
+            out[target] = col
+
+        report = MappingReport(rows_in=n)
+        reasons = pd.Series(pd.NA, index=df.index, dtype='object')
+        for name in self.columns:
+            kind = self.types[name]
+            col = out[name]
+            if kind is int:
+                coerced = pd.to_numeric(col, errors='coerce').astype('Int64')
+                bad = col.notna() & coerced.isna()
+                self._reject(reasons, bad, f"{name}:type", report)
+                out[name] = coerced
+            elif kind is str:
+                out[name] = vec_strip(col)
+        for name in self.required:
+            self._reject(reasons, out[name].isna(), f"{name}:required", report)
+
+        rejected_mask = reasons.notna()
+        rejected = df[rejected_mask].copy()
+        rejected['reject_reason'] = reasons[rejected_mask]
+        frame = out[~rejected_mask].reset_index(drop=True)
+        report.rows_out = len(frame)
+        return MappingResult(frame=frame, rejected=rejected, report=report)
+
+    @staticmethod
+    def _reject(reasons: pd.Series, mask: pd.Series, rule: str, report: MappingReport) -> None:
+        # Solo se cuenta el primer motivo de rechazo de cada fila
+        new = mask & reasons.isna()
+        count = int(new.sum())
+        if count:
+            reasons[new] = rule
+            report.rejects[rule] = report.rejects.get(rule, 0) + count
+
+
+def estadisticas_frame(frame: pd.DataFrame) -> Dict[str, Any]:
+    """
+    actividad6_estadisticas sobre el frame del plan (o varios concatenados),
+    sin construir modelos. Mismo diccionario, incluido el orden de por_hospital.
+    """
+    def vacios(name: str) -> int:
+        col = frame[name]
+        return int((col.isna() | (col.astype(object) == '')).sum())
+
+    hospitales = frame.groupby(frame['pac_clave'], sort=False)['HospOrigen'].nunique()
+    return {
+        'total_pacientes': len(frame),
+        'por_hospital': {h: int(n) for h, n in frame['HospOrigen'].value_counts(sort=False).items()},
+        'duplicados_entre_hospitales': int((hospitales > 1).sum()),
+        'campos_vacios': {name: vacios(name) for name in ('nombrePac', 'apePatPac', 'direccion')},
+    }
+
+
+def load_mapping(name: str, mappings_dir: Optional[Path] = None) -> CompiledMapping:
+    """Compile config/mappings/<name>.json"""
+    return CompiledMapping.from_file((mappings_dir or MAPPINGS_DIR) / f"{name}.json")
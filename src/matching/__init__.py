@@ -0,0 +1,3 @@
+"""
+Record matching: pair classification and entity clustering
+"""
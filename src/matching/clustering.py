@@ -0,0 +1,203 @@
+"""
+Transitive clustering of scored candidate pairs with an array-backed union-find
+"""
+from dataclasses import dataclass
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+
+class UnionFind:
+    """
+    Disjoint-set forest over ``n`` records stored in NumPy parent/size arrays.
+
+    ``union`` merges one pair at a time (union by size, path halving);
+    ``max_size`` refuses merges that would grow a component past the limit
+    (guard against giant components caused by hub records such as
+    placeholder names or shared NSS). ``union_many`` merges a whole batch of
+    pairs with vectorized hooking and pointer jumping when no limit applies.
+    """
+
+    def __init__(self, n: int):
+        self.n = n
+        self.parent = np.arange(n, dtype=np.int64)
+        self.size = np.ones(n, dtype=np.int64)
+
+    def _check(self, x: int) -> int:
+        x = int(x)
+        if not 0 <= x < self.n:
+            raise IndexError(f"record {x} out of range 0..{self.n - 1}")
+        return x
+
+    def find(self, x: int) -> int:
+        x = self._check(x)
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = int(parent[x])
+        return x
+
+    def union(self, a: int, b: int, max_size: Optional[int] = None) -> bool:
+        """Merge the components of a and b; returns False if blocked by max_size"""
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return True
+        size = self.size
+        if max_size is not None and size[ra] + size[rb] > max_size:
+            return False
+        if size[ra] < size[rb]:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        size[ra] += size[rb]
+        return True
+
+    def roots(self) -> np.ndarray:
+        """Raíz de cada registro; comprime todos los caminos"""
+        parent = self.parent
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                return parent
+            parent[:] = jumped
+
+    def union_many(self, left: np.ndarray, right: np.ndarray) -> None:
+        """Merge every (left[i], right[i]) pair, without a size limit"""
+        left = np.asarray(left, dtype=np.int64)
+        right = np.asarray(right, dtype=np.int64)
+        for side in (left, right):
+            if len(side) and (side.min() < 0 or side.max() >= self.n):
+                raise IndexError(f"record positions must be in 0..{self.n - 1}")
+        while True:
+            roots = self.roots()
+            ra, rb = roots[left], roots[right]
+            pending = ra != rb
+            if not pending.any():
+                break
+            ra, rb = ra[pending], rb[pending]
+            # Enganchar siempre la raíz mayor a la menor: no se forman ciclos
+            np.minimum.at(self.parent, np.maximum(ra, rb), np.minimum(ra, rb))
+        roots = self.roots()
+        self.size[:] = 0
+        np.add.at(self.size, roots, 1)
+
+    def labels(self) -> np.ndarray:
+        """Dense cluster ids (0..k-1), numbered by the first record of each cluster"""
+        return _dense_labels(self.roots().copy())
+
+
+def _dense_labels(roots: np.ndarray) -> np.ndarray:
+    if len(roots) == 0:
+        return roots
+    _, first_idx, inverse = np.unique(roots, return_index=True, return_inverse=True)
+    rank = np.empty(len(first_idx), dtype=np.int64)
+    rank[np.argsort(first_idx)] = np.arange(len(first_idx))
+    return rank[inverse]
+
+
+@dataclass
+class ClusterResult:
+    """Resultado del clustering: un id de cluster por registro"""
+    labels: np.ndarray
+    n_clusters: int
+    sizes: np.ndarray  # tamaño de cada cluster, indexado por id
+    links_used: int
+    links_blocked: int  # uniones rechazadas por el límite de tamaño
+
+
+def cluster_pairs(
+    left: np.ndarray,
+    right: np.ndarray,
+    n_records: int,
+    scores: Optional[np.ndarray] = None,
+    threshold: Optional[float] = None,
+    max_cluster_size: Optional[int] = None
+) -> ClusterResult:
+    """
+    Build connected components from candidate pairs.
+
+    Args:
+        left: Record positions (0..n_records-1) of the first element of each pair
+        right: Record positions of the second element of each pair
+        n_records: Total number of records (singletons get their own cluster)
+        scores: Optional match score per pair
+        threshold: Keep only pairs with score >= threshold
+        max_cluster_size: Optional giant-component guard; pairs are applied in
+            descending score order so the strongest links win
+
+    Returns:
+        ClusterResult with one cluster id per record
+    """
+    left = np.asarray(left, dtype=np.int64)
+    right = np.asarray(right, dtype=np.int64)
+    if left.shape != right.shape:
+        raise ValueError("left and right must have the same length")
+    for side in (left, right):
+        if len(side) and (side.min() < 0 or side.max() >= n_records):
+            raise ValueError(f"pair positions must be in 0..{n_records - 1}")
+    if scores is not None:
+        scores = np.asarray(scores, dtype=np.float64)
+        if threshold is not None:
+            keep = scores >= threshold
+            left, right, scores = left[keep], right[keep], scores[keep]
+        if max_cluster_size is not None:
+            order = np.argsort(-scores, kind='stable')
+            left, right = left[order], right[order]
+    elif threshold is not None:
+        raise ValueError("threshold requires scores")
+
+    uf = UnionFind(n_records)
+    blocked = 0
+    if max_cluster_size is None:
+        uf.union_many(left, right)
+    else:
+        # El límite depende del orden de los enlaces: uno por uno
+        for a, b in zip(left.tolist(), right.tolist()):
+            if not uf.union(a, b, max_cluster_size):
+                blocked += 1
+
+    labels = uf.labels()
+    sizes = np.bincount(labels, minlength=labels.max() + 1 if len(labels) else 0)
+    return ClusterResult(
+        labels=labels,
+        n_clusters=len(sizes),
+        sizes=sizes,
+        links_used=len(left) - blocked,
+        links_blocked=blocked
+    )
+
+
+def assign_clusters(
+    df: pd.DataFrame,
+    pairs: Union[pd.MultiIndex, pd.DataFrame],
+    scores: Optional[Union[pd.Series, np.ndarray]] = None,
+    threshold: Optional[float] = None,
+    max_cluster_size: Optional[int] = None,
+    column: str = 'cluster_id'
+) -> pd.DataFrame:
+    """
+    Add a cluster-id column to a patient DataFrame.
+
+    Args:
+        df: Patient records; pairs refer to labels of its index
+        pairs: Candidate pairs as a 2-level MultiIndex (e.g. recordlinkage
+            output) or a DataFrame whose index is that MultiIndex
+        scores: Score per pair, aligned with ``pairs``
+        threshold: Minimum score for a pair to link two records
+        max_cluster_size: Optional giant-component guard
+        column: Name of the output column
+    """
+    index = pairs.index if isinstance(pairs, pd.DataFrame) else pairs
+    left = df.index.get_indexer(index.get_level_values(0))
+    right = df.index.get_indexer(index.get_level_values(1))
+    if (left < 0).any() or (right < 0).any():
+        raise KeyError("Pairs reference records not present in df")
+    result = cluster_pairs(
+        left, right, len(df),
+        scores=None if scores is None else np.asarray(scores),
+        threshold=threshold,
+        max_cluster_size=max_cluster_size
+    )
+    out = df.copy()
+    out[column] = result.labels
+    return out
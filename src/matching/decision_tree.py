@@ -0,0 +1,141 @@
+"""
+Binary decision-tree match classifier compiled to vectorized NumPy masks
+"""
+import json
+import operator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import yaml
+
+MATCH = 'match'
+NO_MATCH = 'no_match'
+REVIEW = 'review'
+DECISIONS = [NO_MATCH, REVIEW, MATCH]  # código int8 = posición en la lista
+
+_OPERATORS = {
+    '>=': operator.ge,
+    '>': operator.gt,
+    '<=': operator.le,
+    '<': operator.lt,
+    '==': operator.eq,
+}
+
+# Condición compilada: (feature, op, threshold, resultado esperado, rama para nulos)
+Condition = Tuple[str, str, float, bool, bool]
+
+
+@dataclass
+class Leaf:
+    """Hoja compilada: conjunción de condiciones desde la raíz"""
+    name: str
+    decision: str
+    conditions: List[Condition]
+
+
+@dataclass
+class TreeClassification:
+    """Resultado de clasificar un lote de pares"""
+    decisions: np.ndarray  # int8, índice en DECISIONS
+    leaf_ids: np.ndarray  # int32, índice de la hoja alcanzada
+    leaf_counts: Dict[str, int]
+
+    def labels(self) -> pd.Categorical:
+        return pd.Categorical.from_codes(self.decisions, categories=DECISIONS)
+
+    def counts(self) -> Dict[str, int]:
+        """Número de pares por decisión"""
+        totals = np.bincount(self.decisions, minlength=len(DECISIONS))
+        return {d: int(c) for d, c in zip(DECISIONS, totals)}
+
+
+class MatchDecisionTree:
+    """
+    Match / no-match / review classifier over comparison feature vectors.
+
+    The tree is defined as nested nodes (see config/match_tree.yml) and
+    compiled once into a flat list of leaves, each a conjunction of
+    threshold conditions. Scoring evaluates every distinct condition once
+    as a boolean mask over the whole batch and combines them per leaf, so
+    no Python code runs per pair.
+    """
+
+    def __init__(self, tree: Mapping[str, Any]):
+        self.leaves: List[Leaf] = []
+        self._compile(tree, [], 'root')
+        self.features = sorted({c[0] for leaf in self.leaves for c in leaf.conditions})
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> 'MatchDecisionTree':
+        """Load a tree from a JSON or YAML file with a top-level ``tree`` key"""
+        path = Path(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f) if path.suffix == '.json' else yaml.safe_load(f)
+        return cls(config['tree'])
+
+    def _compile(self, node: Mapping[str, Any], path: List[Condition], name: str) -> None:
+        if 'decision' in node:
+            decision = node['decision']
+            if decision not in DECISIONS:
+                raise ValueError(f"Invalid decision '{decision}' at {name}")
+            self.leaves.append(Leaf(node.get('name', name), decision, path))
+            return
+        try:
+            feature, threshold = node['feature'], float(node['threshold'])
+            then, other = node['then'], node['else']
+        except KeyError as e:
+            raise ValueError(f"Node {name} is missing key {e}") from e
+        op = node.get('op', '>=')
+        if op not in _OPERATORS:
+            raise ValueError(f"Invalid operator '{op}' at {name}")
+        missing_then = node.get('missing', 'else') == 'then'
+        label = f"{feature}{op}{threshold:g}"
+        self._compile(then, path + [(feature, op, threshold, True, missing_then)], f"{name}/{label}")
+        self._compile(other, path + [(feature, op, threshold, False, missing_then)], f"{name}/!{label}")
+
+    def classify(self, features: Union[pd.DataFrame, Mapping[str, np.ndarray]]) -> TreeClassification:
+        """
+        Classify a batch of comparison vectors.
+
+        Args:
+            features: DataFrame (e.g. recordlinkage ``Compare.compute`` output)
+                or mapping of feature name -> 1-D array
+        """
+        missing = [f for f in self.features if f not in features]
+        if missing:
+            raise KeyError(f"Missing features: {missing}")
+        columns = {f: np.asarray(features[f], dtype=np.float64) for f in self.features}
+        n = len(next(iter(columns.values()))) if columns else len(features)
+
+        # Cada condición distinta se evalúa una sola vez sobre todo el lote
+        cache: Dict[Tuple[str, str, float, bool], np.ndarray] = {}
+
+        def mask_for(feature: str, op: str, threshold: float, missing_then: bool) -> np.ndarray:
+            key = (feature, op, threshold, missing_then)
+            if key not in cache:
+                values = columns[feature]
+                nulls = np.isnan(values)
+                with np.errstate(invalid='ignore'):
+                    cond = _OPERATORS[op](values, threshold)
+                cache[key] = np.where(nulls, missing_then, cond)
+            return cache[key]
+
+        decisions = np.zeros(n, dtype=np.int8)
+        leaf_ids = np.full(n, -1, dtype=np.int32)
+        leaf_counts: Dict[str, int] = {}
+        for i, leaf in enumerate(self.leaves):
+            reached = np.ones(n, dtype=bool)
+            for feature, op, threshold, expected, missing_then in leaf.conditions:
+                cond = mask_for(feature, op, threshold, missing_then)
+                reached &= cond if expected else ~cond
+            decisions[reached] = DECISIONS.index(leaf.decision)
+            leaf_ids[reached] = i
+            leaf_counts[leaf.name] = leaf_counts.get(leaf.name, 0) + int(reached.sum())
+        return TreeClassification(decisions=decisions, leaf_ids=leaf_ids, leaf_counts=leaf_counts)
+
+    def classify_frame(self, features: pd.DataFrame) -> pd.Series:
+        """Decision label per pair, aligned with the features index"""
+        return pd.Series(self.classify(features).labels(), index=features.index, name='decision')
@@ -0,0 +1,3 @@
+"""
+Match & Merge: golden record construction and master data management
+"""
@@ -0,0 +1,301 @@
+"""
+Golden record survivorship and incremental master store with history
+"""
+import hashlib
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence
+
+from pydantic import ValidationError
+from sqlalchemy import (Column, DateTime, Integer, MetaData, String, Table,
+                        delete, func, select)
+
+from ..etl.connectors.sql import SqlConnector
+from ..etl.metrics import RunMetrics
+from ..models.landing.schemas import PacienteFederadoLanding
+from ..models.master.schemas import PacienteMaestro, PacienteMaestroHistoria
+
+# Orden de integración actual: Siglo21 primero, luego ABC, Medica Sur y Grupo Angeles
+DEFAULT_SOURCE_PRIORITY = ['Siglo21', 'ABC', 'MedicaSur', 'GpoAngeles']
+
+GOLDEN_FIELDS = ['pac_clave', 'nombrePac', 'apePatPac', 'apeMatPac', 'direccion']
+
+# --- Reglas de supervivencia ---
+# Cada regla recibe los miembros del cluster (en orden de llegada), el campo y
+# la prioridad de fuentes, y devuelve el valor que sobrevive.
+
+def _present(value: Any) -> bool:
+    return value is not None and value != ''
+
+def most_complete(members: Sequence[PacienteFederadoLanding], field_name: str,
+                  source_priority: Sequence[str]) -> Any:
+    """Valor no vacío más largo; empates los resuelve el primero en llegar"""
+    best = None
+    for m in members:
+        value = getattr(m, field_name)
+        if _present(value) and (best is None or len(str(value)) > len(str(best))):
+            best = value
+    return best
+
+def most_recent(members: Sequence[PacienteFederadoLanding], field_name: str,
+                source_priority: Sequence[str]) -> Any:
+    """Último valor no vacío en orden de llegada"""
+    for m in reversed(members):
+        value = getattr(m, field_name)
+        if _present(value):
+            return value
+    return None
+
+def source_priority(members: Sequence[PacienteFederadoLanding], field_name: str,
+                    source_priority: Sequence[str]) -> Any:
+    """Primer valor no vacío según la prioridad de hospitales"""
+    rank = {h: i for i, h in enumerate(source_priority)}
+    ordered = sorted(members, key=lambda m: rank.get(m.HospOrigen, len(rank)))
+    for m in ordered:
+        value = getattr(m, field_name)
+        if _present(value):
+            return value
+    return None
+
+SURVIVORSHIP_RULES: Dict[str, Callable] = {
+    'most_complete': most_complete,
+    'most_recent': most_recent,
+    'source_priority': source_priority,
+}
+
+DEFAULT_RULES = {
+    'pac_clave': 'source_priority',
+    'nombrePac': 'most_complete',
+    'apePatPac': 'most_complete',
+    'apeMatPac': 'most_complete',
+    'direccion': 'most_recent',
+}
+
+def cluster_fingerprint(members: Sequence[PacienteFederadoLanding]) -> str:
+    """Hash estable del contenido de un cluster (independiente del orden de los miembros)"""
+    rows = sorted(json.dumps(m.model_dump(), sort_keys=True, default=str) for m in members)
+    return hashlib.sha1('\n'.join(rows).encode('utf-8')).hexdigest()
+
+def build_golden_record(
+    master_id: str,
+    members: Sequence[PacienteFederadoLanding],
+    rules: Optional[Mapping[str, str]] = None,
+    priority: Sequence[str] = DEFAULT_SOURCE_PRIORITY,
+    version: int = 1,
+    updated_at: Optional[datetime] = None
+) -> PacienteMaestro:
+    """
+    Apply survivorship rules field by field over a matched cluster.
+
+    Args:
+        master_id: Cluster identifier
+        members: Cluster records in arrival order
+        rules: Field -> rule name (see SURVIVORSHIP_RULES)
+        priority: Hospital order used by the source_priority rule
+        version: Version number for the resulting record
+        updated_at: Timestamp of the merge run
+    """
+    if not members:
+        raise ValueError(f"Cluster {master_id} has no members")
+    rules = {**DEFAULT_RULES, **(rules or {})}
+    values = {}
+    for field_name in GOLDEN_FIELDS:
+        rule = SURVIVORSHIP_RULES[rules[field_name]]
+        values[field_name] = rule(members, field_name, priority)
+    fuentes = list(dict.fromkeys(m.HospOrigen for m in members))
+    return PacienteMaestro(
+        master_id=master_id,
+        fuentes=fuentes,
+        num_registros=len(members),
+        fingerprint=cluster_fingerprint(members),
+        version=version,
+        updated_at=updated_at or datetime.now(),
+        **values
+    )
+
+@dataclass
+class MergeResult:
+    """Resumen de una corrida de merge incremental"""
+    inserted: List[str] = field(default_factory=list)
+    updated: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    rejected: List[str] = field(default_factory=list)  # sin golden record válido (p. ej. sin nombre)
+    unchanged: int = 0
+
+class MasterStore:
+    """
+    Master-data store for golden records with append-only history.
+
+    Each ``merge`` call receives only the clusters touched since the last run
+    (new or changed clusters, or empty member lists for retired clusters).
+    Stored fingerprints are looked up by primary key, so a run costs time
+    proportional to the change set rather than to the master table.
+    """
+
+    def __init__(
+        self,
+        connector: SqlConnector,
+        rules: Optional[Mapping[str, str]] = None,
+        priority: Sequence[str] = DEFAULT_SOURCE_PRIORITY,
+        table: str = 'master_paciente',
+        history_table: str = 'master_paciente_historia',
+        lookup_chunk: int = 1000
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            connector: SQL connector for the master schema
+            rules: Survivorship rule overrides per field
+            priority: Hospital priority for the source_priority rule
+            table: Current golden records table
+            history_table: Append-only history table
+            lookup_chunk: Max keys per fingerprint lookup query
+        """
+        unknown = set((rules or {}).values()) - set(SURVIVORSHIP_RULES)
+        if unknown:
+            raise ValueError(f"Unknown survivorship rules: {sorted(unknown)}")
+        self.connector = connector
+        self.rules = rules
+        self.priority = list(priority)
+        self.lookup_chunk = lookup_chunk
+        self.metadata = MetaData()
+        self.table = Table(table, self.metadata, *self._columns(),
+                           Column('master_id', String(64), primary_key=True))
+        self.history_table = Table(history_table, self.metadata, *self._columns(),
+                                   Column('master_id', String(64), index=True, nullable=False),
+                                   Column('change_type', String(8), nullable=False))
+
+    @staticmethod
+    def _columns() -> List[Column]:
+        return [
+            Column('pac_clave', Integer),
+            Column('nombrePac', String(255)),
+            Column('apePatPac', String(255)),
+            Column('apeMatPac', String(255)),
+            Column('direccion', String(255)),
+            Column('fuentes', String(255)),
+            Column('num_registros', Integer),
+            Column('fingerprint', String(40)),
+            Column('version', Integer),
+            Column('updated_at', DateTime),
+        ]
+
+    def create_tables(self) -> None:
+        """Create the master and history tables if they do not exist"""
+        self.metadata.create_all(self.connector.engine)
+
+    @staticmethod
+    def _to_row(record: PacienteMaestro) -> Dict[str, Any]:
+        row = record.model_dump()
+        row['fuentes'] = ','.join(record.fuentes)
+        return row
+
+    @staticmethod
+    def _from_row(row: Mapping[str, Any], model=PacienteMaestro):
+        data = dict(row)
+        data['fuentes'] = data['fuentes'].split(',') if data['fuentes'] else []
+        return model(**data)
+
+    def _current_state(self, conn, master_ids: Sequence[str]) -> Dict[str, tuple]:
+        """
+        Fingerprint vigente (None si el cluster no está activo) y última versión
+        en la historia para las claves del lote. Un cluster retirado que vuelve
+        sigue numerando desde su última versión.
+        """
+        state = {}
+        t, h = self.table, self.history_table
+        for i in range(0, len(master_ids), self.lookup_chunk):
+            chunk = master_ids[i:i + self.lookup_chunk]
+            query = (select(h.c.master_id, func.max(h.c.version))
+                     .where(h.c.master_id.in_(chunk)).group_by(h.c.master_id))
+            for master_id, version in conn.execute(query):
+                state[master_id] = (None, version)
+            query = select(t.c.master_id, t.c.fingerprint, t.c.version).where(t.c.master_id.in_(chunk))
+            for master_id, fingerprint, version in conn.execute(query):
+                state[master_id] = (fingerprint, max(version, state.get(master_id, (None, 0))[1]))
+        return state
+
+    def merge(self, clusters: Mapping[str, Sequence[PacienteFederadoLanding]],
+              run_ts: Optional[datetime] = None,
+              metrics: Optional[RunMetrics] = None) -> MergeResult:
+        """
+        Merge new or changed clusters into the master table.
+
+        Clusters whose golden record does not validate (e.g. no member has a
+        name) are skipped, listed in ``MergeResult.rejected`` and recorded as
+        errors of the ``merge_golden_records`` stage.
+
+        Args:
+            clusters: master_id -> cluster members; an empty list retires the cluster
+            run_ts: Timestamp recorded on new versions (defaults to now)
+            metrics: Run metrics to record the stage in
+        """
+        run_ts = run_ts or datetime.now()
+        metrics = metrics or RunMetrics()
+        result = MergeResult()
+        history: List[Dict[str, Any]] = []
+        upserts: List[Dict[str, Any]] = []
+        with metrics.stage('merge_golden_records') as stage, self.connector.engine.begin() as conn:
+            stage.rows_in = len(clusters)
+            state = self._current_state(conn, list(clusters))
+            for master_id, members in clusters.items():
+                fingerprint, last_version = state.get(master_id, (None, 0))
+                current = fingerprint is not None
+                if not members:
+                    if current:
+                        conn.execute(delete(self.table).where(self.table.c.master_id == master_id))
+                        history.append({
+                            **dict.fromkeys(GOLDEN_FIELDS), 'master_id': master_id,
+                            'version': last_version + 1, 'updated_at': run_ts, 'fingerprint': None,
+                            'fuentes': '', 'num_registros': 0, 'change_type': 'DELETE'
+                        })
+                        result.deleted.append(master_id)
+                    continue
+                if current and fingerprint == cluster_fingerprint(members):
+                    result.unchanged += 1
+                    continue
+                try:
+                    record = build_golden_record(master_id, members, self.rules, self.priority,
+                                                 version=last_version + 1, updated_at=run_ts)
+                except ValidationError as e:
+                    stage.record_error(e, context=master_id)
+                    result.rejected.append(master_id)
+                    continue
+                row = self._to_row(record)
+                upserts.append(row)
+                history.append({**row, 'change_type': 'UPDATE' if current else 'INSERT'})
+                (result.updated if current else result.inserted).append(master_id)
+            if upserts:
+                self._upsert(conn, upserts)
+            if history:
+                conn.execute(self.history_table.insert(), history)
+            stage.rows_rejected = len(result.rejected)
+            stage.rows_out = stage.rows_in - stage.rows_rejected
+        return result
+
+    def _upsert(self, conn, rows: List[Dict[str, Any]]) -> None:
+        dialect = conn.dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            raise NotImplementedError(f"Upsert not supported for dialect '{dialect}'")
+        stmt = insert(self.table)
+        update_cols = {c.name: stmt.excluded[c.name] for c in self.table.columns if c.name != 'master_id'}
+        conn.execute(stmt.on_conflict_do_update(index_elements=['master_id'], set_=update_cols), rows)
+
+    def get(self, master_id: str) -> Optional[PacienteMaestro]:
+        """Golden record vigente de un cluster"""
+        with self.connector.engine.connect() as conn:
+            row = conn.execute(select(self.table).where(self.table.c.master_id == master_id)).mappings().first()
+        return self._from_row(row) if row else None
+
+    def history(self, master_id: str) -> List[PacienteMaestroHistoria]:
+        """Todas las versiones de un cluster, de la más antigua a la más reciente"""
+        h = self.history_table
+        with self.connector.engine.connect() as conn:
+            rows = conn.execute(select(h).where(h.c.master_id == master_id).order_by(h.c.version)).mappings().all()
+        return [self._from_row(row, PacienteMaestroHistoria) for row in rows]
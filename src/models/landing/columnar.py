@@ -0,0 +1,283 @@
+"""
+Columnar, dictionary-encoded representation of CasoCovidLanding.
+
+A CasoCovidLanding keeps ~36 Python objects per case (several KB each).
+``CasosColumnar`` stores the same cases as NumPy arrays:
+
+- catalog codes (origen, sector, entidades, sexo, ...) as the integer keys of
+  the official catalogs in config/catalogs.yml, as int8 (int16 for
+  municipio_res). -1 marks a value that is not an integer code; its original
+  text is kept aside in ``raw_codes`` (sparse, per row) so ``to_models``
+  returns it unchanged.
+- Si/No flags as tri-state int8: 1 = True, 0 = False, -1 = None (97/98/99),
+  the same mapping as CasoCovidLanding.validate_boolean.
+- country names dictionary-encoded to int16 against a shared dictionary.
+- dates as datetime64[D] (NaT for an empty fecha_def).
+
+That is well under 100 bytes per case, and group-bys run on integer keys.
+``to_models`` rebuilds the pydantic models for code that still needs them.
+"""
+from __future__ import annotations
+
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING, Union
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from ...etl.metrics import RunMetrics
+    from .schemas import CasoCovidLanding
+
+DEFAULT_CATALOG_PATH = Path(__file__).resolve().parents[3] / 'config' / 'catalogs.yml'
+
+# campo del modelo -> (columna del CSV, catálogo, dtype)
+CODE_COLUMNS: Dict[str, Tuple[str, Optional[str], Any]] = {
+    'origen': ('ORIGEN', 'ORIGEN', np.int8),
+    'sector': ('SECTOR', 'SECTOR', np.int8),
+    'entidad_um': ('ENTIDAD_UM', 'ENTIDADES', np.int8),
+    'sexo': ('SEXO', 'SEXO', np.int8),
+    'entidad_nac': ('ENTIDAD_NAC', 'ENTIDADES', np.int8),
+    'entidad_res': ('ENTIDAD_RES', 'ENTIDADES', np.int8),
+    'municipio_res': ('MUNICIPIO_RES', None, np.int16),  # catálogo por entidad
+    'tipo_paciente': ('TIPO_PACIENTE', 'TIPO_PACIENTE', np.int8),
+    'nacionalidad': ('NACIONALIDAD', 'NACIONALIDAD', np.int8),
+    'resultado': ('RESULTADO_PCR', 'RESULTADO', np.int8),  # RESULTADO_ANTIGENO si PCR vacío
+}
+
+FLAG_COLUMNS = ('intubado', 'neumonia', 'embarazo', 'habla_lengua_indig', 'diabetes', 'epoc',
+                'asma', 'inmusupr', 'hipertension', 'otra_com', 'cardiovascular', 'obesidad',
+                'renal_cronica', 'tabaquismo', 'otro_caso', 'migrante', 'uci')
+
+DICT_COLUMNS = {'pais_nacionalidad': 'PAIS_NACIONALIDAD', 'pais_origen': 'PAIS_ORIGEN'}
+
+DATE_COLUMNS = {'fecha_actualizacion': 'FECHA_ACTUALIZACION', 'fecha_ingreso': 'FECHA_INGRESO',
+                'fecha_sintomas': 'FECHA_SINTOMAS', 'fecha_def': 'FECHA_DEF'}
+
+FLAG_NONE = (97, 98, 99)
+
+
+def load_catalogs(path: Optional[Union[str, Path]] = None) -> Dict[str, Dict[int, str]]:
+    import yaml
+    with open(path or DEFAULT_CATALOG_PATH, 'r', encoding='utf-8') as f:
+        return {name: {int(k): v for k, v in codes.items()}
+                for name, codes in yaml.safe_load(f)['catalogs'].items()}
+
+
+def _parse_dates(series: 'pd.Series', today: date) -> np.ndarray:
+    """Mismas reglas que ingest_relational_data.parse_date: inválida o futura -> NaT"""
+    import pandas as pd
+    parsed = pd.to_datetime(series.where(series != '9999-99-99'), format='%Y-%m-%d', errors='coerce')
+    values = parsed.to_numpy(dtype='datetime64[D]')
+    values[values > np.datetime64(today, 'D')] = np.datetime64('NaT')
+    return values
+
+
+def _encode_codes(series: 'pd.Series', dtype) -> np.ndarray:
+    import pandas as pd
+    numeric = pd.to_numeric(series, errors='coerce').to_numpy(dtype=float)
+    info = np.iinfo(dtype)
+    ok = np.isfinite(numeric) & (numeric == np.round(numeric)) & (numeric >= 0) & (numeric <= info.max)
+    out = np.full(len(numeric), -1, dtype=dtype)
+    out[ok] = numeric[ok].astype(dtype)
+    return out
+
+
+def _encode_flags(series: 'pd.Series') -> np.ndarray:
+    import pandas as pd
+    numeric = pd.to_numeric(series, errors='coerce').to_numpy(dtype=float)
+    out = (numeric == 1).astype(np.int8)
+    out[np.isin(numeric, FLAG_NONE)] = -1
+    return out
+
+
+class CasosColumnar:
+    """
+    Usage::
+
+        casos = CovidDataIngester(path).ingest_relational_columnar()
+        casos.count_by('entidad_res')                  # {'JALISCO': 1203, ...}
+        casos.group_count('entidad_res', 'municipio_res', where=casos.flag('diabetes') == 1)
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], paises: Sequence[str],
+                 catalogs: Optional[Dict[str, Dict[int, str]]] = None,
+                 source_file: str = 'COVID19MEXICO.csv',
+                 raw_codes: Optional[Dict[str, Dict[int, str]]] = None):
+        self.columns = columns
+        self.paises = list(paises)
+        self.catalogs = catalogs if catalogs is not None else load_catalogs()
+        self.source_file = source_file
+        # campo -> {fila: texto original} de los códigos guardados como -1
+        self.raw_codes = raw_codes or {}
+
+    def __len__(self) -> int:
+        return len(self.columns['id_registro'])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(col.nbytes for col in self.columns.values())
+
+    # --- construcción ---
+
+    @classmethod
+    def from_frame(cls, df: 'pd.DataFrame', source_file: str = 'COVID19MEXICO.csv',
+                   catalogs: Optional[Dict[str, Dict[int, str]]] = None,
+                   today: Optional[date] = None,
+                   metrics: Optional['RunMetrics'] = None) -> 'CasosColumnar':
+        """
+        Codifica un DataFrame con el esquema de COVID19MEXICO.csv.
+
+        Rechaza las mismas filas que ingest_relational_data (fechas de
+        actualización, ingreso o síntomas inválidas o futuras, EDAD no numérica).
+        """
+        import pandas as pd
+        from ...etl.ingestion import code_text
+        from ...etl.metrics import RunMetrics
+        metrics = metrics or RunMetrics()
+        today = today or date.today()
+        with metrics.stage('encode_relational') as stage:
+            stage.rows_in = len(df)
+            fechas = {field: _parse_dates(df[col], today) for field, col in DATE_COLUMNS.items()}
+            keep = np.ones(len(df), dtype=bool)
+            for field, label in (('fecha_actualizacion', 'FECHA_ACTUALIZACION'),
+                                 ('fecha_ingreso', 'FECHA_INGRESO'),
+                                 ('fecha_sintomas', 'FECHA_SINTOMAS')):
+                bad = keep & np.isnat(fechas[field])
+                if bad.any():
+                    stage.record_error(f'{label} inválida o futura', count=int(bad.sum()))
+                keep &= ~bad
+            edad = pd.to_numeric(df['EDAD'], errors='coerce').to_numpy(dtype=float)
+            bad = keep & ~np.isfinite(edad)
+            if bad.any():
+                # Un solo registro por motivo, como las fechas; la primera fila como muestra
+                stage.record_error('EDAD inválida', context=df['ID_REGISTRO'][bad].iloc[0],
+                                   count=int(bad.sum()))
+            keep &= ~bad
+
+            df = df[keep]
+            columns: Dict[str, np.ndarray] = {
+                'id_registro': np.array([str(v).encode('utf-8') for v in df['ID_REGISTRO']], dtype='S'),
+                'edad': np.trunc(edad[keep]).astype(np.int16),
+            }
+            for field in DATE_COLUMNS:
+                columns[field] = fechas[field][keep]
+            raw_codes: Dict[str, Dict[int, str]] = {}
+            for field, (col, _, dtype) in CODE_COLUMNS.items():
+                source = df[col]
+                if field == 'resultado':
+                    source = source.where(source.notna(), df['RESULTADO_ANTIGENO'])
+                columns[field] = _encode_codes(source, dtype)
+                # Códigos no enteros (o fuera de rango): el texto que daría la ingesta
+                bad = np.flatnonzero(columns[field] == -1)
+                if len(bad):
+                    raw_codes[field] = {int(i): code_text(v) for i, v in zip(bad, source.to_numpy()[bad])}
+            for field in FLAG_COLUMNS:
+                columns[field] = _encode_flags(df[field.upper()])
+            # Diccionario compartido para los dos campos de país (str() como la ingesta)
+            paises_txt = pd.concat([df[col].astype(str) for col in DICT_COLUMNS.values()],
+                                   ignore_index=True)
+            codes, paises = pd.factorize(paises_txt, sort=True)
+            for i, field in enumerate(DICT_COLUMNS):
+                columns[field] = codes[i * len(df):(i + 1) * len(df)].astype(np.int16)
+            stage.rows_out = len(df)
+            stage.rows_rejected = stage.rows_in - stage.rows_out
+        return cls(columns, list(paises), catalogs, source_file, raw_codes)
+
+    # --- consultas ---
+
+    def flag(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def labels(self, field: str) -> Dict[int, str]:
+        """Catálogo (código -> etiqueta) de un campo codificado"""
+        if field in DICT_COLUMNS:
+            return dict(enumerate(self.paises))
+        if field in FLAG_COLUMNS:
+            return {1: 'SI', 0: 'NO', -1: 'NO ESPECIFICADO'}
+        catalog = CODE_COLUMNS[field][1]
+        return self.catalogs.get(catalog, {}) if catalog else {}
+
+    def decode(self, field: str) -> np.ndarray:
+        """Etiquetas por fila; códigos fuera de catálogo se devuelven como texto del código"""
+        codes = self.columns[field]
+        labels = self.labels(field)
+        uniques, inverse = np.unique(codes, return_inverse=True)
+        return np.array([labels.get(int(c), str(c)) for c in uniques], dtype=object)[inverse]
+
+    def unknown_codes(self) -> Dict[str, List[int]]:
+        """Códigos presentes que no aparecen en el catálogo oficial"""
+        unknown = {}
+        for field, (_, catalog, _) in CODE_COLUMNS.items():
+            if catalog is None:
+                continue
+            present = np.unique(self.columns[field])
+            missing = [int(c) for c in present if int(c) not in self.catalogs.get(catalog, {})]
+            if missing:
+                unknown[field] = missing
+        return unknown
+
+    def group_count(self, *fields: str, where: Optional[np.ndarray] = None) -> Dict[Tuple[int, ...], int]:
+        """Conteo por combinación de códigos enteros (clave compuesta en base mixta)"""
+        if not fields:
+            raise ValueError("group_count needs at least one field")
+        cols = [self.columns[f].astype(np.int64) for f in fields]
+        if where is not None:
+            cols = [c[where] for c in cols]
+        if len(cols[0]) == 0:
+            return {}
+        key = np.zeros(len(cols[0]), dtype=np.int64)
+        bases = []
+        for c in cols:
+            lo, hi = int(c.min()), int(c.max())
+            bases.append((lo, hi - lo + 1))
+            key = key * (hi - lo + 1) + (c - lo)
+        uniques, counts = np.unique(key, return_counts=True)
+        result = {}
+        for k, n in zip(uniques.tolist(), counts.tolist()):
+            parts = []
+            for lo, radix in reversed(bases):
+                k, r = divmod(k, radix)
+                parts.append(r + lo)
+            result[tuple(reversed(parts))] = n
+        return result
+
+    def count_by(self, field: str, where: Optional[np.ndarray] = None) -> Dict[str, int]:
+        """Conteo por un campo codificado, con etiquetas del catálogo"""
+        labels = self.labels(field)
+        return {labels.get(code, str(code)): n
+                for (code,), n in sorted(self.group_count(field, where=where).items())}
+
+    # --- interoperabilidad ---
+
+    def to_models(self) -> List['CasoCovidLanding']:
+        """
+        Reconstruye CasoCovidLanding (mismos valores que ingest_relational_data).
+
+        Los códigos salen como texto del entero ('2', igual que code_text);
+        los guardados como -1 recuperan su texto original de ``raw_codes``.
+        """
+        from .schemas import CasoCovidLanding
+        cols = self.columns
+        as_date = {f: cols[f].astype(object) for f in DATE_COLUMNS}
+        flags = {f: [None if v < 0 else bool(v) for v in cols[f].tolist()] for f in FLAG_COLUMNS}
+        codes = {f: [str(v) for v in cols[f].tolist()] for f in CODE_COLUMNS}
+        for f, raw in self.raw_codes.items():
+            for i, text in raw.items():
+                codes[f][i] = text
+        paises = {f: [self.paises[i] for i in cols[f].tolist()] for f in DICT_COLUMNS}
+        ids = [v.decode('utf-8') for v in cols['id_registro'].tolist()]
+        edad = cols['edad'].tolist()
+        casos = []
+        for i in range(len(self)):
+            fields = {f: as_date[f][i] for f in DATE_COLUMNS}
+            fields.update({f: flags[f][i] for f in FLAG_COLUMNS})
+            fields.update({f: codes[f][i] for f in CODE_COLUMNS})
+            fields.update({f: paises[f][i] for f in DICT_COLUMNS})
+            casos.append(CasoCovidLanding.model_construct(
+                id_registro=ids[i], edad=edad[i], source_file=self.source_file, **fields))
+        return casos
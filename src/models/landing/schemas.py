@@ -63,7 +63,10 @@ class CasoCovidLanding(BaseModel):
         1: Sí (True)
         2: No (False)
         97/98/99: No especificado (None)
+        None y bool ya convertidos se conservan (p. ej. al recargar JSON)
         """
+        if v is None or isinstance(v, bool):
+            return v
         if v in [97, 98, 99]:
             return None
         return v == 1
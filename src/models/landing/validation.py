@@ -0,0 +1,142 @@
+"""
+Batch validation of landing records against a pydantic model.
+
+Building ``Model(**record)`` inside ``try/except`` costs one model call and,
+on a dirty feed, one raised ``ValidationError`` per bad row. ``BatchValidator``
+validates a whole list of records in one go:
+
+1. a columnar pre-check sends rows with a null or missing required field
+   straight to the error table (the most common defect in the hospital feeds),
+   without passing them through pydantic (those rows only report their
+   null fields)
+2. the remaining rows go through one ``TypeAdapter(List[Model])`` call, which
+   runs the same field validators as the model
+3. if that call still fails, its errors (``loc = (row, field)``) are added to
+   the table and the clean rows are validated once more
+
+So a batch raises and catches at most one exception, whatever the number
+of bad rows. Valid models keep the input order; ``errors`` is a DataFrame
+with one row per (record, field) error.
+
+Usage::
+
+    result = BatchValidator(PacienteFederadoLanding).validate(records)
+    pacientes = result.valid
+    result.errors                  # row, field, type, msg, input
+    result.record_errors(stage, records, context='pac_clave')
+"""
+from __future__ import annotations
+
+import typing
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Type, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from pydantic import BaseModel
+    from ...etl.metrics import StageMetrics
+
+ERROR_COLUMNS = ['row', 'field', 'type', 'msg', 'input']
+
+# Mismos tipo y mensaje que produce pydantic para un nulo en un campo obligatorio
+_NULL_ERRORS = {
+    int: ('int_type', 'Input should be a valid integer'),
+    str: ('string_type', 'Input should be a valid string'),
+    float: ('float_type', 'Input should be a valid number'),
+    bool: ('bool_type', 'Input should be a valid boolean'),
+}
+
+
+@dataclass
+class BatchResult:
+    """Modelos válidos (en orden de entrada) y errores estructurados por fila y campo"""
+    valid: List['BaseModel']
+    rows: List[int]  # posición en la entrada de cada modelo válido
+    error_records: List[Dict[str, Any]] = field(default_factory=list)
+    total: int = 0
+
+    @property
+    def rejected(self) -> int:
+        return self.total - len(self.valid)
+
+    @property
+    def errors(self) -> 'pd.DataFrame':
+        import pandas as pd
+        return pd.DataFrame(self.error_records, columns=ERROR_COLUMNS)
+
+    def by_row(self) -> Dict[int, List[Dict[str, Any]]]:
+        grouped: Dict[int, List[Dict[str, Any]]] = {}
+        for error in self.error_records:
+            grouped.setdefault(error['row'], []).append(error)
+        return grouped
+
+    def record_errors(self, stage: 'StageMetrics', records: Optional[Sequence[Mapping[str, Any]]] = None,
+                      context: Optional[str] = None) -> None:
+        """
+        Registra cada fila rechazada en la etapa con la misma clave que
+        ``record_error`` da a un ValidationError ("ValidationError: campo: tipo; ...").
+        """
+        for row, errors in self.by_row().items():
+            detail = '; '.join(f"{e['field']}: {e['type']}" for e in errors)
+            sample = records[row].get(context) if records is not None and context else None
+            stage.record_error(f"ValidationError: {detail}", context=sample)
+
+
+class BatchValidator:
+    """Valida listas de registros (dicts) contra ``model`` con un TypeAdapter"""
+
+    def __init__(self, model: Type['BaseModel']):
+        from pydantic import TypeAdapter
+        from ...mapping.compiler import base_type
+        self.model = model
+        self.adapter = TypeAdapter(List[model])
+        # Obligatorios no anulables: un None o una clave ausente siempre falla
+        self.required = {name: _NULL_ERRORS.get(base_type(f.annotation))
+                         for name, f in model.model_fields.items()
+                         if f.is_required() and type(None) not in typing.get_args(f.annotation)}
+
+    def _precheck(self, records: Sequence[Mapping[str, Any]]) -> Dict[int, List[Dict[str, Any]]]:
+        failed: Dict[int, List[Dict[str, Any]]] = {}
+        for name, null_error in self.required.items():
+            if null_error is None:  # tipo sin error conocido: que lo decida pydantic
+                continue
+            for i, record in enumerate(records):
+                if record.get(name) is None:
+                    kind, msg = null_error if name in record else ('missing', 'Field required')
+                    failed.setdefault(i, []).append(
+                        {'row': i, 'field': name, 'type': kind, 'msg': msg, 'input': None})
+        return failed
+
+    def _errors(self, exc: Exception, rows: Sequence[int]) -> Dict[int, List[Dict[str, Any]]]:
+        failed: Dict[int, List[Dict[str, Any]]] = {}
+        for e in exc.errors(include_url=False):
+            row = rows[e['loc'][0]]
+            failed.setdefault(row, []).append({
+                'row': row, 'field': '.'.join(map(str, e['loc'][1:])),
+                'type': e['type'], 'msg': e['msg'], 'input': e.get('input')})
+        return failed
+
+    def validate(self, records: Sequence[Mapping[str, Any]]) -> BatchResult:
+        from pydantic import ValidationError
+        failed = self._precheck(records)
+        rows = [i for i in range(len(records)) if i not in failed]
+        try:
+            valid = self.adapter.validate_python([records[i] for i in rows])
+        except ValidationError as e:
+            failed.update(self._errors(e, rows))
+            rows = [i for i in rows if i not in failed]
+            # La validación es por registro: el resto ya no falla
+            valid = self.adapter.validate_python([records[i] for i in rows])
+        error_records = [error for row in sorted(failed) for error in failed[row]]
+        return BatchResult(valid=valid, rows=rows, error_records=error_records, total=len(records))
+
+
+_validators: Dict[type, BatchValidator] = {}
+
+
+def validate_batch(records: Sequence[Mapping[str, Any]], model: Type['BaseModel']) -> BatchResult:
+    """``BatchValidator(model).validate(records)`` con el TypeAdapter en caché por modelo"""
+    validator = _validators.get(model)
+    if validator is None:
+        validator = _validators[model] = BatchValidator(model)
+    return validator.validate(records)
@@ -0,0 +1,29 @@
+"""
+Master (golden record) models for federated patients
+"""
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel
+
+class PacienteMaestro(BaseModel):
+    """Golden record de un paciente, construido a partir de un cluster de registros federados"""
+    master_id: str  # id del cluster
+    pac_clave: int
+    nombrePac: str
+    apePatPac: Optional[str] = None
+    apeMatPac: Optional[str] = None
+    direccion: Optional[str] = None
+    fuentes: List[str]  # hospitales que aportaron registros al cluster
+    num_registros: int
+    fingerprint: str  # hash del contenido del cluster, detecta cambios entre corridas
+    version: int = 1
+    updated_at: datetime
+
+class PacienteMaestroHistoria(PacienteMaestro):
+    """Fila append-only de historia: una por cada versión de un golden record.
+    Las filas DELETE no llevan valores, por eso los campos obligatorios se relajan.
+    """
+    pac_clave: Optional[int] = None
+    nombrePac: Optional[str] = None
+    fingerprint: Optional[str] = None
+    change_type: str  # INSERT | UPDATE | DELETE
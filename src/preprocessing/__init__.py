@@ -0,0 +1,3 @@
+"""
+Preprocessing transformers for model-ready clinical tables
+"""
@@ -0,0 +1,232 @@
+"""
+Streaming fit/transform scalers for chunked clinical tables (Práctica 5)
+
+The fit pass reads the input once in chunks, accumulating count, mean,
+variance (Chan's parallel update), min, max and a quantile sketch per
+column. The transform pass reads it a second time and writes every output
+(min-max, z-score, L2, binary) from the same chunk, so memory is bounded
+by the chunk size regardless of the table size.
+"""
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from ..profiling.sketches import QuantileSketch
+
+# Convención Pima usada en la práctica 5: un 0 en estas columnas es un faltante
+PIMA_COLUMNS = ['Pregnancies', 'PlasmaGlucose', 'DiastolicBP', 'TricepsSkinFold',
+                'TwoHourInsulin', 'BMI', 'DiabetesPedigree', 'Age', 'Outcome']
+PIMA_ZERO_AS_NULL = ['PlasmaGlucose', 'TricepsSkinFold', 'TwoHourInsulin', 'BMI', 'DiastolicBP']
+
+OUTPUTS = ('minmax', 'standardized', 'normalized_l2', 'binary_threshold0')
+
+
+@dataclass
+class ColumnStats:
+    """Estadísticos acumulados de una columna sobre valores no nulos"""
+    count: int = 0
+    nulls: int = 0
+    mean: float = 0.0
+    m2: float = 0.0  # suma de cuadrados de desviaciones
+    min: float = np.inf
+    max: float = -np.inf
+    sketch: QuantileSketch = field(default_factory=lambda: QuantileSketch(size=4096))
+
+    def update(self, values: np.ndarray) -> None:
+        nulls = np.isnan(values)
+        self.nulls += int(nulls.sum())
+        values = values[~nulls]
+        if len(values) == 0:
+            return
+        self.sketch.add(values)
+        self._combine(len(values), float(values.mean()), float(((values - values.mean()) ** 2).sum()),
+                      float(values.min()), float(values.max()))
+
+    def _combine(self, n: int, mean: float, m2: float, vmin: float, vmax: float) -> None:
+        total = self.count + n
+        delta = mean - self.mean
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.mean += delta * n / total
+        self.count = total
+        self.min = min(self.min, vmin)
+        self.max = max(self.max, vmax)
+
+    def with_fill(self, value: float) -> 'ColumnStats':
+        """Estadísticos tras imputar los nulos con ``value`` (sin releer los datos)"""
+        filled = ColumnStats(count=self.count, nulls=0, mean=self.mean, m2=self.m2,
+                             min=self.min, max=self.max, sketch=self.sketch)
+        if self.nulls:
+            filled._combine(self.nulls, value, 0.0, value, value)
+        return filled
+
+    @property
+    def std(self) -> float:
+        """Desviación estándar poblacional (ddof=0, como StandardScaler de scikit-learn)"""
+        return float(np.sqrt(self.m2 / self.count)) if self.count else 0.0
+
+
+class StreamingStats:
+    """
+    Fit pass shared by all scalers: 0->NaN null detection, per-column stats
+    and imputation values, accumulated chunk by chunk.
+    """
+
+    def __init__(self, columns: Sequence[str], zero_as_null: Sequence[str] = (),
+                 impute: Optional[str] = 'median'):
+        """
+        Args:
+            columns: Feature columns to fit
+            zero_as_null: Columns where 0 means missing
+            impute: 'median', 'mean' or None (leave NaN)
+        """
+        if impute not in ('median', 'mean', None):
+            raise ValueError("impute must be 'median', 'mean' or None")
+        self.columns = list(columns)
+        self.zero_as_null = [c for c in zero_as_null if c in self.columns]
+        self.impute = impute
+        self.raw: Dict[str, ColumnStats] = {c: ColumnStats() for c in self.columns}
+        self.fill_values: Dict[str, float] = {}
+        self.stats: Dict[str, ColumnStats] = {}
+
+    def _features(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        X = chunk[self.columns].astype(float)
+        if self.zero_as_null:
+            X[self.zero_as_null] = X[self.zero_as_null].replace(0, np.nan)
+        return X
+
+    def partial_fit(self, chunk: pd.DataFrame) -> 'StreamingStats':
+        X = self._features(chunk)
+        for c in self.columns:
+            self.raw[c].update(X[c].to_numpy())
+        return self
+
+    def fit(self, chunks: Iterable[pd.DataFrame]) -> 'StreamingStats':
+        for chunk in chunks:
+            self.partial_fit(chunk)
+        return self.finalize()
+
+    def finalize(self) -> 'StreamingStats':
+        """Fija valores de imputación y estadísticos sobre los datos ya imputados"""
+        for c, raw in self.raw.items():
+            if self.impute and raw.nulls and raw.count:
+                # Mediana exacta hasta 4096 valores no nulos; aproximada (sketch) después
+                fill = raw.sketch.quantile(0.5) if self.impute == 'median' else raw.mean
+                self.fill_values[c] = float(fill)
+                self.stats[c] = raw.with_fill(float(fill))
+            else:
+                self.stats[c] = raw
+        return self
+
+    def prepare(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Features listas para escalar: 0->NaN e imputación con los valores ajustados"""
+        X = self._features(chunk)
+        return X.fillna(self.fill_values) if self.fill_values else X
+
+    def null_counts(self) -> Dict[str, int]:
+        return {c: s.nulls for c, s in self.raw.items()}
+
+
+class MinMaxScaler:
+    """Escala cada columna a [0, 1] con el min/max del ajuste"""
+
+    def __init__(self, stats: StreamingStats):
+        self.min = pd.Series({c: s.min for c, s in stats.stats.items()})
+        span = pd.Series({c: s.max - s.min for c, s in stats.stats.items()})
+        self.scale = span.where(span != 0, 1.0)
+
+    def transform(self, X: pd.DataFrame) -> pd.DataFrame:
+        return (X - self.min) / self.scale
+
+
+class StandardScaler:
+    """Z-score con media y desviación estándar poblacional del ajuste"""
+
+    def __init__(self, stats: StreamingStats):
+        self.mean = pd.Series({c: s.mean for c, s in stats.stats.items()})
+        std = pd.Series({c: s.std for c, s in stats.stats.items()})
+        self.std = std.where(std != 0, 1.0)
+
+    def transform(self, X: pd.DataFrame) -> pd.DataFrame:
+        return (X - self.mean) / self.std
+
+
+class L2Normalizer:
+    """Normaliza cada fila a norma L2 unitaria (no requiere ajuste)"""
+
+    def transform(self, X: pd.DataFrame) -> pd.DataFrame:
+        norms = np.sqrt((X ** 2).sum(axis=1))
+        return X.div(norms.where(norms != 0, 1.0), axis=0)
+
+
+class Binarizer:
+    """1 si el valor supera el umbral, 0 en otro caso"""
+
+    def __init__(self, threshold: float = 0.0):
+        self.threshold = threshold
+
+    def transform(self, X: pd.DataFrame) -> pd.DataFrame:
+        return (X > self.threshold).astype(int)
+
+
+def iter_csv(path: Union[str, Path], chunksize: int, names: Optional[List[str]] = None) -> Iterable[pd.DataFrame]:
+    """Lee un CSV por bloques (sin encabezado si se dan ``names``)"""
+    header = None if names else 'infer'
+    with pd.read_csv(path, chunksize=chunksize, header=header, names=names) as reader:
+        yield from reader
+
+
+def scale_csv(
+    path: Union[str, Path],
+    out_dir: Union[str, Path],
+    columns: Sequence[str],
+    passthrough: Sequence[str] = (),
+    names: Optional[List[str]] = None,
+    zero_as_null: Sequence[str] = (),
+    impute: Optional[str] = 'median',
+    chunksize: int = 100_000,
+    prefix: str = 'pacientes'
+) -> Dict[str, object]:
+    """
+    Two sequential reads: fit the stats, then write all four outputs in one pass.
+
+    Args:
+        path: Input CSV
+        out_dir: Directory for <prefix>_<output>.csv files
+        columns: Feature columns to scale
+        passthrough: Columns copied unchanged (e.g. the Outcome target)
+        names: Column names for header-less inputs
+        zero_as_null: Columns where 0 means missing
+        impute: Imputation strategy for missing values
+        chunksize: Rows per chunk
+        prefix: Output file prefix
+
+    Returns:
+        Dict with the output paths, null counts and imputation values
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stats = StreamingStats(columns, zero_as_null, impute).fit(iter_csv(path, chunksize, names))
+    minmax, standard = MinMaxScaler(stats), StandardScaler(stats)
+    l2, binary = L2Normalizer(), Binarizer(0.0)
+    paths = {name: out_dir / f"{prefix}_{name}.csv" for name in OUTPUTS}
+
+    first = True
+    for chunk in iter_csv(path, chunksize, names):
+        X = stats.prepare(chunk)
+        extra = chunk[list(passthrough)]
+        X_minmax = minmax.transform(X)
+        # Igual que en el notebook: la binarización se aplica sobre la salida min-max
+        frames = {
+            'minmax': X_minmax,
+            'standardized': standard.transform(X),
+            'normalized_l2': l2.transform(X),
+            'binary_threshold0': binary.transform(X_minmax),
+        }
+        for name, frame in frames.items():
+            frame.join(extra).to_csv(paths[name], mode='w' if first else 'a', header=first, index=False)
+        first = False
+
+    return {'outputs': paths, 'nulls': stats.null_counts(), 'fill_values': stats.fill_values}
@@ -0,0 +1,3 @@
+"""
+Data profiling for landing tables
+"""
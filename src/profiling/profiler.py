@@ -0,0 +1,202 @@
+"""
+Single-pass, mergeable profiler for landing batches
+"""
+import copy
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .sketches import HyperLogLog, QuantileSketch, TopK
+
+# Patrones de validez (fullmatch sobre el valor sin espacios en los extremos)
+PATTERNS = {
+    'curp': r'[A-Z]{4}\d{6}[HM][A-Z]{5}[0-9A-Z]\d',
+    'nss': r'\d{11}',
+    'telefono': r'(?:\+?52)?\d{10}',
+    'email': r'[^@\s]+@[^@\s]+\.[A-Za-z]{2,}',
+}
+
+# Detección automática por nombre de columna
+_PATTERN_HINTS = [
+    ('curp', 'curp'),
+    ('nss', 'nss'),
+    ('telefono', 'telefono'),
+    ('phone', 'telefono'),
+    ('email', 'email'),
+    ('correo', 'email'),
+]
+
+
+def detect_pattern(column: str) -> Optional[str]:
+    name = column.lower()
+    for hint, pattern in _PATTERN_HINTS:
+        if hint in name:
+            return pattern
+    return None
+
+
+@dataclass
+class ColumnProfile:
+    """Estado acumulado de una columna"""
+    name: str
+    pattern: Optional[str] = None
+    count: int = 0
+    nulls: int = 0
+    pattern_checked: int = 0
+    pattern_valid: int = 0
+    distinct: HyperLogLog = field(default_factory=HyperLogLog)
+    top: TopK = field(default_factory=TopK)
+    numeric: Optional[QuantileSketch] = None
+
+    def update(self, values: pd.Series, null_values: Sequence[Any], numeric_text: bool = False) -> None:
+        nulls = values.isna()
+        if null_values and values.dtype == object:
+            nulls |= values.isin(null_values)
+        present = values[~nulls]
+        self.count += len(values)
+        self.nulls += int(nulls.sum())
+        if present.empty:
+            return
+        self.distinct.add(present)
+        self.top.add(present)
+        numbers = None
+        if pd.api.types.is_numeric_dtype(present) and not pd.api.types.is_bool_dtype(present):
+            numbers = present.to_numpy(dtype=np.float64)
+        elif numeric_text and present.dtype == object:
+            numbers = pd.to_numeric(present, errors='coerce').to_numpy(dtype=np.float64)
+            numbers = numbers[~np.isnan(numbers)]
+        if numbers is not None and len(numbers):
+            if self.numeric is None:
+                self.numeric = QuantileSketch()
+            self.numeric.add(numbers)
+        if self.pattern:
+            text = present.astype(str).str.strip()
+            self.pattern_checked += len(text)
+            self.pattern_valid += int(text.str.fullmatch(PATTERNS[self.pattern]).sum())
+
+    def merge(self, other: 'ColumnProfile') -> None:
+        self.count += other.count
+        self.nulls += other.nulls
+        self.pattern_checked += other.pattern_checked
+        self.pattern_valid += other.pattern_valid
+        self.distinct.merge(other.distinct)
+        self.top.merge(other.top)
+        if other.numeric is not None:
+            if self.numeric is None:
+                self.numeric = QuantileSketch()
+            self.numeric.merge(other.numeric)
+
+    def summary(self, quantiles: Sequence[float]) -> Dict[str, Any]:
+        result = {
+            'count': self.count,
+            'null_rate': self.nulls / self.count if self.count else 0.0,
+            'distinct_estimate': int(round(self.distinct.estimate())),
+            'top': self.top.top(),
+        }
+        if self.pattern:
+            result['pattern'] = self.pattern
+            result['validity_rate'] = (self.pattern_valid / self.pattern_checked
+                                       if self.pattern_checked else None)
+        if self.numeric is not None and self.numeric.count:
+            result['min'] = self.numeric.min
+            result['max'] = self.numeric.max
+            result['quantiles'] = {q: self.numeric.quantile(q) for q in quantiles}
+        return result
+
+
+class TableProfiler:
+    """
+    Profiles a landing table batch by batch, in a single pass.
+
+    Each batch updates per-column sketches: null rate, HyperLogLog distinct
+    estimate, top-k values, regex validity (CURP, NSS, phone, email) and
+    min/max/quantiles for numeric columns. Profilers built by parallel
+    workers over disjoint batches combine with ``merge``.
+    """
+
+    def __init__(
+        self,
+        patterns: Optional[Mapping[str, str]] = None,
+        null_values: Sequence[Any] = ('',),
+        quantiles: Sequence[float] = (0.05, 0.25, 0.5, 0.75, 0.95),
+        auto_patterns: bool = True,
+        numeric_text: bool = False
+    ):
+        """
+        Initialize the profiler.
+
+        Args:
+            patterns: Column -> pattern name (keys of PATTERNS)
+            null_values: Extra values treated as null in text columns
+            quantiles: Quantiles reported for numeric columns
+            auto_patterns: Detect patterns from column names when not given
+            numeric_text: Text values that parse as numbers also feed
+                min/max/quantiles (batches read as str, see profile_csv)
+        """
+        unknown = set((patterns or {}).values()) - set(PATTERNS)
+        if unknown:
+            raise ValueError(f"Unknown patterns: {sorted(unknown)}")
+        self.patterns = dict(patterns or {})
+        self.null_values = list(null_values)
+        self.quantiles = list(quantiles)
+        self.auto_patterns = auto_patterns
+        self.numeric_text = numeric_text
+        self.rows = 0
+        self.columns: Dict[str, ColumnProfile] = {}
+
+    def _column(self, name: str) -> ColumnProfile:
+        if name not in self.columns:
+            pattern = self.patterns.get(name)
+            if pattern is None and self.auto_patterns:
+                pattern = detect_pattern(name)
+            self.columns[name] = ColumnProfile(name=name, pattern=pattern)
+        return self.columns[name]
+
+    def update(self, batch: pd.DataFrame) -> 'TableProfiler':
+        """Incorporate one batch (DataFrame or anything with ``to_pandas``)"""
+        if hasattr(batch, 'to_pandas'):
+            batch = batch.to_pandas()
+        self.rows += len(batch)
+        for name in batch.columns:
+            self._column(str(name)).update(batch[name], self.null_values, self.numeric_text)
+        return self
+
+    def update_all(self, batches: Iterable[pd.DataFrame]) -> 'TableProfiler':
+        for batch in batches:
+            self.update(batch)
+        return self
+
+    def merge(self, other: 'TableProfiler') -> 'TableProfiler':
+        """Combine the profile of another worker into this one"""
+        self.rows += other.rows
+        for name, col in other.columns.items():
+            if name in self.columns:
+                self.columns[name].merge(col)
+            else:
+                # Copia: los perfiles de ``other`` siguen siendo suyos
+                self.columns[name] = copy.deepcopy(col)
+        return self
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'rows': self.rows,
+            'columns': {name: col.summary(self.quantiles) for name, col in self.columns.items()},
+        }
+
+
+def profile_csv(path: str, chunksize: int = 100_000, **kwargs) -> Dict[str, Any]:
+    """
+    Profile a CSV file chunk by chunk without loading it whole.
+
+    Chunks are read as text: with inferred dtypes a column can be int in one
+    chunk and object in another (a dirty value further down), and ``0`` and
+    ``'0'`` would count as different values. Numbers are parsed from the text
+    for min/max/quantiles.
+    """
+    kwargs.setdefault('numeric_text', True)
+    profiler = TableProfiler(**kwargs)
+    with pd.read_csv(path, chunksize=chunksize, dtype=str) as reader:
+        profiler.update_all(reader)
+    return profiler.summary()
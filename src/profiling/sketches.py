@@ -0,0 +1,193 @@
+"""
+Mergeable streaming sketches: distinct counts, heavy hitters and quantiles
+"""
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def _hash(values: pd.Series) -> np.ndarray:
+    return pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+
+
+def _hash_numbers(values: np.ndarray) -> np.ndarray:
+    """Números enteros como int64 (3.0 -> 3), el resto como float64"""
+    values = np.asarray(values, dtype=np.float64)
+    integral = np.isfinite(values) & (values == np.floor(values)) & (np.abs(values) < 2.0 ** 63)
+    out = np.empty(len(values), dtype=np.uint64)
+    out[integral] = _hash(pd.Series(values[integral].astype(np.int64)))
+    out[~integral] = _hash(pd.Series(values[~integral]))
+    return out
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float, np.number)) and not isinstance(value, (bool, np.bool_))
+
+
+def hash_values(values: pd.Series) -> np.ndarray:
+    """
+    Hash de 64 bits estable entre procesos (necesario para combinar sketches).
+
+    El hash no depende del dtype: 3 en int64, 3.0 en float64 (la misma
+    columna en un lote con NaN) y un 3 en una columna object coinciden.
+    """
+    if pd.api.types.is_bool_dtype(values):
+        return _hash(values)
+    if pd.api.types.is_integer_dtype(values) and not values.hasnans:
+        if values.dtype == np.uint64 and len(values) and values.max() >= 2 ** 63:
+            return _hash(values)
+        return _hash(values.astype(np.int64))
+    if pd.api.types.is_numeric_dtype(values):
+        return _hash_numbers(values.to_numpy(dtype=np.float64, na_value=np.nan))
+    out = _hash(values)
+    if values.dtype == object:
+        numbers = values.map(_is_number).to_numpy(dtype=bool)
+        if numbers.any():
+            out[numbers] = _hash_numbers(values[numbers].to_numpy(dtype=np.float64))
+    return out
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct-count estimator with ``2**p`` one-byte registers.
+
+    Relative error is about ``1.04 / sqrt(2**p)`` (~0.8% for p=14, 16 KB).
+    Two sketches with the same ``p`` merge by register-wise maximum.
+    """
+
+    def __init__(self, p: int = 14):
+        if not 4 <= p <= 18:
+            raise ValueError("p must be between 4 and 18")
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        if len(hashes) == 0:
+            return
+        hashes = hashes.astype(np.uint64, copy=False)
+        idx = (hashes >> np.uint64(64 - self.p)).astype(np.intp)
+        # Bits restantes con un bit centinela para acotar el conteo de ceros
+        rest = (hashes << np.uint64(self.p)) | np.uint64(1 << (self.p - 1))
+        _, exponent = np.frexp(rest.astype(np.float64))
+        rho = (65 - exponent).astype(np.uint8)  # ceros a la izquierda + 1
+        np.maximum.at(self.registers, idx, rho)
+
+    def add(self, values: pd.Series) -> None:
+        self.add_hashes(hash_values(values))
+
+    def merge(self, other: 'HyperLogLog') -> None:
+        if other.p != self.p:
+            raise ValueError("Cannot merge HyperLogLog sketches with different p")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> float:
+        m = float(len(self.registers))
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return m * np.log(m / zeros)  # corrección de rango pequeño (linear counting)
+        return float(raw)
+
+
+class TopK:
+    """
+    Heavy-hitter counter (Misra-Gries style) keeping at most ``capacity`` keys.
+
+    Counts of values that survive are exact lower bounds; values evicted
+    while rare may be undercounted. Batches are pre-aggregated with
+    ``value_counts`` so the Python-level work is per distinct value.
+    """
+
+    def __init__(self, k: int = 10, capacity: Optional[int] = None):
+        self.k = k
+        self.capacity = capacity or max(k * 20, 100)
+        self.counts: Dict[Hashable, int] = {}
+
+    def update_counts(self, counts: Dict[Hashable, int]) -> None:
+        for value, count in counts.items():
+            self.counts[value] = self.counts.get(value, 0) + int(count)
+        if len(self.counts) > self.capacity:
+            # Decremento Misra-Gries: restar el conteo en la posición de corte
+            ordered = sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)
+            cutoff = ordered[self.capacity][1]
+            self.counts = {v: c - cutoff for v, c in ordered[:self.capacity] if c > cutoff}
+
+    def add(self, values: pd.Series) -> None:
+        counts = values.value_counts(dropna=True)
+        if len(counts) > self.capacity:
+            # Recorte Misra-Gries del lote antes de pasar a Python (columnas casi únicas)
+            cutoff = counts.iloc[self.capacity]
+            counts = counts[counts > cutoff] - cutoff
+        self.update_counts(counts.to_dict())
+
+    def merge(self, other: 'TopK') -> None:
+        self.update_counts(other.counts)
+
+    def top(self) -> List[Tuple[Hashable, int]]:
+        return sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)[:self.k]
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with exact min/max.
+
+    Keeps at most ``size`` weighted centroids; when full, adjacent centroids
+    (in value order) are merged pairwise. Rank error grows with
+    ``log2(n / size)`` compactions, which is ample for profiling.
+    """
+
+    def __init__(self, size: int = 512):
+        self.size = size
+        self.means = np.empty(0, dtype=np.float64)
+        self.weights = np.empty(0, dtype=np.float64)
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def add(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        values = np.sort(values)
+        # Resumir el lote en <= size centroides de igual peso antes de combinar
+        starts = np.unique(np.linspace(0, len(values), min(self.size, len(values)) + 1).astype(np.intp)[:-1])
+        weights = np.diff(np.append(starts, len(values))).astype(np.float64)
+        self._combine(np.add.reduceat(values, starts) / weights, weights)
+
+    def merge(self, other: 'QuantileSketch') -> None:
+        if other.count == 0:
+            return
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._combine(other.means, other.weights)
+
+    def _combine(self, means: np.ndarray, weights: np.ndarray) -> None:
+        means = np.concatenate([self.means, means])
+        weights = np.concatenate([self.weights, weights])
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        while len(means) > self.size:
+            if len(means) % 2:
+                means, weights = np.append(means, 0.0), np.append(weights, 0.0)
+            w = weights[0::2] + weights[1::2]
+            means = np.divide(means[0::2] * weights[0::2] + means[1::2] * weights[1::2], w,
+                              out=means[0::2].copy(), where=w > 0)
+            weights = w
+        self.means, self.weights = means, weights
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.count == 0:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        cum = np.cumsum(self.weights) - self.weights / 2
+        return float(np.clip(np.interp(q * self.count, cum, self.means), self.min, self.max))
@@ -3,8 +3,6 @@ Command-line interface for generating COVID-19 dummy data
 """
 import argparse
 import os
-from .covid_graph_generator import CovidGraphGenerator
-from .covid_graph_querier import CovidGraphQuerier
 
 def main():
     parser = argparse.ArgumentParser(
@@ -44,6 +42,10 @@ def main():
             "Neo4j password must be provided via --password or NEO4J_PASSWORD env var"
         )
 
+    # neo4j y faker se cargan solo al generar datos (no para --help)
+    from .covid_graph_generator import CovidGraphGenerator
+    from .covid_graph_querier import CovidGraphQuerier
+
     # Generate data
     generator = CovidGraphGenerator(
         uri=args.uri,
@@ -0,0 +1,35 @@
+"""
+Fixtures shared across test modules
+"""
+import shutil
+from pathlib import Path
+import pandas as pd
+import pytest
+from benchmarks.synthetic import write_siglo21_sql
+from src.etl.patients_integration import load_siglo21_sql
+
+P1 = Path(__file__).parent.parent / 'p1'
+
+@pytest.fixture
+def fuentes(tmp_path):
+    """Directorio con Siglo21 (sintético), ABC (p1) y un Medica Sur mínimo"""
+    write_siglo21_sql(tmp_path / 'PacientesSiglo21-mysql.sql', 300)
+    shutil.copy(P1 / 'PacientesHospitalABC.json', tmp_path)
+    # Medica Sur repite un paciente de Siglo21 con otro NSS de formato
+    siglo = load_siglo21_sql(tmp_path / 'PacientesSiglo21-mysql.sql').iloc[0]
+    pd.DataFrame({
+        'NoPaciente': [f"NSS-{siglo['NSS']}", '12345678', '99'],
+        'NombreCompleto': [f"{siglo['NOMBRE']} {siglo['APELLIDO']}", 'Ana Pérez', 'Solo'],
+        'ubicacion': ['Calle 1', 'Calle 2', 'Calle 3'],
+    }).to_csv(tmp_path / 'PacientesMedicaSurCSV.csv', index=False)
+    return tmp_path
+
+@pytest.fixture
+def gpo_angeles():
+    """Grupo Angeles con claves sucias, nombre vacío y sin dirección"""
+    return pd.DataFrame({
+        'IdPaciente': [1001, 1002, 'GA-1003', None, 1001],
+        'Nombre': ['Luis', 'María José', None, 'Eva', 'Luis'],
+        'ApellidoPaterno': ['Gómez', ' Ruiz ', 'Soto', 'Paz', 'Gómez'],
+        'Direccion': ['Av. 1', None, 'Av. 3', 'Av. 4', 'Av. 1'],
+    })
@@ -0,0 +1,126 @@
+"""
+Tests for the Arrow batch interchange format
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from datetime import date
+import pandas as pd
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+
+from benchmarks.differential import dirty_patients_frame
+from benchmarks.synthetic import patient_models
+from src.cleansing.rules import CleansingEngine
+from src.etl.arrow_batch import ArrowBatch, schema_for
+from src.etl.metrics import RunMetrics
+from src.etl.patients_integration import deduplicate
+from src.etl.patients_integration import load_siglo21_sql
+from src.etl.pipeline import DEFAULT_SOURCES, SourceSpec, integrate_sources, integrate_sources_arrow
+from src.mapping.compiler import load_mapping
+from src.models.landing.schemas import CasoCovidLanding, PacienteFederadoLanding, TextoCasoLanding
+
+def _dumps(models):
+    return [m.model_dump() for m in models]
+
+def test_schema_follows_model():
+    schema = schema_for(PacienteFederadoLanding)
+    assert schema.field('pac_clave').type == pa.int64() and not schema.field('pac_clave').nullable
+    assert schema.field('apePatPac').nullable
+    assert schema_for(CasoCovidLanding).field('fecha_def').type == pa.date32()
+    assert schema_for(CasoCovidLanding).field('diabetes').type == pa.bool_()
+    assert schema_for(TextoCasoLanding).field('keywords').type == pa.list_(pa.string())
+
+def test_models_roundtrip_and_dedup():
+    pacientes = patient_models(2000)
+    batch = ArrowBatch.from_models(pacientes)
+    assert len(batch) == 2000
+    assert _dumps(batch.to_models()) == _dumps(pacientes)
+    assert _dumps(batch.drop_duplicates().to_models()) == _dumps(deduplicate(pacientes))
+
+def test_other_models_roundtrip():
+    texto = TextoCasoLanding(texto_completo='x', fecha_extraccion=date(2023, 6, 25), entidad='JALISCO',
+                             keywords=['FIEBRE', 'TOS'], source_file='a.txt')
+    batch = ArrowBatch.from_models([texto])
+    assert batch.to_models()[0] == texto
+
+def test_pandas_and_mapping_interop():
+    result = load_mapping('siglo21').run(dirty_patients_frame(500, seed=3))
+    batch = ArrowBatch.from_pandas(result.frame)
+    assert _dumps(batch.to_models()) == _dumps(result.to_models())
+    # Mapping y limpieza aceptan la tabla directamente
+    again = load_mapping('abc').run(batch.table.rename_columns(
+        ['NSS', 'NOMBRE', 'APELLIDO', 'apeMat', 'Direccion', 'HospOrigen']))
+    assert again.report.rows_out == len(batch)
+    assert len(CleansingEngine([]).apply(batch.table)) == len(batch)
+    assert batch.to_pandas()['pac_clave'].tolist() == result.frame['pac_clave'].tolist()
+
+def test_concat_slice_and_empty():
+    a, b = ArrowBatch.from_models(patient_models(10, seed=1)), ArrowBatch.from_models(patient_models(5, seed=2))
+    both = ArrowBatch.concat([a, b])
+    assert len(both) == 15 and both.table.column(0).num_chunks == 2
+    assert _dumps(both.slice(10).to_models()) == _dumps(b.to_models())
+    assert len(ArrowBatch.concat([])) == 0
+    assert len(ArrowBatch.from_models([]).drop_duplicates()) == 0
+
+def _produce(directory):
+    return ArrowBatch.from_models(patient_models(300, seed=7)).to_shared(directory)
+
+def test_shared_ipc_between_processes(tmp_path):
+    with ProcessPoolExecutor(1) as pool:
+        path = pool.submit(_produce, tmp_path).result()
+    batch = ArrowBatch.open_ipc(path)
+    ArrowBatch.release(path)
+    assert not path.exists()
+    assert _dumps(batch.to_models()) == _dumps(patient_models(300, seed=7))
+
+def test_integrate_sources_arrow_matches_models(fuentes, tmp_path):
+    metrics = RunMetrics()
+    shared = tmp_path / 'shm'
+    shared.mkdir()
+    batch = integrate_sources_arrow(fuentes, metrics=metrics, shared_dir=shared)
+    assert _dumps(batch.to_models()) == _dumps(integrate_sources(fuentes))
+    assert metrics.get('deduplicate').rows_out == len(batch)
+    assert metrics.get('load:Siglo21').rows_in == 300
+    assert list(shared.iterdir()) == []  # lotes compartidos liberados
+
+@pytest.mark.parametrize('formato', ['csv', 'xlsx'])
+def test_gpo_angeles_paths_match(gpo_angeles, tmp_path, formato):
+    # Plan compilado (Arrow) contra map_gpo_angeles (modelos) sobre la misma fuente
+    spec = DEFAULT_SOURCES[3]
+    if formato == 'xlsx':
+        pytest.importorskip('openpyxl')
+        gpo_angeles.to_excel(tmp_path / spec.filename, index=False)
+    else:
+        spec = replace(spec, filename='PacientesGpoAngeles.csv', load=pd.read_csv)
+        gpo_angeles.to_csv(tmp_path / spec.filename, index=False)
+    arrow_metrics, model_metrics = RunMetrics(), RunMetrics()
+    batch = integrate_sources_arrow(tmp_path, [spec], metrics=arrow_metrics, shared_dir=tmp_path / 'shm')
+    esperado = integrate_sources(tmp_path, [spec], metrics=model_metrics)
+    assert len(esperado) == 2
+    assert _dumps(batch.to_models()) == _dumps(esperado)
+    arrow_stage, model_stage = (m.get('apply_mapping:GpoAngeles') for m in (arrow_metrics, model_metrics))
+    assert (arrow_stage.rows_in, arrow_stage.rows_out) == (model_stage.rows_in, model_stage.rows_out)
+
+def _no_models(df, metrics=None):
+    raise AssertionError('the Arrow path must not build models for a compiled source')
+
+def _boom(path):
+    raise RuntimeError('fuente corrupta')
+
+def test_compiled_sources_skip_models(fuentes, tmp_path):
+    siglo = SourceSpec('Siglo21', 'PacientesSiglo21-mysql.sql', load_siglo21_sql, _no_models, 'thread', 'siglo21')
+    metrics = RunMetrics()
+    batch = integrate_sources_arrow(fuentes, [siglo], metrics=metrics, shared_dir=tmp_path / 'shm')
+    esperado = integrate_sources(fuentes, DEFAULT_SOURCES[:1])
+    assert _dumps(batch.to_models()) == _dumps(esperado)
+    stage = metrics.get('apply_mapping:Siglo21')
+    assert stage.rows_in == 300 and stage.error_count == stage.rows_rejected
+
+def test_shared_files_released_when_a_source_fails(fuentes, tmp_path):
+    # La fuente que falla va primero: el lote de Siglo21 ya escrito por otro proceso no debe quedar
+    roto = SourceSpec('Roto', 'PacientesHospitalABC.json', _boom, _no_models, 'process', 'abc')
+    shared = tmp_path / 'shm'
+    with pytest.raises(RuntimeError, match='fuente corrupta'):
+        integrate_sources_arrow(fuentes, [roto, DEFAULT_SOURCES[0]], shared_dir=shared, max_processes=2)
+    assert list(shared.iterdir()) == []
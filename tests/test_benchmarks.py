@@ -0,0 +1,38 @@
+"""
+Smoke tests for the benchmark harness (tiny sizes, in-process)
+"""
+import pytest
+from benchmarks.run import CASES, _run_case, compare
+
+@pytest.mark.parametrize('name', sorted(CASES))
+def test_case_runs(name):
+    result = _run_case(name, 64, repeat=1)
+    assert result['name'] == name
+    assert result['rows'] > 0
+    assert result['seconds'] >= 0
+
+def test_peak_excludes_setup(monkeypatch):
+    import numpy as np
+    from benchmarks import run
+
+    def case(rows, workdir):
+        entrada = np.ones(40 * 2**20, dtype=np.uint8)  # 40 MiB de "setup"
+        entrada[::4096] = 2
+        del entrada
+        return (lambda: None), rows
+
+    monkeypatch.setitem(run.CASES, 'setup_pesado', case)
+    result = _run_case('setup_pesado', 1, repeat=1)
+    if not result['peak_is_run_only']:
+        pytest.skip('el SO no permite reiniciar el pico de RSS')
+    assert result['setup_peak_rss_bytes'] - result['peak_rss_bytes'] > 30 * 2**20
+    assert result['peak_delta_bytes'] < 10 * 2**20
+
+def test_compare_flags_regressions():
+    baseline = {'results': [{'name': 'deduplicate', 'rows': 10, 'rows_per_sec': 1000.0},
+                            {'name': 'apply_mapping', 'rows': 10, 'rows_per_sec': 1000.0}]}
+    current = {'results': [{'name': 'deduplicate', 'rows': 10, 'rows_per_sec': 500.0},
+                           {'name': 'apply_mapping', 'rows': 10, 'rows_per_sec': 900.0}]}
+    regressions = compare(current, baseline, tolerance=0.2)
+    assert len(regressions) == 1
+    assert regressions[0].startswith('deduplicate')
@@ -0,0 +1,85 @@
+"""
+Tests for the pac_clave bitmaps
+"""
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pytest
+from benchmarks.synthetic import patient_models
+from src.etl.patients_integration import actividad6_estadisticas
+from src.lookup.bitmap import CLAVE_SPACE, ClaveBitmap, HospitalBitmaps
+
+def _duplicados_sets(pacientes):
+    claves = {}
+    for p in pacientes:
+        claves.setdefault(p.pac_clave, set()).add(p.HospOrigen)
+    return sum(1 for h in claves.values() if len(h) > 1)
+
+def _contains_in_child(path, claves):
+    # Proceso hijo: abre el archivo en solo lectura, sin cargar pacientes
+    bitmap = ClaveBitmap.open(path)
+    return [bitmap.contains(c) for c in claves], len(bitmap)
+
+def test_membership():
+    bitmap = ClaveBitmap.empty(1000)
+    bitmap.add([0, 7, 8, 999])
+    bitmap.add(500)
+    assert 7 in bitmap and 500 in bitmap and 999 in bitmap
+    assert 6 not in bitmap and 1000 not in bitmap and -1 not in bitmap
+    assert len(bitmap) == 5
+    assert bitmap.contains_many(np.array([0, 1, 8, -5, 5000])).tolist() == [True, False, True, False, False]
+    assert bitmap.to_array().tolist() == [0, 7, 8, 500, 999]
+
+def test_out_of_range_rejected():
+    bitmap = ClaveBitmap.empty(100)
+    with pytest.raises(ValueError):
+        bitmap.add([5, 100])
+    with pytest.raises(ValueError):
+        bitmap.add(-1)
+
+def test_full_space_file_size(tmp_path):
+    bitmap = ClaveBitmap.create(tmp_path / 'h.bits')
+    bitmap.add([0, CLAVE_SPACE - 1])
+    bitmap.flush()
+    assert (tmp_path / 'h.bits').stat().st_size == 12_500_000
+    reopened = ClaveBitmap.open(tmp_path / 'h.bits')
+    assert reopened.capacity == CLAVE_SPACE
+    assert CLAVE_SPACE - 1 in reopened and 1 not in reopened
+
+def test_shared_read_only_across_processes(tmp_path):
+    pacientes = patient_models(2000, seed=3)
+    built = HospitalBitmaps.build(pacientes, tmp_path / 'fed')
+    hospital, bitmap = next(iter(built.bitmaps.items()))
+    claves = [p.pac_clave for p in pacientes[:50]]
+    path = tmp_path / 'fed' / f'{hospital}.bits'
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        results = list(pool.map(_contains_in_child, [path, path], [claves, claves]))
+    expected = [bitmap.contains(c) for c in claves]
+    assert all(r == (expected, len(bitmap)) for r in results)
+    with pytest.raises(ValueError):
+        ClaveBitmap.open(path).add([1])  # memmap en modo 'r'
+
+def test_hospital_bitmaps_match_sets(tmp_path):
+    pacientes = patient_models(3000, seed=1)
+    por_hospital = {}
+    for p in pacientes:
+        por_hospital.setdefault(p.HospOrigen, set()).add(p.pac_clave)
+
+    HospitalBitmaps.build(pacientes, tmp_path / 'fed')
+    bitmaps = HospitalBitmaps.open(tmp_path / 'fed')
+    assert bitmaps.counts() == {h: len(c) for h, c in por_hospital.items()}
+    for (a, b), n in bitmaps.intersection_counts().items():
+        assert n == len(por_hospital[a] & por_hospital[b])
+    assert bitmaps.duplicados_entre_hospitales() == _duplicados_sets(pacientes)
+
+    clave = pacientes[0].pac_clave
+    assert bitmaps.hospitals_of(clave) == sorted(h for h, c in por_hospital.items() if clave in c)
+    assert bitmaps.contains(clave) and bitmaps.contains(clave, pacientes[0].HospOrigen)
+    assert not bitmaps.contains(clave, 'NoExiste')
+
+def test_estadisticas_unchanged():
+    pacientes = patient_models(5000, seed=7)
+    # Clave fuera del espacio de 8 dígitos: sigue contando por la vía de sets
+    extra = [p.model_copy(update={'pac_clave': 10 ** 9, 'HospOrigen': h})
+             for p, h in zip(pacientes[:2], ('A', 'B'))]
+    for muestra in (pacientes, pacientes + extra, pacientes[:1], []):
+        assert actividad6_estadisticas(muestra)['duplicados_entre_hospitales'] == _duplicados_sets(muestra)
@@ -0,0 +1,51 @@
+"""
+Tests for snapshot change-data-capture
+"""
+from benchmarks.synthetic import patient_models
+from src.etl.cdc import SnapshotStore, apply_deltas, diff_snapshot, record_key
+from src.etl.patients_integration import deduplicate
+
+def _state(pacientes):
+    state = {}
+    for p in pacientes:
+        state.setdefault(record_key(p), []).append(p.model_dump(mode='json'))
+    return state
+
+def test_publish_emits_only_changes(tmp_path):
+    store = SnapshotStore(tmp_path)
+    v1 = deduplicate(patient_models(500, seed=1))
+    first = store.publish(v1, 'r1')
+    assert len(first.inserts) == len(_state(v1)) and not first.updates and not first.deletes
+
+    v2 = list(v1)
+    v2[0] = v2[0].model_copy(update={'direccion': 'NUEVA DIRECCION 1'})
+    removed = v2.pop(1)
+    nuevo = v1[2].model_copy(update={'pac_clave': 99999999, 'HospOrigen': 'GpoAngeles'})
+    v2.append(nuevo)
+    diff = store.publish(list(reversed(v2)), 'r2')  # el orden no genera cambios
+    # quitar un registro borra su clave, o la actualiza si la clave tiene más registros
+    removed_key = record_key(removed)
+    still_there = removed_key in _state(v2)
+    assert set(diff.updates) == {record_key(v2[0])} | ({removed_key} if still_there else set())
+    assert set(diff.inserts) == {record_key(nuevo)}
+    assert diff.deletes == ([] if still_there else [removed_key])
+    assert diff.unchanged + len(diff.inserts) + len(diff.updates) == len(_state(v2))
+
+    # el consumidor llega al mismo estado aplicando solo los deltas
+    consumer = _state(v1)
+    apply_deltas(consumer, store.read_deltas('r2'))
+    assert {k: sorted(map(str, v)) for k, v in consumer.items()} == \
+        {k: sorted(map(str, v)) for k, v in _state(v2).items()}
+
+def test_republish_same_snapshot_is_empty(tmp_path):
+    store = SnapshotStore(tmp_path)
+    pacientes = patient_models(200)
+    store.publish(pacientes, 'a')
+    diff = store.publish(pacientes, 'b')
+    assert diff.changes == 0
+    assert store.read_deltas('b') == []
+
+def test_delete_whole_key():
+    previous = diff_snapshot({}, patient_models(50)).snapshot
+    diff = diff_snapshot(previous, [])
+    assert sorted(diff.deletes) == sorted(previous)
@@ -0,0 +1,114 @@
+"""
+Tests for checkpointed, resumable ETL stages
+"""
+import json
+import shutil
+import pytest
+from pathlib import Path
+from benchmarks.synthetic import relational_frame, write_relational_file, write_siglo21_sql
+from src.etl.checkpoint import (
+    CheckpointStore, ingest_relational_checkpointed, integrate_sources_checkpointed, iter_csv_batches,
+)
+from src.etl.ingestion import CovidDataIngester
+from src.etl.metrics import RunMetrics
+from src.etl.pipeline import integrate_sources
+
+P1 = Path(__file__).parent.parent / 'p1'
+
+@pytest.fixture
+def data_path(tmp_path):
+    return write_relational_file(tmp_path / 'data', 1050, seed=2)
+
+def _dump(models):
+    return [m.model_dump() for m in models]
+
+def test_csv_batches_cover_file_once(tmp_path):
+    path = tmp_path / 'x.csv'
+    path.write_bytes(b'a,b\n1,"x\ny"\n2,z\n3,w\n')
+    batches = list(iter_csv_batches(path, 2))
+    assert [body for _, _, _, body in batches] == [b'1,"x\ny"\n2,z\n', b'3,w\n']
+    resumed = list(iter_csv_batches(path, 2, start_offset=batches[0][1]))
+    assert resumed == batches[1:]
+
+def test_resume_after_failure_matches_full_run(data_path, tmp_path):
+    esperado = CovidDataIngester(str(data_path)).ingest_relational_data()
+
+    store = CheckpointStore(tmp_path / 'state.json')
+    ingester = CovidDataIngester(str(data_path))
+    calls = []
+    original = ingester.relational_frame_to_models
+
+    def flaky(df, stage):
+        calls.append(len(df))
+        if len(calls) == 3:
+            raise RuntimeError('worker lost')
+        return original(df, stage)
+
+    ingester.relational_frame_to_models = flaky
+    with pytest.raises(RuntimeError):
+        ingest_relational_checkpointed(ingester, store, tmp_path / 'out', batch_rows=200)
+    state = json.loads((tmp_path / 'state.json').read_text())
+    batches = state['stages']['ingest_relational_data']['batches']
+    assert [b['rows_in'] for b in batches] == [200, 200]
+    assert not state['stages']['ingest_relational_data']['done']
+
+    # Reinicio: proceso nuevo, mismo archivo de estado
+    calls.clear()
+    restarted = CovidDataIngester(str(data_path))
+    restarted.relational_frame_to_models = lambda df, stage: calls.append(len(df)) or original(df, stage)
+    casos = ingest_relational_checkpointed(restarted, CheckpointStore(tmp_path / 'state.json'),
+                                           tmp_path / 'out', batch_rows=200)
+    assert calls == [200, 200, 200, 50]
+    assert _dump(casos) == _dump(esperado)
+
+    # Tercera corrida: todo confirmado, no se reprocesa nada
+    calls.clear()
+    again = ingest_relational_checkpointed(restarted, CheckpointStore(tmp_path / 'state.json'),
+                                           tmp_path / 'out', batch_rows=200)
+    assert calls == [] and _dump(again) == _dump(esperado)
+
+def test_batches_use_whole_file_dtypes(tmp_path):
+    # Blancos solo en el último lote: leídos por separado, los demás lotes inferirían int
+    df = relational_frame(1050, seed=2)
+    df['RESULTADO_PCR'] = df['RESULTADO_PCR'].astype(object)
+    df.loc[df.index[-5:], 'RESULTADO_PCR'] = None
+    df.loc[df.index[-3:], 'PAIS_ORIGEN'] = None
+    (tmp_path / 'data' / 'Relational').mkdir(parents=True)
+    df.to_csv(tmp_path / 'data' / 'Relational' / 'COVID19MEXICO.csv', index=False)
+    esperado = CovidDataIngester(str(tmp_path / 'data')).ingest_relational_data()
+    casos = ingest_relational_checkpointed(CovidDataIngester(str(tmp_path / 'data')),
+                                           CheckpointStore(tmp_path / 'state.json'), tmp_path / 'out',
+                                           batch_rows=200)
+    assert _dump(casos) == _dump(esperado)
+    assert {c.resultado for c in esperado} <= {'1', '2', '3', '4', '5', '97'}
+    # Los "no especificado" (97/98/99 -> None) sobreviven a la salida JSON de cada lote
+    assert any(c.embarazo is None for c in casos)
+
+def test_changed_source_restarts_stage(data_path, tmp_path):
+    store = CheckpointStore(tmp_path / 'state.json')
+    ingester = CovidDataIngester(str(data_path))
+    ingest_relational_checkpointed(ingester, store, tmp_path / 'out', batch_rows=500, max_batches=1)
+    assert len(store.batches('ingest_relational_data')) == 1
+    write_relational_file(data_path, 300, seed=9)
+    casos = ingest_relational_checkpointed(ingester, store, tmp_path / 'out', batch_rows=500)
+    assert len(store.batches('ingest_relational_data')) == 1
+    assert _dump(casos) == _dump(CovidDataIngester(str(data_path)).ingest_relational_data())
+
+def test_patient_sources_resume(tmp_path):
+    fuentes = tmp_path / 'p1'
+    fuentes.mkdir()
+    write_siglo21_sql(fuentes / 'PacientesSiglo21-mysql.sql', 200)
+    shutil.copy(P1 / 'PacientesHospitalABC.json', fuentes)
+    store = CheckpointStore(tmp_path / 'state.json')
+    pacientes = integrate_sources_checkpointed(store, tmp_path / 'out', fuentes)
+    assert _dump(pacientes) == _dump(integrate_sources(fuentes))
+    assert store.state['stages']['source:Siglo21']['done']
+    # Simular caída durante ABC: solo ABC se vuelve a cargar
+    store.state['stages']['source:ABC']['done'] = False
+    store.state['stages']['source:ABC']['batches'] = []
+    store._save()
+    metrics = RunMetrics()
+    again = integrate_sources_checkpointed(CheckpointStore(tmp_path / 'state.json'), tmp_path / 'out',
+                                           fuentes, metrics=metrics)
+    assert _dump(again) == _dump(pacientes)
+    assert metrics.get('load:ABC') is not None and metrics.get('load:Siglo21') is None
@@ -0,0 +1,81 @@
+"""
+Tests for the declarative cleansing engine
+"""
+import pandas as pd
+import pytest
+from pathlib import Path
+from src.cleansing.rules import (CleansingEngine, curp_check_ok, nss_check_ok,
+                                 standardize_address, standardize_phone)
+
+CONFIG = Path(__file__).parent.parent / 'config' / 'cleansing_rules.yml'
+_CURP_DICT = '0123456789ABCDEFGHIJKLMNÑOPQRSTUVWXYZ'
+
+def curp_with_check(body17):
+    """Referencia escalar del dígito verificador RENAPO"""
+    total = sum(_CURP_DICT.index(ch) * (18 - i) for i, ch in enumerate(body17))
+    return body17 + str((10 - total % 10) % 10)
+
+def nss_with_check(body10):
+    """Referencia escalar Luhn para NSS"""
+    total = 0
+    for i, ch in enumerate(body10):
+        d = int(ch) * (2 if i % 2 else 1)
+        total += d // 10 + d % 10
+    return body10 + str((10 - total % 10) % 10)
+
+def test_curp_checksum():
+    validas = [curp_with_check('BADD110313HCMLNS0'), curp_with_check('GOMA800101MDFRRÑ0')]
+    invalida = validas[0][:-1] + str((int(validas[0][-1]) + 1) % 10)
+    result = curp_check_ok(pd.Series(validas + [invalida, 'ABC', None]))
+    assert result.tolist() == [True, True, False, False, False]
+
+def test_nss_checksum():
+    valido = nss_with_check('1234567890')
+    invalido = valido[:-1] + str((int(valido[-1]) + 1) % 10)
+    result = nss_check_ok(pd.Series([valido, f'{valido[:4]}-{valido[4:]}', invalido, '123']))
+    assert result.tolist() == [True, True, False, False]
+
+def test_standardize_phone():
+    result = standardize_phone(pd.Series(['+52 55 1234 5678', '044 55 1234 5678', '(55) 1234-5678', '1234', None]))
+    assert result.tolist()[:3] == ['5512345678'] * 3
+    assert result.isna().tolist() == [False, False, False, True, True]
+
+def test_standardize_address():
+    result = standardize_address(pd.Series(['Apdo.:881-3974 Velit Avenida', '221 Cum C/', '612 Erat Ctra.']))
+    assert result.tolist() == ['APDO 881-3974 VELIT AV', '221 CUM CALLE', '612 ERAT CARR']
+
+def test_engine_counters_and_actions():
+    nss_ok = nss_with_check('1234567890')
+    df = pd.DataFrame({
+        'direccion': ['865-4550 Nunc Calle', 'AV REFORMA 1'],
+        'telefono': ['55-1234-5678', '123'],
+        'curp': [curp_with_check('BADD110313HCMLNS0'), 'MAL'],
+        'nss': [nss_ok, '99999999999'],
+        'edad': [0, 45],
+    })
+    engine = CleansingEngine.from_file(CONFIG)
+    out = engine.apply(df)
+    engine.apply(df)
+    assert out['telefono'].tolist()[0] == '5512345678' and pd.isna(out['telefono'][1])
+    assert out['curp_valid'].tolist() == [True, False]
+    assert out['nss_valid'].tolist() == [True, False]
+    assert pd.isna(out['edad'][0]) and out['edad'][1] == 45
+    assert df['edad'][0] == 0  # el lote original no se modifica
+
+    report = engine.report()
+    assert report['phone:telefono']['calls'] == 2
+    assert report['phone:telefono']['hits'] == 4
+    assert report['curp:curp']['hits'] == 2
+    assert report['to_null:edad']['hits'] == 2
+    assert report['address:direccion']['rows'] == 4
+    assert all(r['seconds'] >= 0 for r in report.values())
+
+def test_null_action_and_invalid_specs():
+    engine = CleansingEngine([{'type': 'nss', 'column': 'nss', 'action': 'null'}])
+    out = engine.apply(pd.DataFrame({'nss': ['123', None]}))
+    assert out['nss'].isna().all()
+    assert engine.report()['nss:nss']['hits'] == 1
+    with pytest.raises(ValueError):
+        CleansingEngine([{'type': 'rfc', 'column': 'x'}])
+    with pytest.raises(ValueError):
+        CleansingEngine([{'type': 'curp', 'column': 'x', 'action': 'drop'}])
@@ -0,0 +1,95 @@
+"""
+Tests for union-find transitive clustering
+"""
+from collections import deque
+import numpy as np
+import pandas as pd
+import pytest
+from src.matching.clustering import UnionFind, assign_clusters, cluster_pairs
+
+def test_transitive_components():
+    # 0-1-2 encadenados, 3-4 juntos, 5 solo
+    res = cluster_pairs([0, 1, 3], [1, 2, 4], n_records=6)
+    assert res.labels.tolist() == [0, 0, 0, 1, 1, 2]
+    assert res.n_clusters == 3
+    assert res.sizes.tolist() == [3, 2, 1]
+
+def test_threshold_filters_weak_links():
+    res = cluster_pairs([0, 1], [1, 2], n_records=3, scores=[0.9, 0.4], threshold=0.5)
+    assert res.labels.tolist() == [0, 0, 1]
+    assert res.links_used == 1
+    with pytest.raises(ValueError):
+        cluster_pairs([0], [1], n_records=2, threshold=0.5)
+
+def test_giant_component_guard_keeps_strongest_links():
+    # Un registro "hub" (0) enlaza con todos; solo sobreviven los 2 enlaces más fuertes
+    left = [0, 0, 0, 0]
+    right = [1, 2, 3, 4]
+    scores = [0.6, 0.95, 0.7, 0.9]
+    res = cluster_pairs(left, right, n_records=5, scores=scores, max_cluster_size=3)
+    assert res.sizes.max() == 3
+    assert res.links_blocked == 2
+    assert res.labels[0] == res.labels[2] == res.labels[4]
+    assert len({res.labels[1], res.labels[3], res.labels[0]}) == 3
+
+def _bfs_labels(left, right, n):
+    """Referencia ingenua: BFS desde cada registro sin visitar, en orden"""
+    adj = [[] for _ in range(n)]
+    for a, b in zip(left, right):
+        adj[a].append(b)
+        adj[b].append(a)
+    labels = [-1] * n
+    next_id = 0
+    for start in range(n):
+        if labels[start] >= 0:
+            continue
+        labels[start] = next_id
+        queue = deque([start])
+        while queue:
+            u = queue.popleft()
+            for v in adj[u]:
+                if labels[v] < 0:
+                    labels[v] = next_id
+                    queue.append(v)
+        next_id += 1
+    return labels
+
+def test_union_find_basics():
+    uf = UnionFind(4)
+    assert uf.union(0, 1)
+    assert uf.union(2, 3)
+    assert uf.find(0) == uf.find(1) != uf.find(2)
+    assert not uf.union(1, 2, max_size=3)
+
+def test_out_of_range_records_rejected():
+    uf = UnionFind(3)
+    for bad in (-1, 3):
+        with pytest.raises(IndexError):
+            uf.find(bad)
+        with pytest.raises(IndexError):
+            uf.union(0, bad)
+    with pytest.raises(IndexError):
+        uf.union_many(np.array([0]), np.array([-1]))
+    with pytest.raises(ValueError):
+        cluster_pairs([0, -1], [1, 2], n_records=3)  # -1 no debe envolver al último
+    with pytest.raises(ValueError):
+        cluster_pairs([0], [3], n_records=3)
+
+def test_assign_clusters_from_multiindex():
+    df = pd.DataFrame({'nombre': ['ANA', 'ANA', 'LUIS', 'ANNA']}, index=[10, 20, 30, 40])
+    pairs = pd.MultiIndex.from_tuples([(10, 20), (20, 40), (10, 30)])
+    out = assign_clusters(df, pairs, scores=np.array([1.0, 0.8, 0.1]), threshold=0.5)
+    assert out['cluster_id'].tolist() == [0, 0, 1, 0]
+    with pytest.raises(KeyError):
+        assign_clusters(df, pd.MultiIndex.from_tuples([(10, 99)]))
+
+def test_large_random_graph_matches_reference():
+    rng = np.random.default_rng(0)
+    n = 5000
+    left, right = rng.integers(0, n, 3000), rng.integers(0, n, 3000)
+    res = cluster_pairs(left, right, n_records=n)
+    assert res.labels.tolist() == _bfs_labels(left.tolist(), right.tolist(), n)
+    assert res.sizes.sum() == n
+    # Con límite (uno por uno) y un límite que no bloquea nada: mismos componentes
+    limited = cluster_pairs(left, right, n_records=n, scores=np.ones(len(left)), max_cluster_size=n)
+    assert limited.labels.tolist() == res.labels.tolist() and limited.links_blocked == 0
@@ -0,0 +1,109 @@
+"""
+Tests for the dictionary-encoded columnar cases
+"""
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from benchmarks.synthetic import relational_frame
+from src.etl.ingestion import CovidDataIngester
+from src.etl.metrics import RunMetrics, StageMetrics
+from src.models.landing.columnar import CasosColumnar, load_catalogs
+
+@pytest.fixture(scope='module')
+def data_path(tmp_path_factory):
+    base = tmp_path_factory.mktemp('covid')
+    df = relational_frame(500, seed=3)
+    df.loc[7, 'EDAD'] = None
+    df.loc[11, 'FECHA_DEF'] = '2021-08-01'
+    (base / 'Relational').mkdir()
+    df.to_csv(base / 'Relational' / 'COVID19MEXICO.csv', index=False)
+    return base
+
+def test_matches_pydantic_ingestion(data_path):
+    metrics = RunMetrics()
+    ingester = CovidDataIngester(str(data_path), metrics=metrics)
+    esperado = ingester.ingest_relational_data()
+    casos = ingester.ingest_relational_columnar()
+    assert len(casos) == len(esperado)
+    assert [c.model_dump() for c in casos.to_models()] == [c.model_dump() for c in esperado]
+    # mismas filas rechazadas y mismos motivos de fechas
+    original = metrics.get('ingest_relational_data').errors
+    encoded = metrics.get('encode_relational').errors
+    assert encoded['FECHA_INGRESO inválida o futura'].count == original['FECHA_INGRESO inválida o futura'].count
+    assert metrics.get('ingest_relational_columnar').rows_rejected == \
+        metrics.get('ingest_relational_data').rows_rejected
+
+def test_memory_per_case(data_path):
+    casos = CovidDataIngester(str(data_path)).ingest_relational_columnar()
+    assert casos.nbytes / len(casos) < 100
+    modelo = casos.to_models()[0]
+    pydantic_bytes = sys.getsizeof(modelo.__dict__) + sum(sys.getsizeof(v) for v in modelo.__dict__.values())
+    assert pydantic_bytes > 10 * casos.nbytes / len(casos)
+    assert casos['sexo'].dtype == np.int8 and casos['municipio_res'].dtype == np.int16
+
+def test_group_by_integer_keys(data_path):
+    df = relational_frame(500, seed=3)
+    casos = CasosColumnar.from_frame(df)
+    por_estado = casos.group_count('entidad_res')
+    kept = df[df['FECHA_INGRESO'] != '9999-99-99']
+    assert {k[0]: v for k, v in por_estado.items()} == kept['ENTIDAD_RES'].value_counts().to_dict()
+    por_mun = casos.group_count('entidad_res', 'municipio_res', where=casos.flag('diabetes') == 1)
+    esperado = kept[kept['DIABETES'] == 1].groupby(['ENTIDAD_RES', 'MUNICIPIO_RES']).size().to_dict()
+    assert por_mun == esperado
+    etiquetas = casos.count_by('sexo')
+    assert set(etiquetas) <= {'MUJER', 'HOMBRE'}
+    assert sum(etiquetas.values()) == len(casos)
+
+def test_flags_and_catalogs():
+    df = relational_frame(50, seed=1)
+    df['DIABETES'] = [1, 2, 97, 98, 99] * 10
+    casos = CasosColumnar.from_frame(df, today=pd.Timestamp('2030-01-01').date())
+    mask = (df['FECHA_INGRESO'] != '9999-99-99').to_numpy()
+    np.testing.assert_array_equal(casos.flag('diabetes'), np.array([1, 0, -1, -1, -1] * 10)[mask])
+    assert casos.unknown_codes().get('resultado', []) in ([], [5])
+    assert set(casos.decode('entidad_res')) <= set(load_catalogs()['ENTIDADES'].values())
+
+def test_resultado_falls_back_to_antigeno():
+    df = relational_frame(3, seed=1).assign(FECHA_INGRESO='2021-02-01', RESULTADO_ANTIGENO=2)
+    df['RESULTADO_PCR'] = [1, None, 97]
+    casos = CasosColumnar.from_frame(df)
+    assert casos['resultado'].tolist() == [1, 2, 97]
+    assert [c.resultado for c in casos.to_models()] == ['1', '2', '97']
+    assert set(casos.decode('entidad_res')) <= set(load_catalogs()['ENTIDADES'].values())
+
+def test_non_integer_codes_roundtrip():
+    # Códigos que no son enteros: se guardan como -1 pero to_models devuelve el texto de la ingesta
+    df = relational_frame(6, seed=1).assign(FECHA_INGRESO='2021-02-01').astype({'SECTOR': object})
+    df['SECTOR'] = ['4', 'X', '2.5', None, '009', '300']
+    df['RESULTADO_PCR'] = [1, None, None, 2, 3, 4]
+    df['RESULTADO_ANTIGENO'] = [1, None, 'N/A', 2, 3, 4]
+    metrics = RunMetrics()
+    with metrics.stage('ingest_relational_data') as stage:
+        esperado = CovidDataIngester('.').relational_frame_to_models(df, stage)
+    casos = CasosColumnar.from_frame(df)
+    assert casos['sector'].tolist() == [4, -1, -1, -1, 9, -1]
+    assert [c.model_dump() for c in casos.to_models()] == [c.model_dump() for c in esperado]
+    assert [c.sector for c in esperado] == ['4', 'X', '2.5', 'None', '9', '300']
+    assert [c.resultado for c in esperado] == ['1', 'None', 'N/A', '2', '3', '4']
+
+def test_date_rejects_counted_in_one_step():
+    df = relational_frame(40, seed=2).assign(FECHA_INGRESO='2021-02-01', FECHA_SINTOMAS='9999-99-99')
+    metrics = RunMetrics()
+    CasosColumnar.from_frame(df, metrics=metrics)
+    stage = metrics.get('encode_relational')
+    assert stage.errors['FECHA_SINTOMAS inválida o futura'].count == 40 == stage.rows_rejected
+
+def test_edad_rejects_counted_in_one_step(monkeypatch):
+    df = relational_frame(40, seed=2, dirty_rate=0).astype({'EDAD': object})
+    df.loc[5:, 'EDAD'] = 'NA'
+    calls = []
+    original = StageMetrics.record_error
+    monkeypatch.setattr(StageMetrics, 'record_error',
+                        lambda self, *a, **k: calls.append(a) or original(self, *a, **k))
+    metrics = RunMetrics()
+    CasosColumnar.from_frame(df, metrics=metrics)
+    stage = metrics.get('encode_relational')
+    assert stage.errors['EDAD inválida'].count == 35 == stage.rows_rejected
+    assert stage.errors['EDAD inválida'].samples == [str(df['ID_REGISTRO'].iloc[5])]
+    assert len(calls) == 1
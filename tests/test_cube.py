@@ -0,0 +1,70 @@
+"""
+Tests for the daily-cases cube
+"""
+from datetime import date, timedelta
+import numpy as np
+import pytest
+from benchmarks.synthetic import write_graph_files
+from src.analytics.cube import DailyCasesCube, METRICS
+from src.etl.ingestion import CovidDataIngester
+from src.models.landing.schemas import CasoDiarioLanding
+
+def _casos(dias, estados, start=date(2020, 3, 1), seed=0):
+    rng = np.random.default_rng(seed)
+    return [CasoDiarioLanding(fecha=start + timedelta(days=d), estado=e, source_file='t.csv',
+                              **{m: int(rng.integers(0, 100)) for m in METRICS})
+            for d in dias for e in estados]
+
+@pytest.fixture
+def casos():
+    return _casos(range(30), ['Jalisco', 'Sonora', 'Yucatán'])
+
+def _brute(casos, metric, desde, hasta, estado=None):
+    return sum(getattr(c, metric) for c in casos
+               if desde <= c.fecha <= hasta and (estado is None or c.estado == estado))
+
+def test_range_totals_match_brute_force(casos):
+    cube = DailyCasesCube.from_records(casos)
+    desde, hasta = date(2020, 3, 5), date(2020, 3, 19)
+    for metric in METRICS:
+        assert cube.total(metric, desde, hasta) == _brute(casos, metric, desde, hasta)
+        assert cube.total(metric, desde, hasta, 'Sonora') == _brute(casos, metric, desde, hasta, 'Sonora')
+    assert cube.total_by_estado('confirmados', desde, hasta)['Jalisco'] == \
+        _brute(casos, 'confirmados', desde, hasta, 'Jalisco')
+    assert cube.cumulative('defunciones')[-1] == cube.total('defunciones')
+
+def test_rolling_mean(casos):
+    cube = DailyCasesCube.from_records(casos)
+    daily = cube.daily('confirmados', 'Yucatán')
+    rolling = cube.rolling_mean('confirmados', 7, 'Yucatán')
+    assert np.isnan(rolling[:6]).all()
+    np.testing.assert_allclose(rolling[6:], np.convolve(daily, np.ones(7) / 7, mode='valid'))
+    assert cube.rolling_at('confirmados', date(2020, 3, 30), 7, 'Yucatán') == pytest.approx(rolling[-1])
+    assert cube.rolling_at('confirmados', date(2020, 3, 2), 7) is None
+
+def test_append_matches_full_rebuild(casos):
+    cube = DailyCasesCube.from_records(casos[:30])
+    nuevos = _casos(range(30, 100), ['Jalisco', 'Sonora', 'Yucatán', 'Colima'], seed=1)
+    cube.append(casos[30:])
+    cube.append(nuevos)
+    full = DailyCasesCube.from_records(casos + nuevos)
+    assert cube.end == date(2020, 3, 1) + timedelta(days=99)
+    assert sorted(cube.estados) == full.estados
+    for metric in METRICS:
+        np.testing.assert_array_equal(cube.cumulative(metric), full.cumulative(metric))
+        assert cube.total(metric, estado='Colima') == full.total(metric, estado='Colima')
+
+def test_correction_recomputes_cumsum(casos):
+    cube = DailyCasesCube.from_records(casos)
+    before = cube.total('confirmados')
+    fix = casos[3].model_copy(update={'confirmados': casos[3].confirmados + 10})
+    cube.append([fix])
+    assert cube.total('confirmados') == before + 10
+    with pytest.raises(ValueError):
+        cube.append(_casos([-1], ['Jalisco']))
+
+def test_from_graph(tmp_path):
+    path = write_graph_files(tmp_path, 320)
+    casos = CovidDataIngester(str(path)).ingest_graph_data()
+    cube = DailyCasesCube.from_graph(str(path))
+    assert cube.total('negativos') == sum(c.negativos for c in casos)
@@ -0,0 +1,54 @@
+"""
+Tests for the compiled decision-tree match classifier
+"""
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from pathlib import Path
+from src.matching.decision_tree import MatchDecisionTree
+
+CONFIG = Path(__file__).parent.parent / 'config' / 'match_tree.yml'
+
+@pytest.fixture
+def tree():
+    return MatchDecisionTree.from_file(CONFIG)
+
+def test_classify_against_config(tree):
+    features = pd.DataFrame({
+        'curp_match':     [1, 1, 1, 0, 0, 0],
+        'nombre_match':   [1, 0, 0, 1, 1, 0],
+        'edad_match':     [0, 1, 0, 0, 0, 1],
+        'telefono_match': [0, 0, 0, 1, 0, 1],
+    })
+    result = tree.classify(features)
+    assert list(result.labels()) == ['match', 'match', 'review', 'review', 'no_match', 'no_match']
+    assert result.counts() == {'no_match': 2, 'review': 2, 'match': 2}
+    assert result.leaf_counts['curp_y_nombre'] == 1
+    assert result.leaf_counts['sin_coincidencias'] == 1
+    assert sum(result.leaf_counts.values()) == len(features)
+    assert (result.leaf_ids >= 0).all()
+
+def test_missing_values_follow_missing_branch():
+    tree = MatchDecisionTree({
+        'feature': 'score', 'threshold': 0.8, 'missing': 'then',
+        'then': {'decision': 'review'}, 'else': {'decision': 'no_match'}
+    })
+    result = tree.classify({'score': np.array([0.9, np.nan, 0.1])})
+    assert list(result.labels()) == ['review', 'review', 'no_match']
+    assert set(result.leaf_counts) == {'root/score>=0.8', 'root/!score>=0.8'}
+
+def test_json_config_and_validation(tmp_path):
+    cfg = tmp_path / 'tree.json'
+    cfg.write_text(json.dumps({'tree': {
+        'feature': 'w', 'op': '>', 'threshold': 4,
+        'then': {'decision': 'match'}, 'else': {'decision': 'no_match'}
+    }}))
+    tree = MatchDecisionTree.from_file(cfg)
+    assert list(tree.classify({'w': np.array([4.0, 5.0])}).labels()) == ['no_match', 'match']
+    with pytest.raises(ValueError):
+        MatchDecisionTree({'decision': 'maybe'})
+    with pytest.raises(ValueError):
+        MatchDecisionTree({'feature': 'w', 'threshold': 1, 'then': {'decision': 'match'}})
+    with pytest.raises(KeyError):
+        tree.classify({'otro': np.array([1.0])})
@@ -0,0 +1,36 @@
+"""
+Differential tests: optimized paths must match the reference functions on dirty data
+"""
+import math
+import pytest
+from benchmarks.differential import CASES, MALFORMED_NSS, dirty_patients_frame, dirty_relational_frame, run_differential
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+@pytest.mark.parametrize('name', sorted(CASES))
+def test_optimized_matches_reference(name, seed):
+    result = CASES[name](400, seed)
+    assert result.ok, '\n'.join(result.mismatches)
+    assert result.reference_seconds > 0 and result.optimized_seconds > 0
+
+def test_generators_are_dirty_and_deterministic():
+    df = dirty_patients_frame(2000, seed=5)
+    assert df.equals(dirty_patients_frame(2000, seed=5))
+    # Nulos como None (SQL) y como NaN (read_csv / JSON con claves faltantes)
+    for col in ('NOMBRE', 'APELLIDO', 'NSS', 'Direccion'):
+        assert any(v is None for v in df[col]) and any(isinstance(v, float) and math.isnan(v) for v in df[col])
+    assert df['NOMBRE'].str.contains('\xa0', regex=False).any()
+    assert df['NSS'].isin([v for v in MALFORMED_NSS if v is not None]).any()
+    rel = dirty_relational_frame(2000, seed=5)
+    assert (rel['FECHA_INGRESO'] == '9999-99-99').any()
+    assert rel['DIABETES'].isin([97, 98, 99]).any()
+    assert rel['RESULTADO_PCR'].isna().any()
+
+def test_run_differential_reports_timings(capsys):
+    results = run_differential(['normalize_text', 'apply_mapping'], 200, [0])
+    assert [r.name for r in results] == ['normalize_text', 'apply_mapping']
+    assert all(r.ok and r.speedup for r in results)
+    assert 'OK' in capsys.readouterr().out
+
+def test_nan_text_is_null_in_reference():
+    from src.etl.patients_integration import extract_nss, normalize_text
+    assert normalize_text(float('nan')) is None and extract_nss(float('nan')) is None
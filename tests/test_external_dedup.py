@@ -0,0 +1,69 @@
+"""
+Tests for the disk-spilling deduplication
+"""
+import pytest
+from benchmarks.synthetic import patient_models
+from src.etl.external_dedup import external_deduplicate
+from src.etl.metrics import RunMetrics
+from src.etl.patients_integration import deduplicate
+
+@pytest.fixture(scope='module')
+def pacientes():
+    return patient_models(2000)
+
+def _dump(items):
+    return [p.model_dump() for p in items]
+
+def test_matches_in_memory_order(pacientes, tmp_path):
+    metrics = RunMetrics()
+    result = list(external_deduplicate(iter(pacientes), partitions=8, workdir=tmp_path, metrics=metrics))
+    assert _dump(result) == _dump(deduplicate(pacientes))
+    stage = metrics.get('external_deduplicate')
+    assert (stage.rows_in, stage.rows_out) == (len(pacientes), len(result))
+    assert list(tmp_path.iterdir()) == []
+
+def test_repartitions_oversized_partitions(pacientes, tmp_path):
+    result = external_deduplicate(pacientes, partitions=2, max_records=50, workdir=tmp_path)
+    assert _dump(result) == _dump(deduplicate(pacientes))
+
+def test_parallel_partitions(pacientes):
+    result = external_deduplicate(pacientes, partitions=4, workers=2)
+    assert _dump(result) == _dump(deduplicate(pacientes))
+
+def test_first_seen_wins_across_sources(pacientes):
+    dup = pacientes[0].model_copy(update={'HospOrigen': 'ABC', 'direccion': 'OTRA'})
+    result = list(external_deduplicate([pacientes[0], dup], partitions=3))
+    assert result == [pacientes[0]]
+
+def test_merge_opens_bounded_files(pacientes, tmp_path, monkeypatch):
+    import builtins
+    import src.etl.external_dedup as external_dedup
+    abiertos, maximo = set(), [0]
+
+    class Tracked:
+        def __init__(self, f):
+            self.f = f
+            abiertos.add(id(self))
+            maximo[0] = max(maximo[0], len(abiertos))
+        def __getattr__(self, name):
+            return getattr(self.f, name)
+        def __enter__(self):
+            return self
+        def __exit__(self, *exc):
+            abiertos.discard(id(self))
+            return self.f.__exit__(*exc)
+
+    def tracked_open(path, mode='r', **kwargs):
+        f = builtins.open(path, mode, **kwargs)
+        return Tracked(f) if 'r' in mode else f  # el reparto abre `partitions` para escribir
+
+    monkeypatch.setattr(external_dedup, 'open', tracked_open, raising=False)
+    result = list(external_deduplicate(pacientes, partitions=40, max_open_files=6, workdir=tmp_path))
+    assert _dump(result) == _dump(deduplicate(pacientes))
+    assert maximo[0] <= 6
+    assert list(tmp_path.iterdir()) == []
+    with pytest.raises(ValueError):
+        list(external_deduplicate(pacientes, max_open_files=1))
+
+def test_empty_input():
+    assert list(external_deduplicate([])) == []
@@ -0,0 +1,88 @@
+"""
+Tests for golden record survivorship and the incremental master store
+"""
+import pytest
+from datetime import datetime
+from src.etl.connectors.sql import SqlConnector
+from src.etl.metrics import RunMetrics
+from src.merging.golden_record import MasterStore, build_golden_record, cluster_fingerprint
+from src.models.landing.schemas import PacienteFederadoLanding
+
+def pac(clave, nombre, ape=None, dire=None, hosp='Siglo21'):
+    return PacienteFederadoLanding(pac_clave=clave, nombrePac=nombre, apePatPac=ape,
+                                   direccion=dire, HospOrigen=hosp)
+
+@pytest.fixture
+def store(tmp_path):
+    conn = SqlConnector(f"sqlite:///{tmp_path / 'master.db'}")
+    store = MasterStore(conn)
+    store.create_tables()
+    yield store
+    conn.close()
+
+def test_survivorship_rules():
+    miembros = [
+        pac(11, 'ANA', 'SOTO', 'CALLE 1', hosp='ABC'),
+        pac(22, 'ANA MARIA', None, None, hosp='Siglo21'),
+        pac(33, 'ANA', 'SOTO', 'CALLE 3 NUEVA', hosp='MedicaSur'),
+    ]
+    golden = build_golden_record('c1', miembros, rules={'direccion': 'most_recent'})
+    assert golden.pac_clave == 22  # Siglo21 tiene prioridad
+    assert golden.nombrePac == 'ANA MARIA'  # el más completo
+    assert golden.apePatPac == 'SOTO'
+    assert golden.direccion == 'CALLE 3 NUEVA'  # el más reciente
+    assert golden.fuentes == ['ABC', 'Siglo21', 'MedicaSur']
+    assert golden.num_registros == 3
+
+def test_fingerprint_order_independent():
+    a, b = pac(1, 'ANA'), pac(2, 'LUIS')
+    assert cluster_fingerprint([a, b]) == cluster_fingerprint([b, a])
+    assert cluster_fingerprint([a]) != cluster_fingerprint([a, b])
+
+def test_incremental_merge_with_history(store):
+    t1, t2, t3 = datetime(2024, 1, 1), datetime(2024, 1, 2), datetime(2024, 1, 3)
+    res = store.merge({'c1': [pac(1, 'ANA', 'SOTO')], 'c2': [pac(2, 'LUIS')]}, run_ts=t1)
+    assert sorted(res.inserted) == ['c1', 'c2']
+
+    # Re-ejecutar sin cambios no genera versiones nuevas
+    res = store.merge({'c1': [pac(1, 'ANA', 'SOTO')]}, run_ts=t2)
+    assert res.unchanged == 1 and not res.inserted and not res.updated
+
+    # Un cluster que cambia genera versión 2; un cluster vacío se retira
+    res = store.merge({'c1': [pac(1, 'ANA', 'SOTO'), pac(9, 'ANA', 'SOTO', 'CALLE 5', 'ABC')],
+                       'c2': []}, run_ts=t3)
+    assert res.updated == ['c1'] and res.deleted == ['c2']
+
+    golden = store.get('c1')
+    assert golden.version == 2
+    assert golden.direccion == 'CALLE 5'
+    assert golden.fuentes == ['Siglo21', 'ABC']
+    assert store.get('c2') is None
+
+    historia = store.history('c1')
+    assert [(h.version, h.change_type) for h in historia] == [(1, 'INSERT'), (2, 'UPDATE')]
+    assert historia[0].direccion is None
+    assert [h.change_type for h in store.history('c2')] == ['INSERT', 'DELETE']
+
+def test_reinserted_cluster_continues_versions(store):
+    store.merge({'c1': [pac(1, 'ANA')]}, run_ts=datetime(2024, 1, 1))
+    store.merge({'c1': []}, run_ts=datetime(2024, 1, 2))
+    res = store.merge({'c1': [pac(1, 'ANA', 'SOTO')]}, run_ts=datetime(2024, 1, 3))
+    assert res.inserted == ['c1']
+    assert store.get('c1').version == 3
+    assert [(h.version, h.change_type) for h in store.history('c1')] == \
+        [(1, 'INSERT'), (2, 'DELETE'), (3, 'INSERT')]
+
+def test_cluster_without_name_rejected(store):
+    metrics = RunMetrics()
+    res = store.merge({'c1': [pac(1, '', 'SOTO'), pac(2, '  ', 'SOTO', hosp='ABC')],
+                       'c2': [pac(3, 'LUIS')]}, metrics=metrics)
+    assert res.rejected == ['c1'] and res.inserted == ['c2']
+    assert store.get('c1') is None and store.history('c1') == []
+    stage = metrics.get('merge_golden_records')
+    assert (stage.rows_in, stage.rows_out, stage.rows_rejected) == (2, 1, 1)
+    assert stage.errors['ValidationError: nombrePac: string_type'].samples == ['c1']
+
+def test_unknown_rule_rejected(store):
+    with pytest.raises(ValueError):
+        MasterStore(store.connector, rules={'nombrePac': 'longest_ever'})
@@ -0,0 +1,175 @@
+"""
+Tests for the CSR contact graph
+"""
+from collections import deque
+import time
+import numpy as np
+import pytest
+from src.analytics.graph import ContactGraph
+
+RECORDS = [
+    ('P1', 'Patient', 'C1', 'Contact'),
+    ('P1', 'Patient', 'C2', 'Contact'),
+    ('P1', 'Patient', 'Hospital A', 'Hospital'),
+    ('P2', 'Patient', 'C3', 'Contact'),
+    ('P2', 'Patient', 'Hospital A', 'Hospital'),
+    ('P3', 'Patient', 'C4', 'Contact'),
+    ('P4', 'Patient', 'C5', 'Contact'),
+    ('P4', 'Patient', 'C6', 'Contact'),
+    ('P4', 'Patient', 'C7', 'Contact'),
+]
+
+@pytest.fixture
+def graph():
+    return ContactGraph.from_records(RECORDS)
+
+def _brute_bfs(edges, n, source):
+    adj = [[] for _ in range(n)]
+    for a, b in edges:
+        adj[a].append(b)
+        adj[b].append(a)
+    dist = [-1] * n
+    dist[source] = 0
+    queue = deque([source])
+    while queue:
+        u = queue.popleft()
+        for v in adj[u]:
+            if dist[v] < 0:
+                dist[v] = dist[u] + 1
+                queue.append(v)
+    return dist
+
+def test_csr_structure(graph):
+    assert graph.n_nodes == 12
+    assert graph.n_edges == len(RECORDS)
+    assert sorted(graph.node_keys[i] for i in graph.neighbors(graph.node('P1'))) == ['C1', 'C2', 'Hospital A']
+    assert graph.degree()[graph.node('Hospital A')] == 2
+
+def test_k_hop_and_through(graph):
+    assert sorted(graph.k_hop('P1', k=1)) == ['C1', 'C2', 'Hospital A']
+    assert 'P2' in graph.k_hop('P1', k=2, label='Patient')
+    # Sin pasar por el hospital, P1 y P2 no están conectados
+    assert graph.k_hop('P1', k=3, through=('Patient', 'Contact'), label='Patient') == []
+    assert sorted(graph.k_hop('P1', k=3)) == ['C1', 'C2', 'C3', 'Hospital A', 'P2']
+
+def test_components_and_sizes(graph):
+    labels = graph.components()
+    same = lambda a, b: labels[graph.node(a)] == labels[graph.node(b)]
+    assert same('C1', 'C3') and not same('P1', 'P3') and not same('P3', 'P4')
+    assert list(graph.component_sizes().values()) == [6, 4, 2]
+
+def test_top_degree(graph):
+    assert graph.top_degree(2) == [('P1', 3), ('P4', 3)]  # empate: menor id de nodo primero
+    assert graph.top_degree(1, label='Hospital') == [('Hospital A', 2)]
+    assert len(graph.top_degree(100, label='Contact')) == 7
+
+def test_random_graph_matches_brute_force():
+    rng = np.random.default_rng(3)
+    n, m = 500, 600
+    src, dst = rng.integers(0, n, m), rng.integers(0, n, m)
+    graph = ContactGraph.from_arrays(src, dst, n)
+    edges = list(zip(src.tolist(), dst.tolist()))
+    for source in (0, 17, 499):
+        assert graph.bfs(source).tolist() == _brute_bfs(edges, n, source)
+    labels = graph.components()
+    for u in range(0, n, 50):
+        reach = np.flatnonzero(np.array(_brute_bfs(edges, n, u)) >= 0)
+        assert (labels[reach] == reach.min()).all()
+        assert (labels == labels[u]).sum() == reach.size
+
+def test_isolated_nodes_and_empty_graph():
+    graph = ContactGraph.from_arrays(np.array([0]), np.array([1]), 4)
+    assert graph.components().tolist() == [0, 0, 2, 3]
+    assert graph.bfs(3).tolist() == [-1, -1, -1, 0]
+    empty = ContactGraph.from_arrays(np.array([], dtype=np.int64), np.array([], dtype=np.int64), 3)
+    assert empty.components().tolist() == [0, 1, 2]
+    assert empty.top_degree(2, label=None) == [(0, 0), (1, 0)]
+
+def test_save_and_load(graph, tmp_path):
+    path = tmp_path / 'contactos.npz'
+    graph.save(path)
+    loaded = ContactGraph.load(path)
+    assert loaded.node_keys == graph.node_keys
+    assert np.array_equal(loaded.indptr, graph.indptr)
+    assert sorted(loaded.k_hop('P1', k=2)) == sorted(graph.k_hop('P1', k=2))
+    assert loaded.top_degree(1, label='Hospital') == [('Hospital A', 2)]
+
+def test_save_and_load_keeps_key_types(tmp_path):
+    # Pacientes con id entero, hospitales con nombre y un id de texto que parece número
+    graph = ContactGraph.from_records([
+        (101, 'Patient', 'Hospital A', 'Hospital'),
+        (102, 'Patient', 'Hospital A', 'Hospital'),
+        (101, 'Patient', '103', 'Patient'),
+    ])
+    path = tmp_path / 'contactos.npz'
+    graph.save(path)
+    loaded = ContactGraph.load(path)
+    assert loaded.node_keys == [101, 'Hospital A', 102, '103']
+    assert sorted(loaded.k_hop(101, k=1), key=str) == sorted(graph.k_hop(101, k=1), key=str)
+    numbered = ContactGraph.from_arrays(np.array([0]), np.array([1]), 2)
+    numbered.save(path)
+    assert ContactGraph.load(path).node_keys == [0, 1]
+    with pytest.raises(TypeError):
+        ContactGraph.from_arrays(np.array([0]), np.array([1]), 2, node_keys=[1.5, 2.5]).save(path)
+
+def test_from_neo4j_uses_one_query():
+    class Session:
+        def __init__(self):
+            self.queries = []
+        def __enter__(self):
+            return self
+        def __exit__(self, *exc):
+            return False
+        def run(self, query):
+            self.queries.append(query)
+            ids = {}
+            return [{'a_id': ids.setdefault(a, 100 + len(ids)), 'a': a, 'a_label': al,
+                     'b_id': ids.setdefault(b, 100 + len(ids)), 'b': b, 'b_label': bl}
+                    for a, al, b, bl in RECORDS]
+
+    class Driver:
+        def __init__(self):
+            self.session_obj = Session()
+        def session(self, **kwargs):
+            return self.session_obj
+
+    driver = Driver()
+    graph = ContactGraph.from_neo4j(driver)
+    assert len(driver.session_obj.queries) == 1
+    assert 'HAD_CONTACT|TREATED_AT' in driver.session_obj.queries[0]
+    assert graph.n_edges == len(RECORDS)
+    expected = ContactGraph.from_records(RECORDS)
+    assert graph.node_keys == expected.node_keys
+    assert np.array_equal(graph.node_labels, expected.node_labels)
+    assert np.array_equal(graph.indptr, expected.indptr)
+
+def test_from_records_numbering_and_labels():
+    records = RECORDS + [('P9', 'Otro', 7, 'Contact')]  # etiqueta desconocida, clave entera
+    graph = ContactGraph.from_records(records)
+    order = list(dict.fromkeys(k for a, _, b, _ in records for k in (a, b)))
+    assert graph.node_keys == order
+    assert graph.node_labels[graph.node('P9')] == -1 and graph.node(7) == len(order) - 1
+    assert graph.node_labels[graph.node('Hospital A')] == 2
+    assert ContactGraph.from_records([]).n_nodes == 0
+
+def test_two_million_edge_records():
+    # Ids enteros, como los que devuelve la consulta de from_neo4j
+    rng = np.random.default_rng(1)
+    n, m = 300_000, 2_000_000
+    src, dst = rng.integers(0, n, m), rng.integers(n, 2 * n, m)
+    records = list(zip(src.tolist(), ['Patient'] * m, dst.tolist(), ['Contact'] * m))
+    start = time.perf_counter()
+    graph = ContactGraph.from_records(records)
+    assert time.perf_counter() - start < 10
+    assert graph.n_edges == m
+    assert graph.node_keys[:2] == [int(src[0]), int(dst[0])]
+
+def test_million_edges_in_process():
+    rng = np.random.default_rng(0)
+    n, m = 200_000, 1_000_000
+    start = time.perf_counter()
+    graph = ContactGraph.from_arrays(rng.integers(0, n, m), rng.integers(0, n, m), n)
+    graph.components()
+    graph.bfs(0)
+    graph.top_degree(10, label=None)
+    assert time.perf_counter() - start < 10
@@ -0,0 +1,47 @@
+"""
+Import-time budget for the ETL entry points (fresh interpreter per check)
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+BUDGET_MS = float(os.environ.get('MDM_IMPORT_BUDGET_MS', '150'))
+HEAVY = ('pandas', 'pydantic', 'neo4j', 'faker', 'sqlalchemy')
+
+def _run(code):
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True,
+                         text=True, check=True)
+    return out.stdout.strip().splitlines()[-1]
+
+@pytest.mark.parametrize('module', ['src.etl', 'src.etl.ingestion', 'src.etl.patients_integration',
+                                    'src.etl.metrics'])
+def test_import_is_lazy_and_fast(module):
+    code = (
+        'import sys, time\n'
+        't = time.perf_counter()\n'
+        f'import {module}\n'
+        'ms = (time.perf_counter() - t) * 1000\n'
+        f'print(ms, *sorted(m for m in {HEAVY!r} if m in sys.modules))\n'
+    )
+    ms, *loaded = _run(code).split()
+    assert loaded == []
+    assert float(ms) < BUDGET_MS, f'{module} took {float(ms):.1f}ms (budget {BUDGET_MS}ms)'
+
+def test_lazy_attribute_resolves():
+    assert _run('import src.etl as e; print(e.CovidDataIngester.__name__)') == 'CovidDataIngester'
+
+def test_cli_help_skips_drivers():
+    code = (
+        'import sys\n'
+        'sys.argv = ["cli", "--help"]\n'
+        'from src.scripts.dummy_data import cli\n'
+        'try:\n'
+        '    cli.main()\n'
+        'except SystemExit:\n'
+        '    pass\n'
+        f'print(sorted(m for m in {HEAVY!r} if m in sys.modules))\n'
+    )
+    assert _run(code) == '[]'
@@ -84,6 +84,23 @@ def test_caso_covid_model():
     assert caso.neumonia is False
     assert caso.embarazo is None
 
+def test_caso_covid_boolean_reload():
+    """None y bool ya convertidos se conservan al recargar un caso desde JSON"""
+    caso = CasoCovidLanding(
+        id_registro="123", fecha_actualizacion=date(2023, 6, 25), origen="1", sector="12",
+        entidad_um="01", sexo="2", entidad_nac="01", entidad_res="01", municipio_res="003",
+        tipo_paciente="1", fecha_ingreso=date(2023, 6, 20), fecha_sintomas=date(2023, 6, 18),
+        edad=45, nacionalidad="1", intubado=1, neumonia=2, embarazo=97, resultado="1",
+        pais_nacionalidad="MEXICO", pais_origen="MEXICO", source_file="test.csv"
+    )
+    recargado = CasoCovidLanding.model_validate_json(caso.model_dump_json())
+    assert recargado == caso and recargado.embarazo is None
+    assert CasoCovidLanding.validate_boolean(None) is None
+    assert CasoCovidLanding.validate_boolean(True) is True
+    assert CasoCovidLanding.validate_boolean(False) is False
+    # Los códigos crudos del CSV siguen igual
+    assert [CasoCovidLanding.validate_boolean(v) for v in (1, 2, 97, 98, 99)] == [True, False, None, None, None]
+
 def test_texto_caso_model():
     """Test TextoCasoLanding model"""
     caso = TextoCasoLanding(
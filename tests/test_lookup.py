@@ -0,0 +1,119 @@
+"""
+Tests for the federated patient index and its HTTP front-end
+"""
+import json
+import threading
+import time
+from urllib.request import Request, urlopen
+import numpy as np
+import pytest
+from benchmarks.synthetic import patient_models
+from src.etl.patients_integration import normalize_text
+from src.lookup.index import PatientIndex
+from src.lookup.server import ReadWriteLock, serve
+from src.models.landing.schemas import PacienteFederadoLanding
+
+def _paciente(clave, nombre, apellido, hosp='ABC'):
+    return PacienteFederadoLanding(pac_clave=clave, nombrePac=nombre, apePatPac=apellido, HospOrigen=hosp)
+
+@pytest.fixture
+def index():
+    idx = PatientIndex(compact_threshold=3)
+    idx.add([_paciente(1, 'JOSE', 'GARCIA'), _paciente(2, 'JOSEFINA', 'GARZA'),
+             _paciente(3, 'MARIA', 'LOPEZ')])
+    idx.add([_paciente(1, 'JOSE', 'GARCIA', 'Siglo21'), _paciente(4, 'ANA', 'GARCÍA')])  # delta
+    return idx
+
+def test_exact_and_contains(index):
+    assert [r['HospOrigen'] for r in index.by_clave(1)] == ['ABC']  # misma clave dedup
+    assert index.by_clave(4)[0]['nombrePac'] == 'ANA'
+    assert index.by_clave(99) == []
+    assert index.contains(3, 'MARIA', 'LOPEZ')
+    assert not index.contains(3, 'MARIA', 'PEREZ')
+
+def test_prefix_spans_base_and_delta(index):
+    assert [r['pac_clave'] for r in index.prefix('gar')] == [1, 4, 2]
+    assert [r['pac_clave'] for r in index.prefix('Jos', field='nombrePac')] == [1, 2]
+    assert index.prefix('gar', limit=1)[0]['pac_clave'] == 1
+    with pytest.raises(ValueError):
+        index.prefix('x', field='direccion')
+
+def test_fuzzy_ranks_typos(index):
+    result = index.fuzzy('JOSE GRACIA')
+    assert result[0]['pac_clave'] == 1
+    assert index.fuzzy('MARÍA LÓPES')[0]['pac_clave'] == 3
+
+def test_persistence_and_incremental(index, tmp_path):
+    path = tmp_path / 'pacientes.idx'
+    index.save(path)
+    loaded = PatientIndex.load(path)
+    assert loaded.prefix('gar') == index.prefix('gar')
+    loaded.add([_paciente(5, 'LUIS', 'GARCES')])
+    assert [r['pac_clave'] for r in loaded.prefix('GARC')] == [5, 1, 4]
+
+def test_incremental_compaction_matches_full_sort():
+    pacientes = patient_models(3000, seed=4)
+    idx = PatientIndex(compact_threshold=250)
+    for i in range(0, len(pacientes), 100):
+        idx.add(pacientes[i:i + 100])
+    idx.compact()
+    claves = np.asarray(idx.claves, dtype=np.int64)
+    order = np.argsort(claves, kind='stable')
+    assert idx._clave_keys.tolist() == claves[order].tolist()
+    assert idx._clave_rows.tolist() == order.tolist()
+    for field, values in (('nombrePac', idx.nombres), ('apePatPac', idx.apellidos)):
+        entries = sorted((normalize_text(v), r) for r, v in enumerate(values) if normalize_text(v))
+        assert list(zip(idx._prefix_keys[field].tolist(), idx._prefix_rows[field].tolist())) == entries
+
+def test_prefix_does_not_touch_delta(index):
+    delta = {f: list(entries) for f, entries in index._delta_prefix.items()}
+    index.prefix('gar')
+    index.prefix('jo', field='nombrePac')
+    assert index._delta_prefix == delta
+
+def test_read_write_lock_excludes_writers():
+    lock, events = ReadWriteLock(), []
+
+    def write():
+        with lock.write():
+            events.append('w')
+
+    with lock.read():
+        writer = threading.Thread(target=write)
+        writer.start()
+        with lock.read():  # otro lector no espera
+            events.append('r')
+        time.sleep(0.05)
+        assert events == ['r']
+    writer.join(1)
+    assert events == ['r', 'w']
+
+def test_lookup_latency():
+    pacientes = patient_models(20_000)
+    idx = PatientIndex()
+    idx.add(pacientes)
+    idx.compact()
+    claves = [p.pac_clave for p in pacientes[:500]]
+    tiempos = []
+    for clave in claves:
+        t = time.perf_counter()
+        idx.by_clave(clave)
+        idx.prefix(pacientes[0].apePatPac[:3], limit=5)
+        tiempos.append(time.perf_counter() - t)
+    assert np.percentile(tiempos, 99) < 0.005
+
+def test_http_api(index):
+    server = serve(index, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    try:
+        assert json.load(urlopen(f'{base}/pacientes/3'))[0]['apePatPac'] == 'LOPEZ'
+        assert json.load(urlopen(f'{base}/buscar?prefijo=gar&limite=2'))[1]['pac_clave'] == 4
+        assert json.load(urlopen(f'{base}/buscar?nombre=JOSE+GRACIA'))[0]['pac_clave'] == 1
+        body = json.dumps([{'pac_clave': 6, 'nombrePac': 'EVA', 'HospOrigen': 'MedicaSur'}]).encode()
+        resp = json.load(urlopen(Request(f'{base}/pacientes', data=body, method='POST')))
+        assert resp == {'agregados': 1, 'total': 5}
+        assert json.load(urlopen(f'{base}/pacientes/6'))[0]['nombrePac'] == 'EVA'
+    finally:
+        server.shutdown()
+        server.server_close()
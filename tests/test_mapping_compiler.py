@@ -0,0 +1,57 @@
+"""
+Tests for the JSON mapping compiler
+"""
+import pandas as pd
+import pytest
+from pathlib import Path
+from src.etl.patients_integration import MAPPING_SIGLO21, apply_mapping, load_siglo21_sql
+from src.mapping.compiler import CompiledMapping, load_mapping, vec_normalize_text, vec_nss_digits
+
+P1 = Path(__file__).parent.parent / 'p1'
+
+def test_vectorized_transforms():
+    s = pd.Series([' José  Luis ', 'Martínez', None, 123])
+    assert vec_normalize_text(s).tolist()[:2] == ['JOSE LUIS', 'MARTINEZ']
+    assert pd.isna(vec_normalize_text(s)[2])
+    # Espacios Unicode como los colapsa normalize_text (\s de Python, no solo ASCII)
+    assert vec_normalize_text(pd.Series(['\xa0ana\u3000 de\xa0la  peña '])).tolist() == ['ANA DE LA PENA']
+    nss = vec_nss_digits(pd.Series(['04779643499', 'AB-12.34', 'sin nss', None]))
+    assert nss.tolist()[:2] == [4779643, 1234]
+    assert nss.isna().tolist() == [False, False, True, True]
+
+def test_matches_apply_mapping_on_siglo21():
+    """El plan columnar produce los mismos registros que apply_mapping"""
+    df = load_siglo21_sql(P1 / 'PacientesSiglo21-mysql.sql')
+    esperado = [p.model_dump() for p in apply_mapping(df, MAPPING_SIGLO21, 'Siglo21')]
+    result = load_mapping('siglo21').run(df)
+    assert [p.model_dump() for p in result.to_models()] == esperado
+    assert result.report.rows_in == len(df)
+    assert result.report.rows_out == len(esperado)
+
+def test_rejects_are_counted_per_rule():
+    df = pd.DataFrame({
+        'NOMBRE': ['Ana', None, 'Eva', 'Luis'],
+        'APELLIDO': ['Soto', 'Vega', None, 'Toro'],
+        'NSS': ['123', '456', '789', 'N/A'],
+    })
+    result = load_mapping('abc').run(df)
+    assert result.report.rows_in == 4
+    assert result.report.rows_out == 2
+    assert result.report.rejects == {'pac_clave:required': 1, 'nombrePac:required': 1}
+    assert result.rejected['reject_reason'].tolist() == ['nombrePac:required', 'pac_clave:required']
+    # Columna Direccion ausente en origen -> nula, no error
+    assert result.frame['direccion'].isna().all()
+    assert (result.frame['HospOrigen'] == 'ABC').all()
+
+def test_arrow_batch_input():
+    pa = pytest.importorskip('pyarrow')
+    table = pa.table({'NOMBRE': ['ana'], 'APELLIDO': ['soto'], 'NSS': ['99887766554'], 'Direccion': ['c/ 1']})
+    frame = load_mapping('siglo21').run(table).frame
+    assert frame.loc[0, 'pac_clave'] == 99887766
+    assert frame.loc[0, 'nombrePac'] == 'ANA'
+
+def test_invalid_spec():
+    with pytest.raises(ValueError):
+        CompiledMapping({'origen': 'X', 'fields': {'A': {'target': 'no_existe'}}})
+    with pytest.raises(ValueError):
+        CompiledMapping({'origen': 'X', 'fields': {'A': {'target': 'nombrePac', 'transforms': ['rot13']}}})
@@ -0,0 +1,135 @@
+"""
+Tests for pipeline instrumentation
+"""
+import json
+import pandas as pd
+import pytest
+from src.etl.ingestion import CovidDataIngester
+from src.etl.metrics import RunMetrics, reset_peak_rss
+from src.etl.patients_integration import MAPPING_ABC, apply_mapping, deduplicate, map_medica_sur
+
+BOOL_COLS = ['INTUBADO', 'NEUMONIA', 'EMBARAZO', 'HABLA_LENGUA_INDIG', 'DIABETES', 'EPOC', 'ASMA',
+             'INMUSUPR', 'HIPERTENSION', 'OTRA_COM', 'CARDIOVASCULAR', 'OBESIDAD', 'RENAL_CRONICA',
+             'TABAQUISMO', 'OTRO_CASO', 'MIGRANTE', 'UCI']
+
+@pytest.fixture
+def relational_path(tmp_path):
+    row = {
+        'ID_REGISTRO': 'z1', 'FECHA_ACTUALIZACION': '2023-06-25', 'ORIGEN': 1, 'SECTOR': 12,
+        'ENTIDAD_UM': 9, 'SEXO': 2, 'ENTIDAD_NAC': 9, 'ENTIDAD_RES': 9, 'MUNICIPIO_RES': 3,
+        'TIPO_PACIENTE': 1, 'FECHA_INGRESO': '2023-06-20', 'FECHA_SINTOMAS': '2023-06-18',
+        'FECHA_DEF': '9999-99-99', 'EDAD': 45, 'NACIONALIDAD': 1, 'RESULTADO_PCR': 1,
+        'RESULTADO_ANTIGENO': 97, 'PAIS_NACIONALIDAD': 'México', 'PAIS_ORIGEN': 97,
+        **{c: 2 for c in BOOL_COLS}
+    }
+    rows = [row, {**row, 'ID_REGISTRO': 'z2', 'FECHA_INGRESO': '9999-99-99'},
+            {**row, 'ID_REGISTRO': 'z3', 'EDAD': 'NA'}, {**row, 'ID_REGISTRO': 'z4', 'EDAD': 'NA'}]
+    rel = tmp_path / 'Relational'
+    rel.mkdir()
+    pd.DataFrame(rows).to_csv(rel / 'COVID19MEXICO.csv', index=False)
+    return tmp_path
+
+def test_stage_aggregates_errors():
+    metrics = RunMetrics(run_id='r1')
+    with metrics.stage('carga') as stage:
+        stage.rows_in = 10
+        for i in range(50):
+            stage.record_error(ValueError('NSS inválido'), context=i)
+        stage.record_error('pac_clave vacío')
+        stage.rows_out = 9
+    st = metrics.get('carga')
+    assert st.error_count == 51
+    assert len(st.errors) == 2
+    assert st.errors['ValueError: NSS inválido'].samples == ['0', '1', '2', '3', '4']
+    assert st.wall_seconds >= 0
+    assert st.throughput is None or st.throughput > 0
+
+def test_ingester_reports_rejects_without_printing(relational_path, capsys):
+    metrics = RunMetrics()
+    casos = CovidDataIngester(str(relational_path), metrics=metrics).ingest_relational_data()
+    assert len(casos) == 1
+    st = metrics.get('ingest_relational_data')
+    assert (st.rows_in, st.rows_out, st.rows_rejected) == (4, 1, 3)
+    assert st.errors['FECHA_INGRESO inválida o futura'].count == 1
+    assert sum(e.count for k, e in st.errors.items() if k.startswith('ValueError')) == 2
+    assert capsys.readouterr().out == ''
+
+def test_patient_stages():
+    metrics = RunMetrics()
+    df = pd.DataFrame({'NOMBRE': ['Ana', 'Ana', None], 'APELLIDO': ['Soto', 'Soto', 'Vega'],
+                       'NSS': ['123', '123', '456'], 'Direccion': ['C/ 1', 'C/ 1', None]})
+    pacientes = apply_mapping(df, MAPPING_ABC, 'ABC', metrics=metrics)
+    deduplicate(pacientes, metrics=metrics)
+    st = metrics.get('apply_mapping:ABC')
+    assert (st.rows_in, st.rows_out, st.rows_rejected) == (3, 2, 1)
+    assert list(st.errors) == ['ValidationError: nombrePac: string_type']
+    assert (metrics.get('deduplicate').rows_in, metrics.get('deduplicate').rows_out) == (2, 1)
+
+def test_blank_names_are_rejected():
+    # Celdas vacías de read_csv (NaN) son nulas: se rechazan en vez de mapearse como 'NAN'
+    metrics = RunMetrics()
+    df = pd.DataFrame({'NoPaciente': [1, 2, 3], 'NombreCompleto': ['Ana Soto', float('nan'), None],
+                       'ubicacion': ['C/ 1', float('nan'), None]})
+    pacientes = map_medica_sur(df, metrics=metrics)
+    assert [(p.nombrePac, p.apePatPac, p.direccion) for p in pacientes] == [('ANA', 'SOTO', 'C/ 1')]
+    st = metrics.get('apply_mapping:MedicaSur')
+    assert (st.rows_in, st.rows_out, st.rows_rejected) == (3, 1, 2)
+    assert st.errors['NombreCompleto vacío'].count == 2
+
+    abc = pd.DataFrame({'NOMBRE': ['Ana', float('nan')], 'APELLIDO': ['Soto', float('nan')],
+                        'NSS': ['123', '456'], 'Direccion': [float('nan'), 'C/ 2']})
+    pacientes = apply_mapping(abc, MAPPING_ABC, 'ABC', metrics=metrics)
+    assert [(p.nombrePac, p.apePatPac, p.direccion) for p in pacientes] == [('ANA', 'SOTO', None)]
+
+def test_exports(tmp_path):
+    metrics = RunMetrics(run_id='r2')
+    with metrics.stage('deduplicate') as stage:
+        stage.rows_in, stage.rows_out = 100, 90
+    metrics.to_json(tmp_path / 'run.json')
+    report = json.loads((tmp_path / 'run.json').read_text())
+    assert report['run_id'] == 'r2'
+    assert report['stages'][0]['rows_out'] == 90
+    assert 'peak_rss_bytes' in report['stages'][0]
+
+    metrics.to_prometheus(tmp_path / 'mdm.prom')
+    text = (tmp_path / 'mdm.prom').read_text()
+    assert '# TYPE mdm_stage_rows_in gauge' in text
+    assert 'mdm_stage_rows_out{stage="deduplicate"} 90' in text
+    assert 'r2' not in text  # sin run_id como etiqueta
+
+def test_prometheus_sums_repeated_stages(tmp_path):
+    metrics = RunMetrics()
+    for rows in (100, 50):
+        with metrics.stage('apply_mapping:Siglo21') as stage:
+            stage.rows_in, stage.rows_out = rows, rows - 1
+            stage.record_error('NSS inválido')
+    with metrics.stage('deduplicate') as stage:
+        stage.rows_in = 10
+    metrics.to_prometheus(tmp_path / 'mdm.prom')
+    series = [line.rsplit(' ', 1)[0] for line in (tmp_path / 'mdm.prom').read_text().splitlines()
+              if not line.startswith('#')]
+    assert len(series) == len(set(series))
+    text = (tmp_path / 'mdm.prom').read_text()
+    assert 'mdm_stage_rows_in{stage="apply_mapping:Siglo21"} 150' in text
+    assert 'mdm_stage_errors{stage="apply_mapping:Siglo21"} 2' in text
+    totals = metrics.stage_totals()
+    assert [t.name for t in totals] == ['apply_mapping:Siglo21', 'deduplicate']
+    assert totals[0].wall_seconds == pytest.approx(sum(s.wall_seconds for s in metrics.stages[:2]))
+    assert len(metrics.stages) == 3  # el reporte JSON conserva cada ejecución
+
+def test_peak_rss_is_per_stage():
+    if not reset_peak_rss():
+        pytest.skip('requiere /proc/self/clear_refs (Linux)')
+    metrics = RunMetrics()
+    with metrics.stage('grande'):
+        with metrics.stage('interna'):
+            pass
+        block = bytearray(200 * 2**20)
+        block[::4096] = b'x' * len(block[::4096])
+        del block
+    with metrics.stage('chica'):
+        pass
+    grande, interna, chica = metrics.get('grande'), metrics.get('interna'), metrics.get('chica')
+    assert grande.peak_rss_bytes - chica.peak_rss_bytes > 100 * 2**20
+    assert grande.peak_rss_bytes - interna.peak_rss_bytes > 100 * 2**20
+    assert chica.rss_start_bytes is not None and chica.rss_delta_bytes is not None
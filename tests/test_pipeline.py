@@ -0,0 +1,58 @@
+"""
+Tests for the concurrent multi-source loader
+"""
+import time
+from functools import partial
+import pandas as pd
+import pytest
+from src.etl.metrics import RunMetrics
+from src.etl.patients_integration import (
+    actividad4_agregar_medica_sur, apply_mapping, deduplicate, load_abc_json, load_siglo21_sql,
+    MAPPING_ABC, MAPPING_SIGLO21,
+)
+from src.etl.pipeline import DEFAULT_SOURCES, SourceSpec, integrate_sources
+
+def _secuencial(base):
+    pacientes = deduplicate(apply_mapping(load_siglo21_sql(base / 'PacientesSiglo21-mysql.sql'),
+                                          MAPPING_SIGLO21, 'Siglo21'))
+    pacientes = deduplicate(pacientes + apply_mapping(load_abc_json(base / 'PacientesHospitalABC.json'),
+                                                      MAPPING_ABC, 'ABC'))
+    return actividad4_agregar_medica_sur(base, pacientes)
+
+def test_matches_sequential_activities(fuentes):
+    metrics = RunMetrics()
+    pacientes = integrate_sources(fuentes, metrics=metrics)
+    esperado = _secuencial(fuentes)
+    assert [p.model_dump() for p in pacientes] == [p.model_dump() for p in esperado]
+    assert {p.HospOrigen for p in pacientes} == {'Siglo21', 'ABC', 'MedicaSur'}
+    # Grupo Angeles no existe en el directorio: se omite y se reporta
+    stage = metrics.get('integrate_sources')
+    assert stage.errors['fuente no encontrada: GpoAngeles'].count == 1
+    assert metrics.get('load:Siglo21').rows_in == 300
+    assert metrics.get('apply_mapping:MedicaSur').error_count == 1
+
+def test_priority_keeps_first_source(fuentes):
+    # ABC con los mismos registros que Siglo21: debe ganar Siglo21 aunque ABC termine antes
+    df = load_siglo21_sql(fuentes / 'PacientesSiglo21-mysql.sql')
+    (fuentes / 'PacientesHospitalABC.json').write_text(df.to_json(orient='records'), encoding='utf-8')
+    pacientes = integrate_sources(fuentes, sources=DEFAULT_SOURCES[:2])
+    assert {p.HospOrigen for p in pacientes} == {'Siglo21'}
+
+def _lento(path):
+    time.sleep(0.3)
+    return pd.DataFrame({'NSS': [path.stem], 'NOMBRE': ['ANA'], 'APELLIDO': ['PEREZ'], 'Direccion': ['X']})
+
+def test_sources_run_concurrently(tmp_path):
+    specs = []
+    for i in range(4):
+        (tmp_path / f'{i}.txt').touch()
+        specs.append(SourceSpec(f's{i}', f'{i}.txt', _lento,
+                                partial(apply_mapping, mapping=MAPPING_ABC, origen=f's{i}'), 'thread'))
+    start = time.perf_counter()
+    pacientes = integrate_sources(tmp_path, sources=specs)
+    assert time.perf_counter() - start < 0.9
+    assert [p.HospOrigen for p in pacientes] == ['s0', 's1', 's2', 's3']
+
+def test_rejects_unknown_executor():
+    with pytest.raises(ValueError):
+        SourceSpec('x', 'x.csv', load_abc_json, deduplicate, 'gpu')
@@ -0,0 +1,115 @@
+"""
+Tests for the streaming profiler and its sketches
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from src.profiling.profiler import TableProfiler, profile_csv
+from src.profiling.sketches import HyperLogLog, QuantileSketch, TopK
+
+@pytest.fixture
+def batch():
+    return pd.DataFrame({
+        'CURP': ['GOMA800101HDFRRN09', 'XXXX', None, 'PELJ750512MDFRPN01'],
+        'NSS': ['12345678901', '1234', '12345678901', ''],
+        'telefono': ['5551234567', '+525551234567', '555-123', None],
+        'email': ['ana@mail.com', 'sin-correo', None, 'luis@hosp.mx'],
+        'EDAD': [45, 32, 58, 20],
+    })
+
+def test_hyperloglog_accuracy_and_merge():
+    a, b = HyperLogLog(), HyperLogLog()
+    a.add(pd.Series(np.arange(0, 60_000)))
+    b.add(pd.Series(np.arange(40_000, 100_000)))
+    assert abs(a.estimate() - 60_000) / 60_000 < 0.03
+    a.merge(b)
+    assert abs(a.estimate() - 100_000) / 100_000 < 0.03
+    small = HyperLogLog()
+    small.add(pd.Series(['a', 'b', 'a', 'c']))
+    assert round(small.estimate()) == 3
+
+def test_hash_independent_of_dtype():
+    # El mismo valor en int64, float64 (lote con NaN) u object cuenta una sola vez
+    a, b, c = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    a.add(pd.Series([1, 2, 3]))
+    b.add(pd.Series([1, 2, np.nan]).dropna())
+    c.add(pd.Series([3, 2.5], dtype=object))
+    a.merge(b)
+    assert round(a.estimate()) == 3
+    a.merge(c)
+    assert round(a.estimate()) == 4
+
+def test_chunked_csv_distinct_with_nulls(tmp_path):
+    path = tmp_path / 'x.csv'
+    pd.DataFrame({'EDAD': [1, 2, 3, 1, 2, None]}).to_csv(path, index=False)
+    summary = profile_csv(str(path), chunksize=3)
+    assert round(summary['columns']['EDAD']['distinct_estimate']) == 3
+
+def test_chunked_csv_dirty_value_after_first_chunk(tmp_path):
+    # Primer lote solo enteros, el texto sucio aparece después: 0 y '0' son el mismo valor
+    path = tmp_path / 'x.csv'
+    values = [i % 50 for i in range(1000)] + ['x'] + [0] * 20
+    pd.DataFrame({'CODIGO': values}).to_csv(path, index=False)
+    col = profile_csv(str(path), chunksize=500)['columns']['CODIGO']
+    assert round(col['distinct_estimate']) == 51
+    assert col['top'][0] == ('0', 40)
+    assert col['min'] == 0 and col['max'] == 49
+
+def test_topk_heavy_hitters():
+    top = TopK(k=2, capacity=5)
+    values = pd.Series(['CDMX'] * 50 + ['JAL'] * 30 + [f'X{i}' for i in range(100)])
+    top.add(values)
+    assert [v for v, _ in top.top()] == ['CDMX', 'JAL']
+
+def test_quantile_sketch_merge():
+    rng = np.random.default_rng(1)
+    data = rng.normal(50, 10, 200_000)
+    a, b = QuantileSketch(size=128), QuantileSketch(size=128)
+    for chunk in np.array_split(data[:100_000], 10):
+        a.add(chunk)
+    b.add(data[100_000:])
+    a.merge(b)
+    assert a.count == len(data)
+    assert a.min == data.min() and a.max == data.max()
+    assert abs(a.quantile(0.5) - np.median(data)) < 0.5
+    assert abs(a.quantile(0.95) - np.quantile(data, 0.95)) < 1.0
+
+def test_profile_batch(batch):
+    summary = TableProfiler().update(batch).summary()
+    cols = summary['columns']
+    assert summary['rows'] == 4
+    assert cols['CURP']['pattern'] == 'curp'
+    assert cols['CURP']['validity_rate'] == pytest.approx(2 / 3)
+    assert cols['NSS']['null_rate'] == 0.25  # '' cuenta como nulo
+    assert cols['NSS']['validity_rate'] == pytest.approx(2 / 3)
+    assert cols['NSS']['top'][0] == ('12345678901', 2)
+    assert cols['telefono']['validity_rate'] == pytest.approx(2 / 3)
+    assert cols['email']['validity_rate'] == pytest.approx(2 / 3)
+    assert cols['EDAD']['min'] == 20 and cols['EDAD']['max'] == 58
+    assert cols['EDAD']['distinct_estimate'] == 4
+
+def test_parallel_profiles_merge(batch):
+    full = TableProfiler().update(batch).summary()
+    left = TableProfiler().update(batch.iloc[:2])
+    right = TableProfiler().update(batch.iloc[2:])
+    merged = left.merge(right).summary()
+    for col in batch.columns:
+        for key in ('count', 'null_rate', 'distinct_estimate', 'validity_rate', 'min', 'max'):
+            assert merged['columns'][col].get(key) == full['columns'][col].get(key)
+
+def test_merge_does_not_share_columns(batch):
+    left, right = TableProfiler(), TableProfiler().update(batch.iloc[2:])
+    left.merge(right)
+    right.update(batch)  # actualizar uno no cambia al otro
+    assert left.summary() == TableProfiler().update(batch.iloc[2:]).summary()
+    left.update(batch.iloc[:2])
+    assert right.columns['EDAD'].count == 6
+
+def test_profile_csv(tmp_path, batch):
+    path = tmp_path / 'casos.csv'
+    batch.to_csv(path, index=False)
+    summary = profile_csv(str(path), chunksize=3, patterns={'NSS': 'nss'})
+    assert summary['rows'] == 4
+    assert summary['columns']['EDAD']['quantiles'][0.5] is not None
+    with pytest.raises(ValueError):
+        TableProfiler(patterns={'NSS': 'rfc'})
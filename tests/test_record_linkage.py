@@ -4,6 +4,8 @@ Tests for COVID-19 record linkage functionality
 import pytest
 import pandas as pd
 import recordlinkage
+from pathlib import Path
+from src.matching.decision_tree import MatchDecisionTree
 
 class TestCovidRecordLinkage:
     @pytest.fixture
@@ -136,3 +138,29 @@ class TestCovidRecordLinkage:
         # Check if high-confidence matches are found
         assert len(weighted_scores[weighted_scores >= 5.0]) > 0, \
                "Should find high-confidence matches"
+
+    def test_decision_tree_matching(self, sample_data):
+        """Test classification with the configured binary decision tree"""
+        df_a, df_b = sample_data
+
+        indexer = recordlinkage.Index()
+        indexer.block('genero')
+        candidate_pairs = indexer.index(df_a, df_b)
+
+        compare = recordlinkage.Compare()
+        compare.exact('curp', 'curp', label='curp_match')
+        compare.string('nombre', 'nombre', method='jarowinkler',
+                      threshold=0.85, label='nombre_match')
+        compare.numeric('edad', 'edad', label='edad_match', offset=1)
+        compare.exact('telefono', 'telefono', label='telefono_match')
+        features = compare.compute(candidate_pairs, df_a, df_b)
+
+        tree = MatchDecisionTree.from_file(
+            Path(__file__).parent.parent / 'config' / 'match_tree.yml'
+        )
+        decisions = tree.classify_frame(features)
+        matches = decisions[decisions == 'match']
+
+        # Mismos resultados que la regla manual features.sum(axis=1) >= 3
+        assert set(matches.index) == set(features[features.sum(axis=1) >= 3].index)
+        assert 'ABCD123456' in df_a.loc[matches.index.get_level_values(0), 'curp'].values
@@ -0,0 +1,120 @@
+"""
+Tests for the exploratory sampling mode
+"""
+from collections import Counter
+import numpy as np
+import pandas as pd
+import pytest
+from benchmarks.synthetic import patient_models, relational_frame, write_relational_file
+from src.etl.ingestion import CovidDataIngester
+from src.etl.metrics import RunMetrics
+from src.etl.patients_integration import actividad6_estadisticas
+from src.etl.sampling import ReservoirSample, StratifiedReservoir, estadisticas_muestra, sample_csv
+
+@pytest.fixture(scope='module')
+def csv_path(tmp_path_factory):
+    # Ordenado por entidad: los bloques contiguos están correlacionados
+    df = relational_frame(60_000, seed=4).sort_values('ENTIDAD_RES', kind='stable')
+    path = tmp_path_factory.mktemp('rel') / 'casos.csv'
+    df.to_csv(path, index=False)
+    return path, df
+
+def test_reads_only_a_fraction(csv_path):
+    path, df = csv_path
+    muestra = sample_csv(path, fraction=0.02, block_rows=32, seed=0)
+    assert muestra.fraction_read < 0.05
+    assert 0.01 * len(df) < len(muestra.frame) < 0.04 * len(df)
+    lo, hi = muestra.total_rows.ci()
+    assert lo <= len(df) <= hi
+
+def test_error_bars_cover_truth(csv_path):
+    path, df = csv_path
+    verdad = (df['ENTIDAD_RES'] == 14).sum()
+    edad = df['EDAD'].mean()
+    cubre_conteo = cubre_media = 0
+    for seed in range(20):
+        muestra = sample_csv(path, fraction=0.03, block_rows=32, seed=seed)
+        lo, hi = muestra.count_by('ENTIDAD_RES')[14].ci()
+        cubre_conteo += lo <= verdad <= hi
+        lo, hi = muestra.mean('EDAD').ci()
+        cubre_media += lo <= edad <= hi
+    # IC de 95%: en 20 corridas se esperan ~19 coberturas
+    assert cubre_conteo >= 16 and cubre_media >= 16
+
+def test_full_fraction_is_exact(csv_path):
+    path, df = csv_path
+    muestra = sample_csv(path, fraction=1.0)
+    assert len(muestra.frame) == len(df)
+    assert muestra.total_rows.value == pytest.approx(len(df))
+    assert muestra.total_rows.stderr == 0
+    diabetes = muestra.proportion('DIABETES', where=lambda s: s == 1)[True]
+    assert diabetes.value == pytest.approx((df['DIABETES'] == 1).mean()) and diabetes.stderr == 0
+
+def test_blocks_stay_in_their_segment(tmp_path):
+    # Filas cortas al inicio (la sonda subestima bytes por fila) y largas después
+    largo = np.random.default_rng(0).integers(200, 2000, 3000)
+    df = pd.DataFrame({'ID': range(11_000), 'T': ['x'] * 8000 + ['y' * n for n in largo]})
+    path = tmp_path / 'irregular.csv'
+    df.to_csv(path, index=False)
+    for seed in range(3):
+        muestra = sample_csv(path, fraction=0.3, block_rows=16, seed=seed)
+        assert not muestra.frame['ID'].duplicated().any()
+        assert muestra.sampled_bytes == muestra.frame['_bytes'].sum()
+
+def test_post_stratified_mean(csv_path):
+    path, df = csv_path
+    sizes = df['ENTIDAD_RES'].value_counts().to_dict()
+    exacta = sample_csv(path, fraction=1.0).post_stratified_mean('EDAD', by='ENTIDAD_RES', sizes=sizes)
+    assert exacta.value == pytest.approx(df['EDAD'].mean()) and exacta.stderr == 0
+    edad, diabetes = df['EDAD'].mean(), (df['DIABETES'] == 1).mean()
+    cubre_media = cubre_prop = 0
+    for seed in range(20):
+        muestra = sample_csv(path, fraction=0.03, block_rows=32, seed=seed)
+        lo, hi = muestra.post_stratified_mean('EDAD', by='ENTIDAD_RES', sizes=sizes).ci()
+        cubre_media += lo <= edad <= hi
+        lo, hi = muestra.post_stratified_mean('DIABETES', by='ENTIDAD_RES', sizes=sizes,
+                                              where=lambda s: s == 1).ci()
+        cubre_prop += lo <= diabetes <= hi
+    assert cubre_media >= 16 and cubre_prop >= 16
+
+def test_rejects_multiline_records(tmp_path):
+    path = tmp_path / 'multi.csv'
+    path.write_text('a,b\n1,"x\ny"\n2,z\n', encoding='utf-8')
+    with pytest.raises(ValueError, match='multi-line'):
+        sample_csv(path, fraction=1.0)
+
+def test_reservoir_is_uniform():
+    hits = Counter()
+    for seed in range(2000):
+        hits.update(ReservoirSample(5, seed).extend(range(20)).items)
+    freqs = np.array([hits[i] for i in range(20)]) / 2000
+    assert np.allclose(freqs, 5 / 20, atol=0.05)
+    r = ReservoirSample(10, seed=1).extend(range(1000))
+    assert r.seen == 1000 and len(r.items) == 10
+    assert ReservoirSample(10, seed=1).extend(range(1000)).items == r.items
+
+def test_stratified_totals_and_stats():
+    pacientes = patient_models(6000, seed=2)
+    for p in pacientes[::7]:
+        p.direccion = None
+    exacto = actividad6_estadisticas(pacientes)
+    stats = estadisticas_muestra(pacientes, k=400, seed=0)
+    assert stats.total_pacientes == exacto['total_pacientes']
+    assert stats.por_hospital == exacto['por_hospital']
+    assert stats.muestra == 1600
+    lo, hi = stats.campos_vacios['direccion'].ci()
+    assert lo <= exacto['campos_vacios']['direccion'] <= hi
+    # Estratos más chicos que k: se cuentan exactos, sin error
+    chico = StratifiedReservoir(10_000, key=lambda p: p.HospOrigen, seed=0).extend(pacientes)
+    total = chico.total(lambda p: p.direccion is None)
+    assert total.value == exacto['campos_vacios']['direccion'] and total.stderr == 0
+
+def test_ingester_sample_mode(tmp_path):
+    write_relational_file(tmp_path, 20_000, seed=1)
+    metrics = RunMetrics()
+    muestra = CovidDataIngester(str(tmp_path), metrics).ingest_relational_sample(fraction=0.05, seed=3)
+    stage = metrics.get('ingest_relational_sample')
+    assert stage.rows_in == len(muestra.frame)
+    assert stage.rows_out == len(muestra.casos) > 0
+    assert muestra.casos[0].source_file == 'COVID19MEXICO.csv'
+    assert muestra.fraction_read < 0.1
@@ -0,0 +1,44 @@
+"""
+Tests for streaming preprocessing scalers (Práctica 5)
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from pathlib import Path
+from src.preprocessing.scalers import (PIMA_COLUMNS, PIMA_ZERO_AS_NULL, ColumnStats,
+                                       StreamingStats, scale_csv)
+
+P5 = Path(__file__).parent.parent / 'p5'
+
+def test_column_stats_chunked_matches_full():
+    rng = np.random.default_rng(0)
+    data = rng.normal(10, 3, 10_000)
+    stats = ColumnStats()
+    for chunk in np.array_split(data, 7):
+        stats.update(chunk)
+    assert stats.count == len(data)
+    assert stats.mean == pytest.approx(data.mean())
+    assert stats.std == pytest.approx(data.std())
+    assert (stats.min, stats.max) == (data.min(), data.max())
+
+def test_fill_adjusts_stats_without_reread():
+    df = pd.DataFrame({'a': [0, 2.0, 4.0, 0, 6.0]})
+    stats = StreamingStats(['a'], zero_as_null=['a']).fit([df.iloc[:2], df.iloc[2:]])
+    assert stats.fill_values == {'a': 4.0}
+    filled = np.array([4.0, 2.0, 4.0, 4.0, 6.0])
+    assert stats.stats['a'].mean == pytest.approx(filled.mean())
+    assert stats.stats['a'].std == pytest.approx(filled.std())
+    assert stats.null_counts() == {'a': 2}
+
+def test_scale_csv_reproduces_p5_outputs(tmp_path):
+    """Dos lecturas por bloques reproducen los CSV generados por el notebook (crea out_dir)"""
+    features = PIMA_COLUMNS[:-1]
+    result = scale_csv(P5 / 'pacientes.csv', tmp_path / 'salida', features, passthrough=['Outcome'],
+                       names=PIMA_COLUMNS, zero_as_null=PIMA_ZERO_AS_NULL, chunksize=100)
+    for name, path in result['outputs'].items():
+        esperado = pd.read_csv(P5 / f'pacientes_{name}.csv')
+        obtenido = pd.read_csv(path)
+        assert list(obtenido.columns) == list(esperado.columns)
+        np.testing.assert_allclose(obtenido.to_numpy(float), esperado.to_numpy(float), atol=1e-9)
+    assert result['nulls']['TwoHourInsulin'] > 0
+    assert set(result['fill_values']) == set(PIMA_ZERO_AS_NULL)
@@ -0,0 +1,113 @@
+"""
+Tests for the batched SQL connector (SQLite stand-in for PostgreSQL)
+"""
+import pytest
+import pandas as pd
+from src.etl.connectors.config import load_connector_config
+from src.etl.connectors.sql import SqlConnector, _copy_buffer
+from src.etl.metrics import RunMetrics
+
+@pytest.fixture
+def connector(tmp_path):
+    conn = SqlConnector(f"sqlite:///{tmp_path / 'mdm.db'}", batch_size=2)
+    conn.execute(
+        "CREATE TABLE pacientes (pac_clave INTEGER, nombrePac TEXT, "
+        "apePatPac TEXT, direccion TEXT, HospOrigen TEXT)"
+    )
+    yield conn
+    conn.close()
+
+@pytest.fixture
+def pacientes_df():
+    return pd.DataFrame({
+        'pac_clave': [1, 2, 3, 4, 5],
+        'nombrePac': ['ANA', 'LUIS', 'EVA', 'JOSE', 'ROSA'],
+        'apePatPac': ['SOTO', None, 'VEGA', 'TORO', 'MORA'],
+        'direccion': ['C/ 1', 'C/ 2', None, 'C/ 4', 'C/ 5'],
+        'HospOrigen': ['Siglo21'] * 5
+    })
+
+def test_write_and_read_batches(connector, pacientes_df):
+    """Escritura masiva y lectura en lotes con cursor de servidor"""
+    assert connector.write_frame(pacientes_df, 'pacientes') == 5
+    batches = list(connector.read_table('pacientes'))
+    assert [len(b) for b in batches] == [2, 2, 1]
+    leidos = pd.concat(batches, ignore_index=True)
+    assert leidos['pac_clave'].tolist() == [1, 2, 3, 4, 5]
+    # NULLs preservados
+    assert leidos.loc[1, 'apePatPac'] is None
+    assert leidos.loc[2, 'direccion'] is None
+
+def test_read_batches_with_params(connector, pacientes_df):
+    connector.write_batches([pacientes_df.iloc[:3], pacientes_df.iloc[3:]], 'pacientes')
+    batches = list(connector.read_batches(
+        "SELECT pac_clave FROM pacientes WHERE pac_clave > :min", {'min': 2}, batch_size=10
+    ))
+    assert len(batches) == 1
+    assert batches[0]['pac_clave'].tolist() == [3, 4, 5]
+
+def test_write_models(connector):
+    from src.models.landing.schemas import PacienteFederadoLanding
+    modelos = [PacienteFederadoLanding(pac_clave=7, nombrePac=' ANA ', HospOrigen='ABC')]
+    assert connector.write_models(modelos, 'pacientes') == 1
+    df = next(connector.read_table('pacientes', columns=['pac_clave', 'nombrePac']))
+    assert df.to_dict('records') == [{'pac_clave': 7, 'nombrePac': 'ANA'}]
+
+def test_copy_statement():
+    """El SQL de COPY cita identificadores y define el marcador de NULL"""
+    conn = SqlConnector("sqlite://")
+    stmt = conn.copy_statement('pacientes', ['pac_clave', 'nombrePac'], schema='landing')
+    assert stmt.startswith('COPY landing.pacientes (pac_clave, "nombrePac") FROM STDIN')
+    assert "FORMAT csv" in stmt
+
+def test_load_connector_config(tmp_path, monkeypatch):
+    cfg_file = tmp_path / 'connectors.yml'
+    cfg_file.write_text(
+        "connectors:\n  postgres:\n    type: sql\n    host: db\n    port: 5432\n"
+        "    database: mdm\n    user: postgres\n    password: ${PG_TEST_PASS}\n"
+    )
+    monkeypatch.setenv('PG_TEST_PASS', 's3cret')
+    cfg = load_connector_config('postgres', cfg_file)
+    assert cfg['password'] == 's3cret'
+    conn = SqlConnector.from_config('postgres', cfg_file)
+    assert conn.engine.url.host == 'db'
+    assert conn.engine.url.password == 's3cret'
+    with pytest.raises(KeyError):
+        load_connector_config('missing', cfg_file)
+
+def test_load_siglo21_db(tmp_path):
+    """Siglo21 leído desde la BD en lugar del dump SQL"""
+    from src.etl.patients_integration import load_siglo21_db
+    conn = SqlConnector(f"sqlite:///{tmp_path / 'siglo21.db'}", batch_size=1)
+    conn.execute('CREATE TABLE "Pacientes" (NOMBRE TEXT, APELLIDO TEXT, NSS TEXT, Direccion TEXT)')
+    conn.write_frame(pd.DataFrame({
+        'NOMBRE': ['Emilie', 'Alexis'], 'APELLIDO': ['Poblete', 'Soto'],
+        'NSS': ['69699138699', '25496940399'], 'Direccion': ['C/ 1', 'C/ 2']
+    }), 'Pacientes')
+    batches = load_siglo21_db(conn)
+    assert next(batches).to_dict('records') == [
+        {'NOMBRE': 'Emilie', 'APELLIDO': 'Poblete', 'NSS': '69699138699', 'Direccion': 'C/ 1'}]
+    assert next(batches)['NSS'].tolist() == ['25496940399']
+    assert next(batches, None) is None
+    conn.close()
+
+def test_siglo21_db_mapped_per_batch(tmp_path):
+    from src.etl.patients_integration import (MAPPING_SIGLO21, actividad2_cargar_siglo21_db,
+                                              apply_mapping, deduplicate)
+    conn = SqlConnector(f"sqlite:///{tmp_path / 'siglo21.db'}", batch_size=2)
+    conn.execute('CREATE TABLE "Pacientes" (NOMBRE TEXT, APELLIDO TEXT, NSS TEXT, Direccion TEXT)')
+    df = pd.DataFrame({'NOMBRE': ['Ana', None, 'Ana', 'Luis', 'Eva'],
+                       'APELLIDO': ['Soto', 'Vega', 'Soto', 'Mora', None],
+                       'NSS': ['111', '222', '111', '333', '444'], 'Direccion': ['C/ 1'] * 5})
+    conn.write_frame(df, 'Pacientes')
+    metrics = RunMetrics()
+    pacientes = actividad2_cargar_siglo21_db(conn, metrics=metrics)
+    assert pacientes == deduplicate(apply_mapping(df, MAPPING_SIGLO21, 'Siglo21'))
+    stage = metrics.get('actividad2_cargar_siglo21_db')
+    assert (stage.rows_in, stage.rows_out, stage.rows_rejected) == (5, 3, 1)
+    conn.close()
+
+def test_copy_writes_integers_with_nulls():
+    df = pd.DataFrame({'pac_clave': [7, None, 9], 'score': [0.5, None, 1.0], 'nombre': ['A', None, 'C']})
+    assert df['pac_clave'].dtype == 'float64'
+    assert _copy_buffer(df).read().splitlines() == ['7,0.5,A', r'\N,\N,\N', '9,1.0,C']
@@ -0,0 +1,77 @@
+"""
+Tests for streaming text-corpus ingestion
+"""
+import math
+import pytest
+from src.etl.ingestion import CovidDataIngester
+from src.etl.metrics import RunMetrics
+from src.etl.text_corpus import Gazetteer, TextCorpus, tokenize
+
+DOCS = {
+    'a.txt': "Paciente de Baja California Sur con neumonía.\nSe reporta intubación en Jalisco.\n"
+             "Neumonía grave; neumonía atípica.\n",
+    'b.txt': "Brote en la CDMX: casos de diabetes e hipertensión.\nDiabetes tipo 2.\n",
+    'sub/c.txt': "Resumen nacional de COVID-19 en México sin entidad específica.\n",
+}
+
+@pytest.fixture
+def text_dir(tmp_path):
+    base = tmp_path / 'Text'
+    for name, content in DOCS.items():
+        (base / name).parent.mkdir(parents=True, exist_ok=True)
+        (base / name).write_text(content, encoding='utf-8')
+    return tmp_path
+
+def test_gazetteer_prefers_longest_whole_words():
+    g = Gazetteer.from_catalog()
+    assert g.find('BAJA CALIFORNIA SUR Y BAJA CALIFORNIA') == ['BAJA CALIFORNIA SUR', 'BAJA CALIFORNIA']
+    assert g.find('VIVE EN CDMX, NO EN MEXICO') == ['CIUDAD DE MÉXICO']
+    assert g.find('NUEVO LEONARDO') == []
+    assert g.find('ESTADO DE MEXICO Y NUEVO LEON') == ['MÉXICO', 'NUEVO LEÓN']
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_ingest_directory(text_dir, workers):
+    corpus = TextCorpus()
+    metrics = RunMetrics()
+    casos = CovidDataIngester(str(text_dir), metrics=metrics).ingest_text_corpus(corpus, workers=workers)
+    por_archivo = {c.source_file: c for c in casos}
+    assert set(por_archivo) == {'a.txt', 'b.txt', 'sub/c.txt'}
+    assert por_archivo['a.txt'].entidad == 'BAJA CALIFORNIA SUR'
+    assert por_archivo['b.txt'].entidad == 'CIUDAD DE MÉXICO'
+    assert por_archivo['sub/c.txt'].entidad == 'Nacional'
+    assert por_archivo['a.txt'].keywords[0] == 'NEUMONIA'
+    assert por_archivo['b.txt'].keywords[0] == 'DIABETES'
+    assert por_archivo['a.txt'].texto_completo == DOCS['a.txt']
+    assert metrics.get('ingest_text_corpus').rows_out == 3
+
+def test_incremental_idf_and_search(text_dir):
+    corpus = TextCorpus()
+    corpus.ingest_directory(text_dir / 'Text', pattern='a.txt')
+    assert corpus.idf('NEUMONIA') == pytest.approx(1.0)
+    (text_dir / 'Text' / 'd.txt').write_text('Neumonía en Sonora.\n', encoding='utf-8')
+    corpus.ingest_directory(text_dir / 'Text', pattern='[bd].txt')
+    assert len(corpus) == 3
+    assert corpus.idf('NEUMONIA') == pytest.approx(math.log(4 / 3) + 1)
+    assert [doc for doc, _ in corpus.search('neumonía')] == ['d.txt', 'a.txt']
+    assert corpus.search('diabetes hipertension')[0][0] == 'b.txt'
+    # re-ingerir un archivo lo reemplaza en el índice
+    corpus.ingest_directory(text_dir / 'Text', pattern='d.txt')
+    assert corpus.doc_freq['NEUMONIA'] == 2
+
+def test_tokenize_drops_stopwords_and_numbers():
+    assert tokenize('CASOS DE COVID 19 EN LAS UCI') == ['CASOS', 'COVID', 'UCI']
+
+def test_scans_added_as_they_arrive(text_dir, monkeypatch):
+    import src.etl.text_corpus as text_corpus
+    scanned, seen = [], []
+    original = text_corpus.scan_file
+    monkeypatch.setattr(text_corpus, 'scan_file', lambda *a: scanned.append(a[0]) or original(*a))
+
+    class Corpus(TextCorpus):
+        def add(self, scan):
+            seen.append(len(scanned))  # archivos escaneados al momento de agregar
+            return super().add(scan)
+
+    casos = Corpus().ingest_directory(text_dir / 'Text')
+    assert seen == [1, 2, 3]
+    assert [c.source_file for c in casos] == sorted(DOCS)
@@ -0,0 +1,85 @@
+"""
+Tests for batch validation of landing records
+"""
+from pydantic import ValidationError
+from benchmarks.differential import dirty_patients_frame
+from src.etl.metrics import RunMetrics
+from src.etl.patients_integration import MAPPING_ABC, apply_mapping
+from src.models.landing.schemas import CasoDiarioLanding, PacienteFederadoLanding
+from src.models.landing.validation import ERROR_COLUMNS, BatchValidator, validate_batch
+
+def _record(i, **kwargs):
+    record = {'pac_clave': i, 'nombrePac': f' JUAN{i} ', 'apePatPac': 'PEREZ', 'apeMatPac': None,
+              'direccion': None, 'HospOrigen': 'ABC'}
+    record.update(kwargs)
+    return record
+
+def _row_by_row(records, model):
+    valid, errors = [], []
+    for i, r in enumerate(records):
+        try:
+            valid.append(model(**r))
+        except ValidationError as e:
+            errors += [(i, '.'.join(map(str, err['loc'])), err['type']) for err in e.errors()]
+    return valid, errors
+
+def _dirty_records():
+    records = [_record(i) for i in range(20)]
+    records[3]['nombrePac'] = None                       # pre-check
+    records[5]['pac_clave'] = 'abc'                      # TypeAdapter
+    del records[8]['HospOrigen']                         # missing
+    records[12].update(pac_clave=None, nombrePac=None)   # dos nulos
+    records[15]['HospOrigen'] = 7                        # tipo
+    return records
+
+def test_matches_row_by_row():
+    records = _dirty_records()
+    result = validate_batch(records, PacienteFederadoLanding)
+    valid, errors = _row_by_row(records, PacienteFederadoLanding)
+    assert [m.model_dump() for m in result.valid] == [m.model_dump() for m in valid]
+    assert result.valid[0].nombrePac == 'JUAN0'  # el validador del modelo sí corre
+    assert result.rows == [i for i in range(20) if i not in (3, 5, 8, 12, 15)]
+    assert result.rejected == 5
+    table = result.errors
+    assert list(table.columns) == ERROR_COLUMNS
+    assert sorted(zip(table['row'], table['field'], table['type'])) == sorted(errors)
+
+def test_clean_and_empty_batches():
+    result = validate_batch([_record(i) for i in range(5)], PacienteFederadoLanding)
+    assert len(result.valid) == 5 and result.errors.empty
+    empty = validate_batch([], PacienteFederadoLanding)
+    assert empty.valid == [] and empty.rejected == 0
+
+def test_other_models():
+    records = [{'fecha': '2021-01-01', 'estado': 'CDMX', 'source_file': 'a'},
+               {'fecha': 'ayer', 'estado': 'CDMX', 'source_file': 'a'},
+               {'fecha': '2021-01-02', 'estado': None, 'source_file': 'a', 'confirmados': 'x'}]
+    result = BatchValidator(CasoDiarioLanding).validate(records)
+    assert [str(m.fecha) for m in result.valid] == ['2021-01-01']
+    expected = _row_by_row(records, CasoDiarioLanding)[1]
+    # La fila 2 sale en el pre-check: solo reporta su nulo, no el error de 'confirmados'
+    assert set(zip(result.errors['row'], result.errors['field'], result.errors['type'])) < set(expected)
+    assert set(result.errors['row']) == {i for i, _, _ in expected}
+
+def test_metrics_keys_unchanged():
+    records = _dirty_records()
+    batch, single = RunMetrics(), RunMetrics()
+    with batch.stage('s') as stage:
+        validate_batch(records, PacienteFederadoLanding).record_errors(stage, records, context='pac_clave')
+    with single.stage('s') as stage:
+        for r in records:
+            try:
+                PacienteFederadoLanding(**r)
+            except ValidationError as e:
+                stage.record_error(e, context=r.get('pac_clave'))
+    counts = lambda m: {k: v.count for k, v in m.stages[0].errors.items()}
+    assert counts(batch) == counts(single)
+
+def test_apply_mapping_on_dirty_feed():
+    df = dirty_patients_frame(600, seed=5)
+    metrics = RunMetrics()
+    pacientes = apply_mapping(df, MAPPING_ABC, 'ABC', metrics)
+    stage = metrics.stages[0]
+    assert stage.rows_out == len(pacientes) and stage.rows_rejected == len(df) - len(pacientes)
+    assert stage.error_count == stage.rows_rejected
+    assert all(isinstance(p, PacienteFederadoLanding) for p in pacientes)